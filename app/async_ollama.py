@@ -0,0 +1,279 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import AsyncIterator
+
+import aiohttp
+import ollama_client
+import tracing
+from config import Config
+from llm_cache import is_deterministic, shared_response_cache
+from ollama_client import OllamaError, PromptPrefixes, StreamStats
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncOllamaClient:
+    """
+    asyncio version of OllamaClient on one aiohttp session.
+
+    Follows the same policy: at most `max_concurrency` requests in flight
+    (others wait on a semaphore without holding a thread), retries with
+    backoff for connection errors, connect timeouts and 5xx (not for read
+    timeouts), `keep_alive` on every request,
+    system-prompt context reuse and the response cache for deterministic calls.
+    """
+
+    def __init__(
+        self,
+        base_url: str = Config.OLLAMA_URL,
+        model: str = Config.OLLAMA_MODEL,
+        keep_alive: str = Config.OLLAMA_KEEP_ALIVE,
+        max_concurrency: int = Config.OLLAMA_MAX_CONCURRENCY,
+        connect_timeout: float = Config.OLLAMA_CONNECT_TIMEOUT,
+        read_timeout: float = Config.OLLAMA_READ_TIMEOUT,
+        max_retries: int = Config.OLLAMA_MAX_RETRIES,
+        backoff: float = 0.5,
+        reuse_context: bool = Config.OLLAMA_REUSE_CONTEXT,
+        response_cache=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.keep_alive = keep_alive
+        self.reuse_context = reuse_context
+        self.prefixes = PromptPrefixes()
+        self.response_cache = response_cache or shared_response_cache()
+        self.max_concurrency = max_concurrency
+        self.timeout = aiohttp.ClientTimeout(
+            sock_connect=connect_timeout, sock_read=read_timeout
+        )
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._session = None
+
+    def _get_session(self):
+        # Created lazily so the session binds to the running loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=self.timeout
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _payload(self, prompt, model, system_prompt, stream, options):
+        payload = {
+            "model": model or self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+        }
+        if system_prompt:
+            payload["system"] = system_prompt
+        if options:
+            payload["options"] = options
+        return payload
+
+    async def _post(self, path, payload):
+        """POST with retries; returns a response with a 2xx status."""
+        url = f"{self.base_url}{path}"
+        session = self._get_session()
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await session.post(url, json=payload)
+            except aiohttp.ConnectionTimeoutError as e:
+                error = e
+            except (aiohttp.ServerTimeoutError, asyncio.TimeoutError) as e:
+                # Read timeout: the model is busy, and retrying would add load.
+                # Checked before ClientConnectionError, which it subclasses
+                raise OllamaError(f"Error calling Ollama API: {str(e)}")
+            except aiohttp.ClientConnectionError as e:
+                error = e
+            except aiohttp.ClientError as e:
+                raise OllamaError(f"Error calling Ollama API: {str(e)}")
+            else:
+                if response.status not in ollama_client.RETRY_STATUSES:
+                    if response.status >= 400:
+                        response.release()
+                        raise OllamaError(
+                            f"Error calling Ollama API: HTTP {response.status}"
+                        )
+                    return response
+                error = f"HTTP {response.status}"
+                response.release()
+
+            if attempt == self.max_retries:
+                break
+            delay = self.backoff * (2**attempt) * (0.5 + random.random())
+            logger.warning(
+                "Ollama request failed (%s), retry %d/%d in %.2fs",
+                error,
+                attempt + 1,
+                self.max_retries,
+                delay,
+            )
+            await asyncio.sleep(delay)
+        raise OllamaError(
+            f"Error calling Ollama API after {self.max_retries + 1} attempts: {error}"
+        )
+
+    async def _use_prefix(self, payload):
+        """Swap the system prompt for its evaluated context, priming once."""
+        system_prompt = payload.get("system")
+        if not self.reuse_context or not system_prompt:
+            return
+        known, prefix = self.prefixes.lookup(payload["model"], system_prompt)
+        if not known:
+            prime = self._payload(
+                ollama_client.PRIME_PROMPT,
+                payload["model"],
+                system_prompt,
+                False,
+                ollama_client.PRIME_OPTIONS,
+            )
+            try:
+                async with self._slots:
+                    response = await self._post("/api/generate", prime)
+                    try:
+                        result = await response.json(content_type=None)
+                    finally:
+                        response.release()
+            except (OllamaError, ValueError, aiohttp.ClientError) as e:
+                # Not fatal: send the full system prompt and try again next time
+                logger.warning("Could not prime Ollama context: %s", e)
+                return
+            prefix = self.prefixes.store(payload["model"], system_prompt, result)
+        if prefix:
+            self.prefixes.apply(payload, prefix)
+
+    async def cached_response(
+        self, prompt, model=None, system_prompt=None, options=None
+    ):
+        """Cached answer to a deterministic call, or None."""
+        if self.response_cache is None or not is_deterministic(options):
+            return None
+        # The disk tier is SQLite, so stay off the loop
+        return await asyncio.to_thread(
+            self.response_cache.get,
+            model or self.model,
+            system_prompt,
+            prompt,
+            options,
+        )
+
+    async def generate(
+        self,
+        prompt: str,
+        model: str = None,
+        system_prompt: str = None,
+        options: dict = None,
+        check_cache: bool = True,
+    ) -> dict:
+        """
+        Non-streaming generation; returns Ollama's full JSON response.
+        Pass check_cache=False when cached_response() was already consulted,
+        so a miss is not counted twice (the result is still stored).
+        """
+        model = model or self.model
+        with tracing.span("ollama.generate", model=model) as span:
+            if check_cache:
+                cached = await self.cached_response(
+                    prompt, model, system_prompt, options
+                )
+                if cached is not None:
+                    span.set(cached=True)
+                    return cached
+            cache = self.response_cache if is_deterministic(options) else None
+
+            payload = self._payload(prompt, model, system_prompt, False, options)
+            await self._use_prefix(payload)
+            async with self._slots:
+                response = await self._post("/api/generate", payload)
+                try:
+                    result = await response.json(content_type=None)
+                except (ValueError, aiohttp.ClientError) as e:
+                    raise OllamaError(f"Invalid response from Ollama API: {str(e)}")
+                finally:
+                    response.release()
+            span.set(**ollama_client.ollama_timings(result))
+            if cache is not None:
+                await asyncio.to_thread(
+                    cache.put, model, system_prompt, prompt, options, result
+                )
+            return result
+
+    def savings(self) -> dict:
+        """Cache hit rate and prompt tokens Ollama did not re-evaluate."""
+        return {
+            "response_cache": (
+                self.response_cache.stats() if self.response_cache else None
+            ),
+            "prefix_reuse": self.prefixes.stats(),
+        }
+
+    async def stream(
+        self,
+        prompt: str,
+        model: str = None,
+        system_prompt: str = None,
+        options: dict = None,
+        stats: StreamStats = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a generation, yielding text fragments as they arrive.
+        Cancelling the consuming task (or closing the generator) closes the
+        connection, which also stops generation server-side.
+        """
+        stats = stats if stats is not None else StreamStats()
+        payload = self._payload(prompt, model, system_prompt, True, options)
+        await self._use_prefix(payload)
+
+        async with self._slots:
+            stats.started_at = time.perf_counter()
+            response = await self._post("/api/generate", payload)
+            try:
+                async for line in response.content:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        chunk = json.loads(line)
+                    except ValueError as e:
+                        raise OllamaError(f"Invalid line in Ollama stream: {e}")
+                    if "error" in chunk:
+                        raise OllamaError(f"Error calling Ollama API: {chunk['error']}")
+                    text = chunk.get("response", "")
+                    if text:
+                        if stats.first_token_at is None:
+                            stats.first_token_at = time.perf_counter()
+                        stats.chunks += 1
+                        yield text
+                    if chunk.get("done"):
+                        stats.eval_count = chunk.get("eval_count")
+                        stats.eval_duration_ns = chunk.get("eval_duration")
+                        stats.final_chunk = chunk
+                        break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                stats.error = OllamaError.__name__
+                raise OllamaError(f"Error reading Ollama stream: {str(e)}")
+            except (GeneratorExit, asyncio.CancelledError):
+                stats.cancelled = True
+                raise
+            except BaseException as e:
+                stats.error = type(e).__name__
+                raise
+            finally:
+                stats.finished_at = time.perf_counter()
+                if stats.cancelled:
+                    response.close()
+                else:
+                    response.release()
+                logger.info("Ollama stream: %s", stats.summary())
+                stats.trace(payload["model"])
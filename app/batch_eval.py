@@ -0,0 +1,279 @@
+"""
+Batch / offline evaluation: push a JSONL file of conversations through
+extract_symptoms -> build_context_from_symptoms -> call_ollama.
+
+    python app/batch_eval.py data/eval/conversations.jsonl results.jsonl --workers 8
+    python app/batch_eval.py data/eval/conversations.jsonl results.jsonl --stub-backends
+
+Input lines look like {"id": "c1", "messages": ["I have a fever", "and a cough", "no"]}.
+Each result is appended to the output as soon as it is ready, so an
+interrupted run resumes where it stopped (conversations that errored are
+retried). A per-stage latency summary is printed at the end.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import prompts
+import tracing
+from config import Config
+from context_builder import estimate_tokens
+from graph_connector import NO_MATCH_CONTEXT, GraphConnector
+from metrics import percentile
+from ollama_client import OllamaClient, default_client
+from pipeline import call_ollama, extract_symptoms
+
+STAGES = ["extract", "context", "answer", "total"]
+PERCENTILES = [50, 90, 95, 99]
+
+
+# -------------------------
+# Input / output
+# -------------------------
+def read_conversations(path):
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            messages = record.get("messages", [])
+            if isinstance(messages, str):
+                messages = [messages]
+            yield {"id": str(record.get("id", f"line-{line_no}")), "messages": messages}
+
+
+def completed_ids(path):
+    """Ids already in the output without an error (resume support)."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                # Line cut short by an interruption
+                continue
+            if result.get("status") != "error":
+                done.add(result["id"])
+    return done
+
+
+def open_output(path):
+    """Append mode; a partial last line from an interrupted run is closed off."""
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    out = open(path, "a+b")
+    if out.tell() > 0:
+        out.seek(-1, os.SEEK_END)
+        if out.read(1) != b"\n":
+            out.write(b"\n")
+    return out
+
+
+# -------------------------
+# Pipeline
+# -------------------------
+def run_conversation(conversation, graph, client, top_k, token_budget):
+    result = {"id": conversation["id"], "timings": {}}
+    timings = result["timings"]
+    start = time.perf_counter()
+    # Spans of this conversation (TRACING=log) carry its id
+    tracing.set_trace_id(conversation["id"])
+    try:
+        chat_history = []
+        symptoms = []
+        for message in conversation["messages"]:
+            chat_history.append({"role": "user", "content": message})
+            if prompts.is_done(message):
+                continue
+            for symptom in extract_symptoms(message, client=client):
+                if symptom not in symptoms:
+                    symptoms.append(symptom)
+        timings["extract"] = time.perf_counter() - start
+        result["symptoms"] = symptoms
+        if len(symptoms) < prompts.MIN_SYMPTOMS:
+            result["status"] = "too_few_symptoms"
+            return result
+
+        stage = time.perf_counter()
+        context_text = graph.build_context_from_symptoms(
+            symptoms, top_k=top_k, token_budget=token_budget
+        )
+        timings["context"] = time.perf_counter() - stage
+        if context_text == NO_MATCH_CONTEXT:
+            result["status"] = "no_match"
+            return result
+
+        stage = time.perf_counter()
+        prompt = prompts.build_final_prompt(chat_history, symptoms, context_text)
+        result["context_tokens"] = estimate_tokens(context_text)
+        result["prompt_tokens"] = estimate_tokens(prompt)
+        result["answer"] = call_ollama(
+            prompt, system_prompt=prompts.load_instructions(), client=client
+        )
+        timings["answer"] = time.perf_counter() - stage
+        result["status"] = "ok"
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        timings["total"] = time.perf_counter() - start
+    return result
+
+
+def run_batch(conversations, output_path, graph, client, workers, top_k, token_budget):
+    """Run conversations on a thread pool; returns the results of this run."""
+    done = completed_ids(output_path)
+    pending = (c for c in conversations if c["id"] not in done)
+    results = []
+    if done:
+        print(f"↪️  Resuming: {len(done)} conversations already in {output_path}")
+
+    with open_output(output_path) as out, ThreadPoolExecutor(workers) as pool:
+        in_flight = set()
+
+        def submit_next():
+            conversation = next(pending, None)
+            if conversation is not None:
+                in_flight.add(
+                    pool.submit(
+                        run_conversation,
+                        conversation,
+                        graph,
+                        client,
+                        top_k,
+                        token_budget,
+                    )
+                )
+
+        # Keep the pool busy without reading the whole input up front
+        for _ in range(workers * 2):
+            submit_next()
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                in_flight.discard(future)
+                result = future.result()
+                results.append(result)
+                out.write((json.dumps(result, ensure_ascii=False) + "\n").encode())
+                out.flush()
+                submit_next()
+            if len(results) % 100 == 0 and results:
+                print(f"   ... {len(results)} conversations done")
+    return results
+
+
+# -------------------------
+# Summary
+# -------------------------
+def summarize(results, wall_seconds):
+    statuses = {}
+    for result in results:
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+    stages = {}
+    for stage in STAGES:
+        values = [r["timings"][stage] for r in results if stage in r["timings"]]
+        if values:
+            stages[stage] = {
+                "count": len(values),
+                "mean": sum(values) / len(values),
+                **{f"p{q}": percentile(values, q) for q in PERCENTILES},
+                "max": max(values),
+            }
+    return {
+        "conversations": len(results),
+        "statuses": statuses,
+        "wall_seconds": wall_seconds,
+        "throughput_per_second": len(results) / wall_seconds if wall_seconds else None,
+        "stages": stages,
+    }
+
+
+def print_summary(summary):
+    print("\n📊 Batch summary")
+    print(
+        f"   {summary['conversations']} conversations in "
+        f"{summary['wall_seconds']:.2f}s "
+        f"({summary['throughput_per_second'] or 0:.2f}/s) {summary['statuses']}"
+    )
+    header = ["stage", "count", "mean"] + [f"p{q}" for q in PERCENTILES] + ["max"]
+    print("   " + "".join(f"{h:>10}" for h in header))
+    for stage, s in summary["stages"].items():
+        cells = [stage, s["count"]] + [f"{s[k] * 1000:.1f}ms" for k in header[2:]]
+        print("   " + "".join(f"{c:>10}" for c in cells))
+
+
+# -------------------------
+# CLI
+# -------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="Batch-evaluate conversations")
+    parser.add_argument("input", help="JSONL file of conversations")
+    parser.add_argument("output", help="JSONL results file (appended; resumable)")
+    parser.add_argument(
+        "--workers", type=int, default=4, help="Concurrent conversations"
+    )
+    parser.add_argument("--top-k", type=int, default=Config.CONTEXT_TOP_K)
+    parser.add_argument("--token-budget", type=int, default=Config.CONTEXT_TOKEN_BUDGET)
+    parser.add_argument("--summary", help="Also write the summary as JSON here")
+    parser.add_argument(
+        "--stub-backends",
+        action="store_true",
+        help="Use an in-process stub Ollama and the processed_data symptom index",
+    )
+    parser.add_argument("--stub-port", type=int, default=11436)
+    parser.add_argument(
+        "--token-delay", type=float, default=0.0, help="Seconds per stub token"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    client = default_client()
+    if args.stub_backends:
+        import stub_ollama
+
+        stub_ollama.serve(port=args.stub_port, token_delay=args.token_delay)
+        client = OllamaClient(
+            base_url=f"http://127.0.0.1:{args.stub_port}",
+            max_concurrency=args.workers,
+        )
+        # The index answers every graph lookup, so Neo4j is never contacted
+        Config.SYMPTOM_INDEX = "processed"
+        Config.NEO4J_URI = Config.NEO4J_URI or "bolt://localhost:7687"
+        print(f"🧪 Stub Ollama on port {args.stub_port}, graph from processed_data/")
+
+    graph = GraphConnector()
+    start = time.perf_counter()
+    try:
+        results = run_batch(
+            read_conversations(args.input),
+            args.output,
+            graph,
+            client,
+            args.workers,
+            args.top_k,
+            args.token_budget,
+        )
+    except KeyboardInterrupt:
+        print("\n⏹️  Interrupted; rerun the same command to resume.")
+        return 130
+    summary = summarize(results, time.perf_counter() - start)
+    print_summary(summary)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return 1 if summary["statuses"].get("error") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Cache storage shared by the context and LLM response caches."""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryTier:
+    """LRU with TTL, bounded by entry count and total value size."""
+
+    def __init__(self, max_entries, max_bytes, ttl):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self.bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at, size = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.bytes -= size
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[2]
+        self._entries[key] = (value, time.monotonic() + self.ttl, size)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+
+class SQLiteTier:
+    """On-disk tier; WAL mode lets several processes read and write it."""
+
+    def __init__(self, path, ttl, table="context_cache"):
+        self.path = path
+        self.ttl = ttl
+        self.table = table
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT NOT NULL, version TEXT NOT NULL, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, PRIMARY KEY (key, version))"
+            )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, version):
+        row = (
+            self._connection()
+            .execute(
+                f"SELECT value FROM {self.table} "
+                "WHERE key = ? AND version = ? AND expires_at > ?",
+                (key, version, time.time()),
+            )
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def put(self, key, version, value):
+        with self._connection() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?)",
+                (key, version, value, time.time() + self.ttl),
+            )
+
+    def purge(self, version):
+        """Delete rows of other versions and expired rows."""
+        with self._connection() as conn:
+            return conn.execute(
+                f"DELETE FROM {self.table} WHERE version != ? OR expires_at <= ?",
+                (version, time.time()),
+            ).rowcount
+
+    def purge_expired(self):
+        """Delete expired rows of every version."""
+        with self._connection() as conn:
+            return conn.execute(
+                f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
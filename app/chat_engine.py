@@ -0,0 +1,270 @@
+"""
+asyncio chat engine: many concurrent conversations in one process.
+
+Each conversation is a ChatSession; the engine holds no per-user thread, so
+thousands of idle sessions cost only their state. Graph lookups and Ollama
+calls are awaited, and Ollama's concurrency limit is shared by all sessions.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from typing import AsyncIterator, Dict, List, Tuple
+
+import prompts
+import tracing
+from async_ollama import AsyncOllamaClient
+from config import Config
+from context_builder import estimate_tokens
+from graph_connector import NO_MATCH_CONTEXT, AsyncGraphConnector
+from graph_driver import close_shared_async_driver
+from ollama_client import OllamaError, StreamStats
+from symptom_matcher import default_matcher
+
+logger = logging.getLogger(__name__)
+
+GREETING = "🤖 Hello! I’m your healthcare assistant.\nPlease tell me your symptoms.\n"
+NO_MATCH_REPLY = "🤖 I couldn’t find any matching diseases for your symptoms."
+
+# Session states
+COLLECTING = "collecting"
+READY = "ready"
+ANSWERING = "answering"
+FINISHED = "finished"
+
+
+class SessionNotFound(KeyError):
+    """No session with that id (never created, ended or expired)."""
+
+
+class SessionNotReady(ValueError):
+    """answer() called before enough symptoms were collected."""
+
+
+class ChatSession:
+    """State of one conversation."""
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.symptoms: List[str] = []
+        self.chat_history: List[dict] = []
+        self.state = COLLECTING
+        # Estimated size of the final prompt, once built
+        self.prompt_tokens = None
+        self.created_at = time.monotonic()
+        self.last_active = self.created_at
+        # Serializes messages of one session; other sessions run freely
+        self.lock = asyncio.Lock()
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+
+class ChatEngine:
+    """
+    Runs the medical_chatbot conversation for any number of sessions.
+
+    handle_message() collects symptoms (local matcher first, LLM fallback)
+    and returns (ready, reply). Once ready, answer() streams the final,
+    graph-grounded answer.
+    """
+
+    def __init__(
+        self,
+        graph: AsyncGraphConnector = None,
+        llm: AsyncOllamaClient = None,
+        matcher=None,
+        top_k: int = Config.CONTEXT_TOP_K,
+        session_ttl: float = Config.CHAT_SESSION_TTL,
+        token_budget: int = Config.CONTEXT_TOKEN_BUDGET,
+    ):
+        self.graph = graph or AsyncGraphConnector()
+        self.llm = llm or AsyncOllamaClient()
+        self.matcher = matcher or default_matcher()
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.session_ttl = session_ttl
+        self.sessions: Dict[str, ChatSession] = {}
+
+    async def close(self):
+        await self.llm.close()
+        await self.graph.close()
+        await close_shared_async_driver()
+
+    # =======================
+    # Sessions
+    # =======================
+
+    def create_session(self, session_id: str = None) -> ChatSession:
+        session = ChatSession(session_id or uuid.uuid4().hex)
+        self.sessions[session.id] = session
+        return session
+
+    def get_session(self, session_id: str) -> ChatSession:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise SessionNotFound(f"Unknown or expired session: {session_id}")
+        return session
+
+    def end_session(self, session_id: str):
+        self.sessions.pop(session_id, None)
+
+    def expire_idle(self, now: float = None) -> int:
+        """Drop sessions idle for longer than session_ttl; returns how many."""
+        now = time.monotonic() if now is None else now
+        expired = [
+            sid
+            for sid, s in self.sessions.items()
+            if s.state != ANSWERING and now - s.last_active > self.session_ttl
+        ]
+        for sid in expired:
+            del self.sessions[sid]
+        return len(expired)
+
+    async def reap_idle(self, interval: float = 60.0):
+        """Background task: expire idle sessions every `interval` seconds."""
+        while True:
+            await asyncio.sleep(interval)
+            expired = self.expire_idle()
+            if expired:
+                logger.info("Expired %d idle chat sessions", expired)
+
+    # =======================
+    # Conversation
+    # =======================
+
+    async def extract_symptoms(self, user_input: str) -> List[str]:
+        with tracing.span("extract_symptoms", source="matcher") as span:
+            symptoms = self.matcher.match(user_input)
+            if not symptoms:
+                span.set(source="llm")
+                result = await self.llm.generate(
+                    prompts.extractor_prompt(user_input),
+                    system_prompt=prompts.EXTRACTOR_SYSTEM_PROMPT,
+                    options=prompts.EXTRACTOR_OPTIONS,
+                )
+                response = result.get("response", "").strip()
+                symptoms = prompts.parse_extracted(response, self.matcher)
+            span.set(symptoms=len(symptoms))
+            return symptoms
+
+    async def handle_message(
+        self, session_id: str, user_input: str
+    ) -> Tuple[bool, str]:
+        """
+        Process one user message. Returns (ready, reply): ready is True once
+        the user has finished listing symptoms and answer() can be called.
+        """
+        session = self.get_session(session_id)
+        # The session id doubles as the trace id of its spans
+        tracing.set_trace_id(session.id)
+        async with session.lock:
+            session.touch()
+            user_input = user_input.strip()
+            if session.state != COLLECTING:
+                return session.state == READY, "🤖 I already have your symptoms."
+            session.chat_history.append({"role": "user", "content": user_input})
+
+            if prompts.is_done(user_input):
+                if len(session.symptoms) < prompts.MIN_SYMPTOMS:
+                    return False, "🤖 Please provide at least two symptoms to continue."
+                session.state = READY
+                return True, ""
+
+            extracted = await self.extract_symptoms(user_input)
+            new_symptoms = [s for s in extracted if s not in session.symptoms]
+            if new_symptoms:
+                session.symptoms.extend(new_symptoms)
+                reply = f"🤖 Noted: {', '.join(new_symptoms)}."
+            else:
+                reply = (
+                    "🤖 I couldn’t identify new symptoms from that. Could you rephrase?"
+                )
+            return False, reply + "\n🤖 Do you have any other symptoms?"
+
+    async def answer(
+        self, session_id: str, stats: StreamStats = None
+    ) -> AsyncIterator[str]:
+        """Stream the final answer for a session that is ready."""
+        session = self.get_session(session_id)
+        if session.state != READY:
+            raise SessionNotReady(f"Session {session_id} is not ready for an answer")
+        tracing.set_trace_id(session.id)
+        session.state = ANSWERING
+        sent = False
+        try:
+            context_text = await self.graph.build_context_from_symptoms(
+                session.symptoms, top_k=self.top_k, token_budget=self.token_budget
+            )
+            if context_text == NO_MATCH_CONTEXT:
+                sent = True
+                yield NO_MATCH_REPLY
+                return
+
+            prompt = prompts.build_final_prompt(
+                session.chat_history, session.symptoms, context_text
+            )
+            session.prompt_tokens = estimate_tokens(prompt)
+            logger.debug(
+                "Session %s prompt: ~%d tokens", session.id, session.prompt_tokens
+            )
+            started = False
+            async for token in self.llm.stream(
+                prompt, system_prompt=prompts.load_instructions(), stats=stats
+            ):
+                if not started:
+                    token = token.lstrip()
+                    started = bool(token)
+                session.touch()
+                sent = True
+                yield token
+        finally:
+            # Nothing reached the user (e.g. the LLM was unavailable or busy):
+            # leave the session ready so the answer can be requested again
+            session.state = FINISHED if sent else READY
+            session.touch()
+
+
+# -------------------------
+# Console front end
+# -------------------------
+async def run_cli(engine: ChatEngine = None):
+    """The medical_chatbot conversation, driven by the async engine."""
+    engine = engine or ChatEngine()
+    session = engine.create_session()
+    print(GREETING)
+    try:
+        while True:
+            user_input = await asyncio.to_thread(input, "You: ")
+            ready, reply = await engine.handle_message(session.id, user_input)
+            if reply:
+                print(reply)
+            if ready:
+                break
+
+        print("\n🤖 Here’s what I found:\n")
+        stats = StreamStats()
+        try:
+            async for token in engine.answer(session.id, stats=stats):
+                print(token, end="", flush=True)
+        except OllamaError as e:
+            print(f"\n🤖 {e}")
+        print()
+        logger.info("Final answer: %s", stats.summary())
+        logger.info("LLM savings: %s", engine.llm.savings())
+    finally:
+        engine.end_session(session.id)
+        await engine.close()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(run_cli())
+    except (KeyboardInterrupt, EOFError):
+        print("\n🤖 Goodbye.")
+
+
+if __name__ == "__main__":
+    main()
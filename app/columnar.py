@@ -0,0 +1,176 @@
+"""
+Compact columnar tables for processed_data, readable through mmap.
+
+File layout (one table per .col file):
+
+    b"HCOL0001" | uint32 header length | JSON header | padding | column blocks
+
+Numeric columns are raw native arrays (u32 row indexes, f64 values) and
+string columns are a uint64 offsets array plus one UTF-8 blob, so readers
+slice the mapped file instead of parsing text. Node tables keep their string
+ids; edge tables store integer row indexes into the node tables they
+reference (listed under meta["references"]).
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+MAGIC = b"HCOL0001"
+ALIGN = 8
+TYPECODES = {"u32": "I", "f64": "d"}
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_table(path, columns, meta=None):
+    """
+    Write a table. `columns` is a list of (name, kind, values) with kind one
+    of "str", "u32" or "f64"; every column must have the same length.
+    """
+    specs = []
+    blocks = []
+    offset = 0
+    rows = None
+
+    def add_block(data):
+        nonlocal offset
+        start = offset
+        blocks.append((start, data))
+        offset = _align(offset + len(data))
+        return start, len(data)
+
+    for name, kind, values in columns:
+        if kind == "str":
+            offsets = array("Q", [0])
+            blob = bytearray()
+            for value in values:
+                blob += value.encode("utf-8")
+                offsets.append(len(blob))
+            count = len(offsets) - 1
+            spec = {
+                "name": name,
+                "kind": kind,
+                "offsets": add_block(offsets.tobytes()),
+                "data": add_block(bytes(blob)),
+            }
+        else:
+            values = array(TYPECODES[kind], values)
+            count = len(values)
+            spec = {"name": name, "kind": kind, "data": add_block(values.tobytes())}
+        if rows is None:
+            rows = count
+        elif count != rows:
+            raise ValueError(f"{path}: column {name} has {count} rows, expected {rows}")
+        specs.append(spec)
+
+    header = json.dumps(
+        {
+            "rows": rows or 0,
+            "byteorder": sys.byteorder,
+            "columns": specs,
+            "meta": meta or {},
+        }
+    ).encode("utf-8")
+    data_start = _align(len(MAGIC) + 4 + len(header))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for start, data in blocks:
+            f.seek(data_start + start)
+            f.write(data)
+    os.replace(tmp_path, path)
+
+
+class StringColumn:
+    """Lazily decoded view over a string column."""
+
+    def __init__(self, offsets, data):
+        self._offsets = offsets
+        self._data = data
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return str(self._data[self._offsets[i] : self._offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class ColumnarTable:
+    """Read-only, memory-mapped columnar table."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path}: not a columnar table")
+        (header_len,) = struct.unpack_from("<I", self._mmap, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        header = json.loads(self._mmap[header_start : header_start + header_len])
+        data_start = _align(header_start + header_len)
+
+        self.rows = header["rows"]
+        self.meta = header["meta"]
+        self.column_names = [spec["name"] for spec in header["columns"]]
+        swap = header["byteorder"] != sys.byteorder
+        view = memoryview(self._mmap)
+
+        def block(start_length, typecode=None):
+            start, length = start_length
+            raw = view[data_start + start : data_start + start + length]
+            if typecode is None:
+                return raw
+            if swap:
+                values = array(typecode, raw.tobytes())
+                values.byteswap()
+                return memoryview(values)
+            return raw.cast(typecode)
+
+        self._columns = {}
+        for spec in header["columns"]:
+            if spec["kind"] == "str":
+                column = StringColumn(block(spec["offsets"], "Q"), block(spec["data"]))
+            else:
+                column = block(spec["data"], TYPECODES[spec["kind"]])
+            self._columns[spec["name"]] = column
+
+    def column(self, name):
+        """A memoryview (numeric) or StringColumn over the mapped data."""
+        return self._columns[name]
+
+    def read(self, name, start=0, end=None):
+        """Materialize rows [start, end) of one column as a list."""
+        column = self._columns[name]
+        end = self.rows if end is None else end
+        if isinstance(column, StringColumn):
+            return column[start:end]
+        return column[start:end].tolist()
+
+    def close(self):
+        self._columns.clear()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # A caller still holds a view; the map is released with it
+            pass
+
+
+def table_path(columnar_dir, name):
+    return os.path.join(columnar_dir, f"{name}.col")
@@ -5,6 +5,8 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 
 class Config:
     """Application configuration"""
@@ -14,3 +16,95 @@ class Config:
     NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
     NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
     NEO4J_DATABASE = os.getenv("NEO4J_DATABASE")
+    # Shared driver pool (app/graph_driver.py); times in seconds
+    NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+    NEO4J_MAX_CONNECTION_LIFETIME = float(
+        os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600")
+    )
+    NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "30"))
+    NEO4J_LIVENESS_CHECK_TIMEOUT = (
+        float(os.environ["NEO4J_LIVENESS_CHECK_TIMEOUT"])
+        if os.getenv("NEO4J_LIVENESS_CHECK_TIMEOUT")
+        else None
+    )
+    # Run lookups in READ sessions, which a neo4j:// cluster routes to readers
+    NEO4J_READ_ROUTING = os.getenv("NEO4J_READ_ROUTING", "true").lower() == "true"
+
+    # Ollama settings
+    OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+    OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.1:latest")
+    # How long Ollama keeps the model loaded after a request (e.g. "30m", "-1")
+    OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+    OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+    OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+    OLLAMA_READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "120"))
+    OLLAMA_MAX_RETRIES = int(os.getenv("OLLAMA_MAX_RETRIES", "3"))
+    # Evaluate each system prompt once and send Ollama's `context` after that.
+    # Opt-in: the context carries the priming exchange, not just the prompt
+    OLLAMA_REUSE_CONTEXT = os.getenv("OLLAMA_REUSE_CONTEXT", "false").lower() == "true"
+    # Cache of deterministic (temperature 0) responses: "off", "memory", "sqlite"
+    LLM_CACHE = os.getenv("LLM_CACHE", "memory")
+    LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "5000"))
+    LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", "16777216"))
+    LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+    LLM_CACHE_PATH = os.getenv(
+        "LLM_CACHE_PATH", os.path.join(PROJECT_ROOT, "cache", "llm_cache.db")
+    )
+
+    # Data settings
+    PROCESSED_DATA_DIR = os.getenv(
+        "PROCESSED_DATA_DIR", os.path.join(PROJECT_ROOT, "data", "processed_data")
+    )
+    # Graph store behind GraphConnector: "neo4j" or "sqlite" (embedded file
+    # built from processed_data/, no server needed; see app/sqlite_graph.py)
+    GRAPH_BACKEND = os.getenv("GRAPH_BACKEND", "neo4j")
+    GRAPH_SQLITE_PATH = os.getenv(
+        "GRAPH_SQLITE_PATH", os.path.join(PROJECT_ROOT, "cache", "graph.db")
+    )
+    # Cypher for "match ALL symptoms" lookups: "legacy" (OPTIONAL MATCH) or
+    # "rewritten" (pattern comprehensions; see app/query_profiler.py)
+    GRAPH_MATCH_ALL_QUERY = os.getenv("GRAPH_MATCH_ALL_QUERY", "legacy")
+    # In-memory symptom index: "off", "processed" (processed_data/) or "neo4j"
+    SYMPTOM_INDEX = os.getenv("SYMPTOM_INDEX", "off")
+
+    # Retrieval settings: diseases sent to the LLM (ranked, partial matches);
+    # 0 keeps the strict "match ALL symptoms" behaviour
+    CONTEXT_TOP_K = int(os.getenv("CONTEXT_TOP_K", "3"))
+    # Approximate token budget of the graph context (0: full, unbounded)
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))
+    # Chat history in the final prompt: last N messages within a token budget
+    CHAT_HISTORY_MESSAGES = int(os.getenv("CHAT_HISTORY_MESSAGES", "8"))
+    CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "200"))
+
+    # "on": assemble contexts from the per-disease fragments written by
+    # etl_pipeline.py --fragments, fetching only ids from the graph
+    CONTEXT_FRAGMENTS = os.getenv("CONTEXT_FRAGMENTS", "off")
+
+    # Symptom-set -> context cache: "off", "memory" or "sqlite" (memory + disk)
+    CONTEXT_CACHE = os.getenv("CONTEXT_CACHE", "off")
+    CONTEXT_CACHE_SIZE = int(os.getenv("CONTEXT_CACHE_SIZE", "10000"))
+    CONTEXT_CACHE_MAX_BYTES = int(os.getenv("CONTEXT_CACHE_MAX_BYTES", "67108864"))
+    CONTEXT_CACHE_TTL = float(os.getenv("CONTEXT_CACHE_TTL", "3600"))
+    CONTEXT_CACHE_PATH = os.getenv(
+        "CONTEXT_CACHE_PATH", os.path.join(PROJECT_ROOT, "cache", "context_cache.db")
+    )
+
+    # Interactive chatbot: import modules, connect to the graph and load the
+    # Ollama model in the background while the user lists symptoms
+    STARTUP_PREWARM = os.getenv("STARTUP_PREWARM", "true").lower() == "true"
+
+    # Chat engine: seconds before an idle session is dropped
+    CHAT_SESSION_TTL = float(os.getenv("CHAT_SESSION_TTL", "1800"))
+
+    # Server mode (app/server.py)
+    SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+    SERVER_PORT = int(os.getenv("SERVER_PORT", "8080"))
+    # LLM requests allowed to wait for a slot before new ones get HTTP 429
+    SERVER_MAX_QUEUE = int(os.getenv("SERVER_MAX_QUEUE", "32"))
+    # Longest wait for a slot, in seconds, before giving up with HTTP 429
+    SERVER_QUEUE_TIMEOUT = float(os.getenv("SERVER_QUEUE_TIMEOUT", "30"))
+
+    # Stage tracing (app/tracing.py): "off", "log", "prometheus" or "log,prometheus"
+    TRACING = os.getenv("TRACING", "off")
+    # File for "log" spans (JSON lines); empty logs them at INFO instead
+    TRACING_LOG_PATH = os.getenv("TRACING_LOG_PATH", "")
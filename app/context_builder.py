@@ -0,0 +1,225 @@
+"""
+Compact, token-budgeted rendering of graph context and chat history.
+
+Token counts are estimates (about four characters per token for English
+with llama-style tokenizers). That is close enough to keep prompt size,
+and so prefill time, bounded without loading a tokenizer.
+"""
+
+import math
+
+CHARS_PER_TOKEN = 4
+# Each level is (max list items, include entity descriptions, description chars);
+# a disease is rendered at the first level that fits the remaining budget
+DETAIL_LEVELS = [(6, True, 300), (4, True, 160), (3, False, 120), (1, False, 0)]
+OMITTED_HISTORY = "({count} earlier messages omitted)"
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def _clip(text, limit):
+    text = " ".join((text or "").split())
+    if len(text) <= limit:
+        return text
+    return text[: max(0, limit - 1)].rstrip() + "…"
+
+
+def _named(items):
+    """Drop the empty maps OPTIONAL MATCH produces for missing relationships."""
+    return [item for item in items or [] if item.get("name")]
+
+
+def _heading(disease):
+    """First line of a compact block; score and matches differ per request."""
+    head = f"## {disease['disease_name']}"
+    facts = []
+    if disease.get("prevalence"):
+        facts.append(f"prevalence {disease['prevalence']}")
+    if "score" in disease:
+        facts.append(f"score {disease['score']:.2f}")
+    if disease.get("matched_symptoms"):
+        facts.append("matched " + ", ".join(disease["matched_symptoms"]))
+    return head + (f" ({'; '.join(facts)})" if facts else "")
+
+
+def _fragment(disease, level):
+    """
+    The lines after the heading at one detail level, as lists of pieces.
+    A piece is text, or [key, name, text] for an entity description, which
+    is only added the first time the entity appears in a context.
+    """
+    max_items, with_descriptions, description_chars = level
+    lines = []
+    if description_chars and disease.get("description"):
+        lines.append([_clip(disease["description"], description_chars)])
+
+    symptoms = _named(disease.get("symptoms"))
+    if symptoms:
+        shown = ", ".join(
+            f"{s['name']} ({s['commonness']})" if s.get("commonness") else s["name"]
+            for s in symptoms[:max_items]
+        )
+        more = len(symptoms) - max_items
+        lines.append([f"Symptoms: {shown}" + (f" +{more} more" if more > 0 else "")])
+
+    for label, key, detail in (
+        ("Cures", "cures", lambda c: c.get("type")),
+        ("Medicines", "medicines", lambda m: m.get("drug_class")),
+        ("Precautions", "precautions", lambda p: None),
+    ):
+        items = _named(disease.get(key))[:max_items]
+        if not items:
+            continue
+        pieces = [f"{label}: "]
+        for i, item in enumerate(items):
+            text = ("; " if i else "") + item["name"]
+            extra = detail(item)
+            if extra:
+                text += f" [{extra}]"
+            pieces.append(text)
+            description = item.get("description")
+            if with_descriptions and description:
+                pieces.append([key, item["name"], f": {_clip(description, 100)}"])
+        lines.append(pieces)
+    return lines
+
+
+def _assemble(heading, fragment, described):
+    """Block text from a fragment, skipping entities already `described`."""
+    lines = [heading]
+    newly_described = set()
+    for pieces in fragment:
+        text = []
+        for piece in pieces:
+            if isinstance(piece, str):
+                text.append(piece)
+                continue
+            # Entities shared by several diseases are described only once
+            key, name, description = piece
+            if (key, name) not in described:
+                text.append(description)
+                newly_described.add((key, name))
+        lines.append("".join(text))
+    return "\n".join(lines), newly_described
+
+
+def _render_disease(disease, level, described):
+    return _assemble(_heading(disease), _fragment(disease, level), described)
+
+
+def full_fragment(disease):
+    """
+    The full (unbudgeted) block of a disease as [head, body]; the match
+    score line, which differs per request, goes between the two.
+    """
+    head = f"\n🩺 {disease['disease_name']} (Prevalence: {disease.get('prevalence','N/A')})\n"
+    head += f"Description: {disease.get('description','N/A')}\n"
+
+    body = ""
+    if disease["symptoms"]:
+        body += "🔹 Symptoms:\n"
+        for s in disease["symptoms"]:
+            if s["name"]:
+                body += f"- {s['name']} (commonness: {s.get('commonness','unknown')})\n"
+
+    if disease["cures"]:
+        body += "\n💊 Cures:\n"
+        for c in disease["cures"]:
+            if c["name"]:
+                body += f"- {c['name']} ({c.get('type','N/A')}): {c.get('description','')}\n"
+
+    if disease["medicines"]:
+        body += "\n💊 Medicines:\n"
+        for m in disease["medicines"]:
+            if m["name"]:
+                body += f"- {m['name']} (Class: {m.get('drug_class','N/A')}, Form: {m.get('dosage_form','N/A')})\n"
+
+    if disease["precautions"]:
+        body += "\n⚠️ Precautions:\n"
+        for p in disease["precautions"]:
+            if p["name"]:
+                body += f"- {p['name']}: {p.get('description','')}\n"
+
+    body += "\n" + "-" * 40 + "\n"
+    return [head, body]
+
+
+def disease_fragments(disease):
+    """
+    Everything about a disease's context that does not depend on the
+    request, for precomputing at ETL time: the compact fragment at every
+    DETAIL_LEVEL, the full block, and their estimated tokens (the compact
+    ones with every description included, an upper bound).
+    """
+    levels = [_fragment(disease, level) for level in DETAIL_LEVELS]
+    full = full_fragment(disease)
+    return {
+        "disease_id": disease["disease_id"],
+        "name": disease["disease_name"],
+        "prevalence": disease.get("prevalence"),
+        "levels": levels,
+        "level_tokens": [
+            estimate_tokens(_assemble("", fragment, set())[0]) for fragment in levels
+        ],
+        "full": full,
+        "full_tokens": estimate_tokens("".join(full)),
+    }
+
+
+def render_compact(diseases, token_budget, fragments=None):
+    """
+    Render diseases (best first) within token_budget. Each disease gets the
+    most detailed level that still fits; once the most compact level no
+    longer fits, the remaining diseases are left out. The first disease is
+    always included. `fragments` (disease_id -> disease_fragments()) skips
+    re-rendering the diseases it covers. Returns (text, estimated tokens).
+    """
+    blocks = []
+    described = set()
+    used = 0
+    for disease in diseases:
+        precomputed = (fragments or {}).get(disease["disease_id"])
+        heading = _heading(disease)
+        for i, level in enumerate(DETAIL_LEVELS):
+            if precomputed:
+                fragment = precomputed["levels"][i]
+            else:
+                fragment = _fragment(disease, level)
+            block, new = _assemble(heading, fragment, described)
+            cost = estimate_tokens(block) + 1
+            if used + cost <= token_budget:
+                break
+        else:
+            if blocks:
+                break
+        blocks.append(block)
+        described |= new
+        used += cost
+    omitted = len(diseases) - len(blocks)
+    if omitted:
+        blocks.append(f"({omitted} lower-ranked matches omitted)")
+    text = "\n\n".join(blocks)
+    return text, estimate_tokens(text)
+
+
+def render_history(chat_history, max_messages, token_budget):
+    """
+    The most recent messages that fit, oldest first, as "Role: text" lines,
+    with a note on how many earlier ones were left out.
+    """
+    lines = []
+    used = 0
+    for message in reversed(chat_history[-max_messages:] if max_messages else []):
+        line = f"{message['role'].capitalize()}: {_clip(message['content'], 400)}"
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            break
+        lines.append(line)
+        used += cost
+    lines.reverse()
+    omitted = len(chat_history) - len(lines)
+    if omitted:
+        lines.insert(0, OMITTED_HISTORY.format(count=omitted))
+    return "\n".join(lines)
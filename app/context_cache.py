@@ -0,0 +1,167 @@
+"""
+Cache of rendered graph context, keyed on the symptom set.
+
+Two tiers: an in-process LRU (entry and byte limits, TTL) and an optional
+SQLite file that worker processes share. Entries belong to a graph data
+version; when the version changes the memory tier is dropped and rows of
+other versions are purged from disk, so stale context is never served.
+"""
+
+import json
+import logging
+import threading
+import time
+
+from cache_tiers import MemoryTier, SQLiteTier
+from config import Config
+from graph_driver import shared_driver
+from sqlite_graph import shared_sqlite_graph
+from symptom_index import Neo4jSource, shared_index
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(symptoms, top_k, token_budget=None):
+    """
+    Order-independent key. Ranked lookups ignore case, so names are
+    lower-cased for them; the strict lookup matches names exactly.
+    """
+    if top_k:
+        names = sorted({s.strip().lower() for s in symptoms})
+    else:
+        names = sorted({s.strip() for s in symptoms})
+    return json.dumps([top_k or 0, token_budget or 0, names], ensure_ascii=False)
+
+
+class ContextCache:
+    """
+    Two-tier cache of context strings for one graph data version.
+
+    `version_source` is called at most every `version_check_interval`
+    seconds; a new version invalidates everything cached before it.
+    """
+
+    def __init__(
+        self,
+        version_source,
+        memory: MemoryTier,
+        disk: SQLiteTier = None,
+        version_check_interval=30.0,
+    ):
+        self.version_source = version_source
+        self.memory = memory
+        self.disk = disk
+        self.version_check_interval = version_check_interval
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _current_version(self):
+        if time.monotonic() - self._checked_at < self.version_check_interval:
+            return self._version
+        try:
+            version = self.version_source()
+        except Exception:
+            # Without a version we cannot tell whether entries are stale, so
+            # the cache is bypassed until the next check
+            logger.exception("Context cache: data version check failed")
+            version = None
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if version is not None and version != self._version:
+                if self._version is not None:
+                    self.invalidations += 1
+                    logger.info("Context cache invalidated: data version changed")
+                self.memory.clear()
+                if self.disk is not None:
+                    self.disk.purge(version)
+            self._version = version
+        return version
+
+    def get(self, key):
+        version = self._current_version()
+        if version is None:
+            self._count("misses")
+            return None
+        with self._lock:
+            value = self.memory.get(key)
+        if value is not None:
+            self._count("hits")
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key, version)
+            if value is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    self.memory.put(key, value)
+                return value
+        self._count("misses")
+        return None
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def put(self, key, value):
+        version = self._current_version()
+        if version is None:
+            return
+        with self._lock:
+            self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, version, value)
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else None,
+            "entries": len(self.memory),
+            "bytes": self.memory.bytes,
+            "evictions": self.memory.evictions,
+            "expirations": self.memory.expirations,
+            "invalidations": self.invalidations,
+            "version": self._version,
+        }
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def shared_context_cache():
+    """
+    Process-wide cache selected by Config.CONTEXT_CACHE: "memory",
+    "sqlite" (memory + CONTEXT_CACHE_PATH), or anything else for none.
+    """
+    global _shared_cache
+    mode = Config.CONTEXT_CACHE
+    if mode not in ("memory", "sqlite"):
+        return None
+    with _shared_lock:
+        if _shared_cache is None:
+            index = shared_index()
+            if index is not None:
+                version_source = index.current_version
+            elif Config.GRAPH_BACKEND == "sqlite":
+                version_source = shared_sqlite_graph().current_version
+            else:
+                version_source = Neo4jSource(
+                    shared_driver(), Config.NEO4J_DATABASE
+                ).version
+            memory = MemoryTier(
+                Config.CONTEXT_CACHE_SIZE,
+                Config.CONTEXT_CACHE_MAX_BYTES,
+                Config.CONTEXT_CACHE_TTL,
+            )
+            disk = None
+            if mode == "sqlite":
+                disk = SQLiteTier(Config.CONTEXT_CACHE_PATH, Config.CONTEXT_CACHE_TTL)
+            _shared_cache = ContextCache(version_source, memory, disk)
+        return _shared_cache
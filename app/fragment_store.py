@@ -0,0 +1,204 @@
+"""
+Per-disease context fragments, rendered once at ETL time.
+
+    python data/ETL/etl_pipeline.py --fragments
+    CONTEXT_FRAGMENTS=on python app/server.py
+
+The name, description, symptoms, cures, medicines and precautions of a
+disease only change with the data, so `etl_pipeline.py --fragments` renders
+them (full block and every compact detail level, see
+context_builder.disease_fragments) into processed_data/disease_fragments.jsonl,
+one JSON object per disease keyed by disease_id. With the store enabled,
+graph lookups return only ids, scores and matched symptoms, and the context
+is assembled from the stored fragments.
+
+The first line of the file records the fragment format, the detail levels
+and the size/mtime of the processed CSVs it was built from. A file that no
+longer matches them is ignored, so lookups fall back to full records rather
+than serving stale text.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+import symptom_index
+from config import Config
+from context_builder import DETAIL_LEVELS, disease_fragments
+from symptom_index import EDGE_TABLES, NODE_TABLES
+
+logger = logging.getLogger(__name__)
+
+FRAGMENTS_FILE = "disease_fragments.jsonl"
+# Bump when disease_fragments() changes what it stores
+FRAGMENT_FORMAT = 1
+
+
+def source_signature(processed_dir):
+    """size and mtime of the processed CSVs the fragments are rendered from."""
+    signature = {}
+    for name in sorted(list(NODE_TABLES) + list(EDGE_TABLES)):
+        stat = os.stat(os.path.join(processed_dir, f"{name}.csv"))
+        signature[name] = [stat.st_mtime_ns, stat.st_size]
+    return signature
+
+
+def _header(processed_dir):
+    return {
+        "format": FRAGMENT_FORMAT,
+        "levels": [list(level) for level in DETAIL_LEVELS],
+        "sources": source_signature(processed_dir),
+    }
+
+
+def build_fragments(processed_dir, path=None):
+    """
+    Render the fragments of every disease in processed_dir's CSVs to `path`
+    (processed_dir/disease_fragments.jsonl by default). Returns the number
+    of diseases and the mean estimated tokens of the full block and of each
+    compact level.
+    """
+    path = path or os.path.join(processed_dir, FRAGMENTS_FILE)
+    source = symptom_index.ProcessedDataSource(processed_dir)
+    records = symptom_index.SymptomIndex(source).all_diseases()
+
+    full_tokens = 0
+    level_tokens = [0] * len(DETAIL_LEVELS)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(_header(processed_dir)) + "\n")
+        for record in records:
+            fragments = disease_fragments(record)
+            full_tokens += fragments["full_tokens"]
+            for i, tokens in enumerate(fragments["level_tokens"]):
+                level_tokens[i] += tokens
+            f.write(json.dumps(fragments, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+
+    count = len(records) or 1
+    return {
+        "diseases": len(records),
+        "full_tokens": full_tokens / count,
+        "level_tokens": [tokens / count for tokens in level_tokens],
+    }
+
+
+class FragmentStore:
+    """
+    The fragments file loaded into a dict by disease_id. The file and the
+    CSVs it was built from are re-checked at most every `refresh_interval`
+    seconds; the store reloads when the file changed and is empty while it
+    does not match the CSVs.
+    """
+
+    def __init__(
+        self, processed_dir, refresh_interval=symptom_index.DEFAULT_REFRESH_INTERVAL
+    ):
+        self.processed_dir = processed_dir
+        self.path = os.path.join(processed_dir, FRAGMENTS_FILE)
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._file_version = None
+        self._fragments = {}
+        self.refresh()
+
+    def __len__(self):
+        return len(self._fragments)
+
+    def _stale(self, header):
+        expected = _header(self.processed_dir)
+        for key in ("format", "levels", "sources"):
+            if header.get(key) != expected[key]:
+                return key
+        return None
+
+    def refresh(self):
+        """Reload if the file or its source CSVs changed."""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                stat = os.stat(self.path)
+                version = (stat.st_mtime_ns, stat.st_size)
+                sources = source_signature(self.processed_dir)
+            except FileNotFoundError:
+                version, sources = None, None
+            if (version, sources) == self._file_version:
+                return False
+            self._file_version = (version, sources)
+            self._fragments = {}
+            if version is None:
+                logger.warning("No context fragments at %s", self.path)
+                return True
+            start = time.perf_counter()
+            with open(self.path, encoding="utf-8") as f:
+                stale = self._stale(json.loads(f.readline()))
+                if stale:
+                    logger.warning(
+                        "Context fragments in %s ignored: %s changed since they "
+                        "were built (rerun etl_pipeline.py --fragments)",
+                        self.path,
+                        stale,
+                    )
+                    return True
+                for line in f:
+                    fragments = json.loads(line)
+                    self._fragments[fragments["disease_id"]] = fragments
+            logger.info(
+                "Context fragments loaded: %d diseases in %.3fs",
+                len(self._fragments),
+                time.perf_counter() - start,
+            )
+            return True
+
+    def _maybe_refresh(self):
+        if time.monotonic() - self._checked_at < self.refresh_interval:
+            return
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Context fragment refresh failed")
+
+    def get_many(self, disease_ids):
+        """{disease_id: fragments}, or None if any of the ids is missing."""
+        self._maybe_refresh()
+        fragments = self._fragments
+        found = {}
+        for disease_id in disease_ids:
+            entry = fragments.get(disease_id)
+            if entry is None:
+                return None
+            found[disease_id] = entry
+        return found
+
+
+def with_fragments(hits, fragments):
+    """Id-only lookup hits completed with the name and prevalence stored."""
+    return [
+        dict(
+            hit,
+            disease_name=fragments[hit["disease_id"]]["name"],
+            prevalence=fragments[hit["disease_id"]]["prevalence"],
+        )
+        for hit in hits
+    ]
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def shared_fragment_store():
+    """
+    Process-wide store of PROCESSED_DATA_DIR's fragments when
+    Config.CONTEXT_FRAGMENTS is "on", else None.
+    """
+    global _shared_store
+    if Config.CONTEXT_FRAGMENTS != "on":
+        return None
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = FragmentStore(Config.PROCESSED_DATA_DIR)
+        return _shared_store
@@ -1,18 +1,355 @@
+import asyncio
+
+import graph_driver
+import tracing
 from config import Config
-from neo4j import GraphDatabase
+from context_builder import estimate_tokens, full_fragment, render_compact
+from context_cache import cache_key, shared_context_cache
+from fragment_store import shared_fragment_store, with_fragments
+from sqlite_graph import shared_sqlite_graph
+from symptom_index import COMMONNESS_SPECIFICITY, DEFAULT_TOP_K, shared_index
 
+NO_MATCH_CONTEXT = "No matching diseases found for given symptoms."
+COMPACT_TITLE = "Possible diseases, best match first:\n\n"
 
-class GraphConnector:
-    def __init__(self):
-        """Initialize Neo4j driver using config settings"""
-        self.driver = GraphDatabase.driver(
-            Config.NEO4J_URI, auth=(Config.NEO4J_USER, Config.NEO4J_PASSWORD)
-        )
+MATCH_ALL = """
+    // Find diseases that match ALL provided symptoms, starting from the
+    // (indexed) symptoms rather than scanning diseases
+    MATCH (s:Symptom) WHERE s.name IN $symptoms
+    MATCH (d:Disease)-[:HAS_SYMPTOM]->(s)
+    WITH d, COUNT(DISTINCT s) AS matched_symptoms
+    WHERE matched_symptoms = SIZE($symptoms)
+    """
+
+MATCH_ALL_QUERY = (
+    MATCH_ALL
+    + """
+    // One pattern comprehension per detail list: each is expanded on its
+    // own, instead of OPTIONAL MATCHes multiplying into
+    // symptoms x cures x medicines x precautions rows per disease
+    RETURN d.id AS disease_id,
+        d.name AS disease_name,
+        d.description AS description,
+        d.prevalence AS prevalence,
+        [(d)-[:HAS_SYMPTOM]->(s2:Symptom) | {name:s2.name, commonness:s2.commonness}] AS symptoms,
+        [(d)-[:CURED_BY]->(c:Cure) | {name:c.name, description:c.description, type:c.type}] AS cures,
+        [(d)-[:TREATED_WITH]->(m:Medicine) | {name:m.name, drug_class:m.drug_class, dosage_form:m.dosage_form}] AS medicines,
+        [(d)-[:REQUIRES_PRECAUTION]->(p:Precaution) | {name:p.name, description:p.description}] AS precautions
+    """
+)
+
+# With precomputed context fragments only the ids are needed
+MATCH_ALL_IDS_QUERY = MATCH_ALL + "RETURN d.id AS disease_id"
+
+# The original MATCH_ALL_QUERY. It stays the default (GRAPH_MATCH_ALL_QUERY)
+# until query_profiler.py has shown on a real import that the rewrite
+# returns the same diseases and details. It returns a {name: null, ...}
+# entry where a list is empty.
+LEGACY_MATCH_ALL = """
+    // Find diseases that match ALL provided symptoms
+    MATCH (d:Disease)-[:HAS_SYMPTOM]->(s:Symptom)
+    WHERE s.name IN $symptoms
+    WITH d, COUNT(DISTINCT s) AS matched_symptoms
+    WHERE matched_symptoms = SIZE($symptoms)
+    """
+
+LEGACY_MATCH_ALL_QUERY = (
+    LEGACY_MATCH_ALL
+    + """
+    // Collect details
+    OPTIONAL MATCH (d)-[:HAS_SYMPTOM]->(s2:Symptom)
+    OPTIONAL MATCH (d)-[:CURED_BY]->(c:Cure)
+    OPTIONAL MATCH (d)-[:TREATED_WITH]->(m:Medicine)
+    OPTIONAL MATCH (d)-[:REQUIRES_PRECAUTION]->(p:Precaution)
+
+    RETURN d.id AS disease_id,
+        d.name AS disease_name,
+        d.description AS description,
+        d.prevalence AS prevalence,
+        COLLECT(DISTINCT {name:s2.name, commonness:s2.commonness}) AS symptoms,
+        COLLECT(DISTINCT {name:c.name, description:c.description, type:c.type}) AS cures,
+        COLLECT(DISTINCT {name:m.name, drug_class:m.drug_class, dosage_form:m.dosage_form}) AS medicines,
+        COLLECT(DISTINCT {name:p.name, description:p.description}) AS precautions
+    """
+)
+
+LEGACY_MATCH_ALL_IDS_QUERY = LEGACY_MATCH_ALL + "RETURN d.id AS disease_id"
+
+
+def match_all_queries(variant=None):
+    """
+    (details query, ids query) for "match ALL symptoms" lookups, selected by
+    Config.GRAPH_MATCH_ALL_QUERY: "rewritten", or anything else for legacy.
+    """
+    if (variant or Config.GRAPH_MATCH_ALL_QUERY) == "rewritten":
+        return MATCH_ALL_QUERY, MATCH_ALL_IDS_QUERY
+    return LEGACY_MATCH_ALL_QUERY, LEGACY_MATCH_ALL_IDS_QUERY
+
+
+RANK = """
+    // Score on the server; only the top_k diseases get their details
+    MATCH (s:Symptom) WHERE s.name_lower IN $symptoms
+    MATCH (d:Disease)-[r:HAS_SYMPTOM]->(s)
+    WITH d,
+        SUM(r.weight * COALESCE($specificity[s.commonness], 1.0)) AS score,
+        COLLECT(s.name) AS matched_symptoms
+    WHERE SIZE(matched_symptoms) >= $min_matched
+    // d.id last, so ties come back in the same order from every backend
+    ORDER BY score DESC, SIZE(matched_symptoms) DESC, d.id
+    LIMIT $top_k
+    """
+
+RANK_QUERY = (
+    RANK
+    + """
+    RETURN d.id AS disease_id,
+        d.name AS disease_name,
+        d.description AS description,
+        d.prevalence AS prevalence,
+        score,
+        matched_symptoms,
+        [(d)-[:HAS_SYMPTOM]->(s2:Symptom) | {name:s2.name, commonness:s2.commonness}] AS symptoms,
+        [(d)-[:CURED_BY]->(c:Cure) | {name:c.name, description:c.description, type:c.type}] AS cures,
+        [(d)-[:TREATED_WITH]->(m:Medicine) | {name:m.name, drug_class:m.drug_class, dosage_form:m.dosage_form}] AS medicines,
+        [(d)-[:REQUIRES_PRECAUTION]->(p:Precaution) | {name:p.name, description:p.description}] AS precautions
+    """
+)
+
+RANK_IDS_QUERY = RANK + "RETURN d.id AS disease_id, score, matched_symptoms"
+
+
+def rank_params(symptoms, top_k, min_matched):
+    return {
+        "symptoms": sorted({s.lower() for s in symptoms}),
+        "specificity": COMMONNESS_SPECIFICITY,
+        "min_matched": min_matched,
+        "top_k": top_k,
+    }
+
+
+def render_context(symptoms, diseases):
+    """Format disease records (from either connector or the index) for the prompt."""
+    if not diseases:
+        return NO_MATCH_CONTEXT
+    return context_header(symptoms) + render_diseases(diseases)
+
+
+def context_header(symptoms):
+    return f"User symptoms: {', '.join(symptoms)}\n\n"
+
+
+def render_diseases(diseases, fragments=None):
+    """
+    The symptom-order-independent part of the context (what gets cached).
+    `fragments` (disease_id -> precomputed fragments) saves re-rendering.
+    """
+    context = "Possible Diseases and Details:\n"
+
+    for d in diseases:
+        precomputed = (fragments or {}).get(d["disease_id"])
+        head, body = precomputed["full"] if precomputed else full_fragment(d)
+        context += head
+        if "score" in d:
+            context += (
+                f"Match score: {d['score']:.2f} "
+                f"(matched: {', '.join(d['matched_symptoms'])})\n"
+            )
+        context += body
+
+    return context.rstrip()
+
+
+def neo4j_timings(summary):
+    """Server-side timings from a Neo4j ResultSummary, for lookup spans."""
+    return {
+        "neo4j_available_ms": summary.result_available_after,
+        "neo4j_consumed_ms": summary.result_consumed_after,
+    }
+
+
+def _compact_body(symptoms, diseases, token_budget, fragments=None):
+    header_tokens = estimate_tokens(context_header(symptoms) + COMPACT_TITLE)
+    body, _ = render_compact(diseases, token_budget - header_tokens, fragments)
+    return COMPACT_TITLE + body
+
+
+def _from_cache(cache, symptoms, top_k, token_budget):
+    """Returns (key, cached body or None); key is None without a cache."""
+    if cache is None:
+        return None, None
+    key = cache_key(symptoms, top_k, token_budget)
+    return key, cache.get(key)
+
+
+def _finish_context(
+    cache, key, symptoms, token_budget=None, body=None, diseases=None, fragments=None
+):
+    if body is None:
+        with tracing.span(
+            "render_context",
+            diseases=len(diseases or []),
+            fragments=fragments is not None,
+        ) as span:
+            if not diseases:
+                body = NO_MATCH_CONTEXT
+            elif token_budget:
+                body = _compact_body(symptoms, diseases, token_budget, fragments)
+            else:
+                body = render_diseases(diseases, fragments)
+            span.set(chars=len(body))
+        if cache is not None:
+            cache.put(key, body)
+    if body == NO_MATCH_CONTEXT:
+        return body
+    return context_header(symptoms) + body
+
+
+class Neo4jBackend:
+    """Lookups as Cypher on a Neo4j server, through the shared driver."""
+
+    name = "neo4j"
+
+    def __init__(self, driver=None):
+        self.driver = driver or graph_driver.shared_driver()
         self.database = Config.NEO4J_DATABASE
+        self.access_mode = graph_driver.lookup_access_mode()
+        self.match_all_query, self.match_all_ids_query = match_all_queries()
+
+    def _run(self, span, query, **params):
+        with self.driver.session(
+            database=self.database, default_access_mode=self.access_mode
+        ) as session:
+            result = session.run(query, **params)
+            records = result.data()
+            if span is not None:
+                span.set(source=self.name, records=len(records))
+                span.set(**neo4j_timings(result.consume()))
+            return records
+
+    def health_check(self):
+        return graph_driver.check_health(self.driver)
+
+    def get_disease_by_symptoms(self, symptoms, span=None):
+        return self._run(span, self.match_all_query, symptoms=symptoms)
+
+    def rank_diseases_by_symptoms(self, symptoms, top_k, min_matched=1, span=None):
+        return self._run(span, RANK_QUERY, **rank_params(symptoms, top_k, min_matched))
+
+    def get_disease_ids_by_symptoms(self, symptoms, span=None):
+        return self._run(span, self.match_all_ids_query, symptoms=symptoms)
+
+    def rank_disease_ids_by_symptoms(self, symptoms, top_k, min_matched=1, span=None):
+        return self._run(
+            span, RANK_IDS_QUERY, **rank_params(symptoms, top_k, min_matched)
+        )
+
+
+class AsyncNeo4jBackend(Neo4jBackend):
+    """Neo4jBackend on the shared AsyncDriver."""
+
+    def __init__(self, driver=None):
+        super().__init__(driver or graph_driver.shared_async_driver())
+
+    async def _run(self, span, query, **params):
+        async with self.driver.session(
+            database=self.database, default_access_mode=self.access_mode
+        ) as session:
+            result = await session.run(query, **params)
+            records = await result.data()
+            if span is not None:
+                span.set(source=self.name, records=len(records))
+                span.set(**neo4j_timings(await result.consume()))
+            return records
+
+    async def health_check(self):
+        return await graph_driver.check_health_async(self.driver)
+
+
+class ThreadedBackend:
+    """Async face of a blocking backend: every call runs in a worker thread."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = backend.name
+
+    async def health_check(self):
+        return await asyncio.to_thread(self.backend.health_check)
+
+    async def get_disease_by_symptoms(self, symptoms, span=None):
+        return await asyncio.to_thread(
+            self.backend.get_disease_by_symptoms, symptoms, span
+        )
+
+    async def rank_diseases_by_symptoms(
+        self, symptoms, top_k, min_matched=1, span=None
+    ):
+        return await asyncio.to_thread(
+            self.backend.rank_diseases_by_symptoms, symptoms, top_k, min_matched, span
+        )
+
+    async def get_disease_ids_by_symptoms(self, symptoms, span=None):
+        return await asyncio.to_thread(
+            self.backend.get_disease_ids_by_symptoms, symptoms, span
+        )
+
+    async def rank_disease_ids_by_symptoms(
+        self, symptoms, top_k, min_matched=1, span=None
+    ):
+        return await asyncio.to_thread(
+            self.backend.rank_disease_ids_by_symptoms,
+            symptoms,
+            top_k,
+            min_matched,
+            span,
+        )
+
+
+def default_backend(driver=None):
+    """
+    Backend selected by Config.GRAPH_BACKEND: "sqlite" for the embedded
+    graph (app/sqlite_graph.py), anything else for Neo4j.
+    """
+    if Config.GRAPH_BACKEND == "sqlite":
+        return shared_sqlite_graph()
+    return Neo4jBackend(driver)
+
+
+def default_async_backend(driver=None):
+    if Config.GRAPH_BACKEND == "sqlite":
+        return ThreadedBackend(shared_sqlite_graph())
+    return AsyncNeo4jBackend(driver)
+
+
+class GraphConnector:
+    def __init__(
+        self,
+        symptom_index=None,
+        driver=None,
+        context_cache=None,
+        backend=None,
+        fragment_store=None,
+    ):
+        """
+        Lookups go to `backend`, or the one selected by Config.GRAPH_BACKEND
+        (Neo4j sessions come from the process-wide driver, or `driver`), so
+        a connector is cheap to create. Symptom lookups go through
+        `symptom_index` (or the process-wide index enabled by
+        Config.SYMPTOM_INDEX) when one is available, built contexts are
+        kept in `context_cache` (or the one enabled by Config.CONTEXT_CACHE),
+        and rendered from `fragment_store` (or the one enabled by
+        Config.CONTEXT_FRAGMENTS) when it has every matched disease.
+        """
+        self.backend = backend or default_backend(driver)
+        self.symptom_index = symptom_index or shared_index()
+        self.context_cache = context_cache or shared_context_cache()
+        self.fragment_store = fragment_store or shared_fragment_store()
 
     def close(self):
-        """Close Neo4j driver."""
-        self.driver.close()
+        """Kept for compatibility; the shared driver is closed at exit."""
+
+    def health_check(self):
+        """Returns (ok, seconds, error) after a round trip to the backend."""
+        return self.backend.health_check()
 
     # =======================
     # Query Functions
@@ -22,84 +359,229 @@ class GraphConnector:
         """
         Find diseases connected to ALL given symptoms, along with their details.
         """
-        with self.driver.session(database=self.database) as session:
-            query = """
-            // Find diseases that match ALL provided symptoms
-            MATCH (d:Disease)-[:HAS_SYMPTOM]->(s:Symptom)
-            WHERE s.name IN $symptoms
-            WITH d, COUNT(DISTINCT s) AS matched_symptoms
-            WHERE matched_symptoms = SIZE($symptoms)
-
-            // Collect details
-            OPTIONAL MATCH (d)-[:HAS_SYMPTOM]->(s2:Symptom)
-            OPTIONAL MATCH (d)-[:CURED_BY]->(c:Cure)
-            OPTIONAL MATCH (d)-[:TREATED_WITH]->(m:Medicine)
-            OPTIONAL MATCH (d)-[:REQUIRES_PRECAUTION]->(p:Precaution)
-
-            RETURN d.id AS disease_id,
-                d.name AS disease_name,
-                d.description AS description,
-                d.prevalence AS prevalence,
-                COLLECT(DISTINCT {name:s2.name, commonness:s2.commonness}) AS symptoms,
-                COLLECT(DISTINCT {name:c.name, description:c.description, type:c.type}) AS cures,
-                COLLECT(DISTINCT {name:m.name, drug_class:m.drug_class, dosage_form:m.dosage_form}) AS medicines,
-                COLLECT(DISTINCT {name:p.name, description:p.description}) AS precautions
-            """
-            return session.run(query, symptoms=symptoms).data()
+        with tracing.span("graph.match_all", symptoms=len(symptoms)) as span:
+            if self.symptom_index is not None:
+                records = self.symptom_index.get_disease_by_symptoms(symptoms)
+                span.set(source="index", records=len(records))
+                return records
+            return self.backend.get_disease_by_symptoms(symptoms, span)
+
+    def rank_diseases_by_symptoms(self, symptoms, top_k=DEFAULT_TOP_K, min_matched=1):
+        """
+        Rank diseases matching ANY of the given symptoms (case-insensitive) and
+        return only the top_k, best first. A disease scores the sum over its
+        matched symptoms of HAS_SYMPTOM.weight times the symptom's specificity
+        (rare symptoms count more). Records are those of get_disease_by_symptoms
+        plus `score` and `matched_symptoms`.
+        """
+        with tracing.span("graph.rank", symptoms=len(symptoms), top_k=top_k) as span:
+            if self.symptom_index is not None:
+                records = self.symptom_index.rank_diseases_by_symptoms(
+                    symptoms, top_k=top_k, min_matched=min_matched
+                )
+                span.set(source="index", records=len(records))
+                return records
+            return self.backend.rank_diseases_by_symptoms(
+                symptoms, top_k, min_matched, span
+            )
+
+    def get_disease_ids_by_symptoms(self, symptoms):
+        """get_disease_by_symptoms without the details: [{disease_id}]."""
+        with tracing.span(
+            "graph.match_all", symptoms=len(symptoms), ids_only=True
+        ) as span:
+            return self.backend.get_disease_ids_by_symptoms(symptoms, span)
+
+    def rank_disease_ids_by_symptoms(
+        self, symptoms, top_k=DEFAULT_TOP_K, min_matched=1
+    ):
+        """
+        rank_diseases_by_symptoms without the details: disease_id, score and
+        matched_symptoms.
+        """
+        with tracing.span(
+            "graph.rank", symptoms=len(symptoms), top_k=top_k, ids_only=True
+        ) as span:
+            return self.backend.rank_disease_ids_by_symptoms(
+                symptoms, top_k, min_matched, span
+            )
+
+    def _lookup(self, symptoms, top_k):
+        """
+        (diseases, fragments) for a context. With a fragment store (and no
+        index, which has the records at hand anyway) the graph returns only
+        ids; if the store lacks any of them, full records are fetched.
+        """
+        store = self.fragment_store
+        if store is not None and self.symptom_index is None:
+            if top_k:
+                hits = self.rank_disease_ids_by_symptoms(symptoms, top_k=top_k)
+            else:
+                hits = self.get_disease_ids_by_symptoms(symptoms)
+            fragments = store.get_many(hit["disease_id"] for hit in hits)
+            if fragments is not None:
+                return with_fragments(hits, fragments), fragments
+        if top_k:
+            diseases = self.rank_diseases_by_symptoms(symptoms, top_k=top_k)
+        else:
+            diseases = self.get_disease_by_symptoms(symptoms)
+        if store is None:
+            return diseases, None
+        return diseases, store.get_many(d["disease_id"] for d in diseases)
 
     # =======================
     # Context Builders (for RAG)
     # =======================
 
-    def build_context_from_symptoms(self, symptoms):
+    def build_context_from_symptoms(self, symptoms, top_k=None, token_budget=None):
         """
         Build a rich context string from symptoms → multiple diseases with full details.
+        With top_k, only the top_k ranked (partial) matches are included.
+        With token_budget, the compact renderer keeps it to ~that many tokens.
         """
-        diseases = self.get_disease_by_symptoms(symptoms)
-        if not diseases:
-            return "No matching diseases found for given symptoms."
+        with tracing.span("build_context", symptoms=len(symptoms)) as span:
+            cache = self.context_cache
+            key, body = _from_cache(cache, symptoms, top_k, token_budget)
+            span.set(cached=body is not None)
+            if body is not None:
+                return _finish_context(cache, key, symptoms, body=body)
+            diseases, fragments = self._lookup(symptoms, top_k)
+            return _finish_context(
+                cache,
+                key,
+                symptoms,
+                token_budget,
+                diseases=diseases,
+                fragments=fragments,
+            )
 
-        context = f"User symptoms: {', '.join(symptoms)}\n\n"
-        context += "Possible Diseases and Details:\n"
 
-        for d in diseases:
-            context += (
-                f"\n🩺 {d['disease_name']} (Prevalence: {d.get('prevalence','N/A')})\n"
-            )
-            context += f"Description: {d.get('description','N/A')}\n"
+class AsyncGraphConnector:
+    """
+    asyncio counterpart of GraphConnector for the chat engine: the same
+    backends and records, but awaiting Neo4j instead of blocking the loop.
+    Index and SQLite lookups run in a worker thread since a due refresh may
+    reload.
+    """
+
+    def __init__(
+        self,
+        symptom_index=None,
+        driver=None,
+        context_cache=None,
+        backend=None,
+        fragment_store=None,
+    ):
+        self.backend = backend or default_async_backend(driver)
+        self.symptom_index = symptom_index or shared_index()
+        self.context_cache = context_cache or shared_context_cache()
+        self.fragment_store = fragment_store or shared_fragment_store()
+
+    async def close(self):
+        """The shared driver is closed with close_shared_async_driver()."""
+
+    async def health_check(self):
+        return await self.backend.health_check()
 
-            if d["symptoms"]:
-                context += "🔹 Symptoms:\n"
-                for s in d["symptoms"]:
-                    if s["name"]:
-                        context += f"- {s['name']} (commonness: {s.get('commonness','unknown')})\n"
+    async def get_disease_by_symptoms(self, symptoms):
+        with tracing.span("graph.match_all", symptoms=len(symptoms)) as span:
+            if self.symptom_index is not None:
+                records = await asyncio.to_thread(
+                    self.symptom_index.get_disease_by_symptoms, symptoms
+                )
+                span.set(source="index", records=len(records))
+                return records
+            return await self.backend.get_disease_by_symptoms(symptoms, span)
 
-            if d["cures"]:
-                context += "\n💊 Cures:\n"
-                for c in d["cures"]:
-                    if c["name"]:
-                        context += f"- {c['name']} ({c.get('type','N/A')}): {c.get('description','')}\n"
+    async def rank_diseases_by_symptoms(
+        self, symptoms, top_k=DEFAULT_TOP_K, min_matched=1
+    ):
+        with tracing.span("graph.rank", symptoms=len(symptoms), top_k=top_k) as span:
+            if self.symptom_index is not None:
+                records = await asyncio.to_thread(
+                    self.symptom_index.rank_diseases_by_symptoms,
+                    symptoms,
+                    top_k,
+                    min_matched,
+                )
+                span.set(source="index", records=len(records))
+                return records
+            return await self.backend.rank_diseases_by_symptoms(
+                symptoms, top_k, min_matched, span
+            )
 
-            if d["medicines"]:
-                context += "\n💊 Medicines:\n"
-                for m in d["medicines"]:
-                    if m["name"]:
-                        context += f"- {m['name']} (Class: {m.get('drug_class','N/A')}, Form: {m.get('dosage_form','N/A')})\n"
+    async def get_disease_ids_by_symptoms(self, symptoms):
+        with tracing.span(
+            "graph.match_all", symptoms=len(symptoms), ids_only=True
+        ) as span:
+            return await self.backend.get_disease_ids_by_symptoms(symptoms, span)
 
-            if d["precautions"]:
-                context += "\n⚠️ Precautions:\n"
-                for p in d["precautions"]:
-                    if p["name"]:
-                        context += f"- {p['name']}: {p.get('description','')}\n"
+    async def rank_disease_ids_by_symptoms(
+        self, symptoms, top_k=DEFAULT_TOP_K, min_matched=1
+    ):
+        with tracing.span(
+            "graph.rank", symptoms=len(symptoms), top_k=top_k, ids_only=True
+        ) as span:
+            return await self.backend.rank_disease_ids_by_symptoms(
+                symptoms, top_k, min_matched, span
+            )
 
-            context += "\n" + "-" * 40 + "\n"
+    async def _lookup(self, symptoms, top_k):
+        store = self.fragment_store
+        if store is not None and self.symptom_index is None:
+            if top_k:
+                hits = await self.rank_disease_ids_by_symptoms(symptoms, top_k=top_k)
+            else:
+                hits = await self.get_disease_ids_by_symptoms(symptoms)
+            # A due refresh may reload the file: off the loop
+            fragments = await asyncio.to_thread(
+                store.get_many, [hit["disease_id"] for hit in hits]
+            )
+            if fragments is not None:
+                return with_fragments(hits, fragments), fragments
+        if top_k:
+            diseases = await self.rank_diseases_by_symptoms(symptoms, top_k=top_k)
+        else:
+            diseases = await self.get_disease_by_symptoms(symptoms)
+        if store is None:
+            return diseases, None
+        fragments = await asyncio.to_thread(
+            store.get_many, [d["disease_id"] for d in diseases]
+        )
+        return diseases, fragments
 
-        return context.strip()
+    async def build_context_from_symptoms(
+        self, symptoms, top_k=None, token_budget=None
+    ):
+        with tracing.span("build_context", symptoms=len(symptoms)) as span:
+            # Cache lookups may hit SQLite or check the data version: off the loop
+            cache = self.context_cache
+            key, body = await asyncio.to_thread(
+                _from_cache, cache, symptoms, top_k, token_budget
+            )
+            span.set(cached=body is not None)
+            if body is not None:
+                return _finish_context(cache, key, symptoms, body=body)
+            diseases, fragments = await self._lookup(symptoms, top_k)
+            return await asyncio.to_thread(
+                _finish_context,
+                cache,
+                key,
+                symptoms,
+                token_budget,
+                diseases=diseases,
+                fragments=fragments,
+            )
 
 
 # =======================
 if __name__ == "__main__":
     connector = GraphConnector()
+    ok, seconds, error = connector.health_check()
+    print(
+        f"{connector.backend.name} reachable: {ok} ({seconds * 1000:.1f} ms)"
+        f"{' - ' + error if error else ''}"
+    )
 
     context = connector.build_context_from_symptoms(["Sneezing", "Fever"])
     print("=== Context from Symptoms === \n")
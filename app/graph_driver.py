@@ -0,0 +1,103 @@
+"""
+Process-wide Neo4j drivers.
+
+A driver owns a connection pool, so creating one per conversation pays a
+cold connect (and TLS handshake) for every lookup. shared_driver() and
+shared_async_driver() create one driver lazily, with pool settings from
+Config, and every connector checks sessions out of it.
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+from config import Config
+from neo4j import READ_ACCESS, WRITE_ACCESS, AsyncGraphDatabase, GraphDatabase
+
+logger = logging.getLogger(__name__)
+
+_driver = None
+_async_driver = None
+_lock = threading.Lock()
+
+
+def driver_options():
+    """Pool settings passed to every driver."""
+    options = {
+        "auth": (Config.NEO4J_USER, Config.NEO4J_PASSWORD),
+        "max_connection_pool_size": Config.NEO4J_MAX_POOL_SIZE,
+        "max_connection_lifetime": Config.NEO4J_MAX_CONNECTION_LIFETIME,
+        "connection_acquisition_timeout": Config.NEO4J_ACQUISITION_TIMEOUT,
+        "keep_alive": True,
+    }
+    if Config.NEO4J_LIVENESS_CHECK_TIMEOUT is not None:
+        # Idle pooled connections older than this are pinged before reuse
+        options["liveness_check_timeout"] = Config.NEO4J_LIVENESS_CHECK_TIMEOUT
+    return options
+
+
+def lookup_access_mode():
+    """READ routes lookups to any cluster member (followers included)."""
+    return READ_ACCESS if Config.NEO4J_READ_ROUTING else WRITE_ACCESS
+
+
+def shared_driver():
+    global _driver
+    if _driver is None:
+        with _lock:
+            if _driver is None:
+                _driver = GraphDatabase.driver(Config.NEO4J_URI, **driver_options())
+    return _driver
+
+
+def shared_async_driver():
+    """Shared AsyncDriver; use it from one event loop only."""
+    global _async_driver
+    if _async_driver is None:
+        with _lock:
+            if _async_driver is None:
+                _async_driver = AsyncGraphDatabase.driver(
+                    Config.NEO4J_URI, **driver_options()
+                )
+    return _async_driver
+
+
+def check_health(driver=None):
+    """Returns (ok, seconds, error) after a round trip to the server."""
+    start = time.perf_counter()
+    try:
+        (driver or shared_driver()).verify_connectivity()
+    except Exception as e:
+        return False, time.perf_counter() - start, str(e)
+    return True, time.perf_counter() - start, None
+
+
+async def check_health_async(driver=None):
+    start = time.perf_counter()
+    try:
+        await (driver or shared_async_driver()).verify_connectivity()
+    except Exception as e:
+        return False, time.perf_counter() - start, str(e)
+    return True, time.perf_counter() - start, None
+
+
+def close_shared_driver():
+    global _driver
+    with _lock:
+        if _driver is not None:
+            _driver.close()
+            _driver = None
+
+
+async def close_shared_async_driver():
+    global _async_driver
+    with _lock:
+        driver, _async_driver = _async_driver, None
+    if driver is not None:
+        await driver.close()
+
+
+# The sync driver is closed at interpreter exit; the async one must be closed
+# by its event loop (see close_shared_async_driver)
+atexit.register(close_shared_driver)
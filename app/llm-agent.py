@@ -1,88 +1,51 @@
 import logging
-from pathlib import Path
-from typing import List
+import sys
 
-import requests
-from graph_connector import GraphConnector
+import prompts
+import tracing
+from config import Config
+from context_builder import estimate_tokens
+from startup import Prewarm, StartupTimings
+
+# graph_connector (neo4j) and pipeline / ollama_client (requests) are
+# imported where they are first needed, or by the pre-warm threads, so the
+# first prompt does not wait for them
 
 # Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# -------------------------
-# Configuration
-# -------------------------
-BASE_DIR = Path(__file__).resolve().parent
-INSTRUCTIONS_PATH = BASE_DIR / "instructions.txt"
-
-OLLAMA_MODEL = "llama3.1:latest"
-OLLAMA_API_URL = "http://localhost:11434/api/generate"  # ✅ fixed
-
-
-# -------------------------
-# Helpers
-# -------------------------
-def load_instructions() -> str:
-    if not INSTRUCTIONS_PATH.exists():
-        return "You are a helpful medical assistant. Provide clear, concise answers and disclaimers."
-    return INSTRUCTIONS_PATH.read_text(encoding="utf-8")
-
-
-def call_ollama(
-    prompt: str, model: str = OLLAMA_MODEL, system_prompt: str = None
-) -> str:
-    """Direct API call to Ollama localhost."""
-    payload = {"model": model, "prompt": prompt, "stream": False}
-    if system_prompt:
-        payload["system"] = system_prompt
-
-    try:
-        response = requests.post(OLLAMA_API_URL, json=payload, timeout=120)
-        response.raise_for_status()
-        result = response.json()
-        return result.get("response", "").strip()
-    except Exception as e:
-        raise RuntimeError(f"Error calling Ollama API: {str(e)}")
-
-
-def extract_symptoms(user_input: str) -> List[str]:
-    """Use LLM to extract one or more symptoms from natural language as simple words."""
-    system_instructions = (
-        "You are a symptom extractor. Extract all symptoms from the text. "
-        "Return them as a comma-separated list of simple one words (e.g., 'fever, cough, headache'). "
-        "Do not add extra text."
-    )
-    prompt = f"User said: '{user_input}'. Extract all core symptoms in one or two words each."
-    response = call_ollama(prompt, system_prompt=system_instructions)
-
-    # Normalize into list
-    symptoms = [s.strip().lower() for s in response.split(",") if s.strip()]
-    return symptoms
-
 
 # -------------------------
 # Chatbot Logic
 # -------------------------
 def medical_chatbot():
     """Interactive chatbot with memory, symptom extraction, and graph RAG."""
+    timings = StartupTimings()
+    prewarm = Prewarm(timings) if Config.STARTUP_PREWARM else None
+
     print("🤖 Hello! I’m your healthcare assistant.")
     print("Please tell me your symptoms.\n")
+    timings.mark("ready")
 
     chat_history = []  # keeps previous dialogue
     symptoms = []
+    tracing.set_trace_id(tracing.new_trace_id())
 
     while True:
         user_input = input("You: ").strip()
         chat_history.append({"role": "user", "content": user_input})
 
         # Check if user is done
-        if user_input.lower() in ["no", "none", "that's it", "finished"]:
-            if len(symptoms) < 2:
+        if prompts.is_done(user_input):
+            if len(symptoms) < prompts.MIN_SYMPTOMS:
                 print("🤖 Please provide at least two symptoms to continue.")
                 continue
             break
 
         # Extract one or more symptoms using LLM
+        from pipeline import extract_symptoms
+
         extracted = extract_symptoms(user_input)
         new_symptoms = [s for s in extracted if s not in symptoms]
 
@@ -95,36 +58,58 @@ def medical_chatbot():
         print("🤖 Do you have any other symptoms?")
 
     # === Run Graph Query ===
-    graph = GraphConnector()
-    context_text = graph.build_context_from_symptoms(symptoms)
+    from graph_connector import NO_MATCH_CONTEXT, GraphConnector
+    from ollama_client import StreamStats, default_client
+
+    graph = (prewarm and prewarm.graph_connector()) or GraphConnector()
+    context_text = graph.build_context_from_symptoms(
+        symptoms, top_k=Config.CONTEXT_TOP_K, token_budget=Config.CONTEXT_TOKEN_BUDGET
+    )
     graph.close()
+    logger.info("Startup: %s", timings.summary())
 
-    if "No matching diseases" in context_text:
+    if context_text == NO_MATCH_CONTEXT:
         print("🤖 I couldn’t find any matching diseases for your symptoms.")
         return
 
-    system_instructions = load_instructions()
+    system_instructions = prompts.load_instructions()
 
     # Final context-aware answer
-    prompt = f"""Conversation so far:
-{chat_history}
-
-Extracted symptoms: {', '.join(symptoms)}
-
-CONTEXT from knowledge graph:
-{context_text}
-
-USER QUESTION:
-Based on my symptoms, what diseases might be possible and what precautions or treatments are generally recommended?"""
-
-    response = call_ollama(prompt, system_prompt=system_instructions)
+    prompt = prompts.build_final_prompt(chat_history, symptoms, context_text)
+    logger.info(
+        "Final prompt: ~%d tokens (context ~%d)",
+        estimate_tokens(prompt),
+        estimate_tokens(context_text),
+    )
 
+    # Stream the answer so the user sees it as soon as the first token arrives
     print("\n🤖 Here’s what I found:\n")
-    print(response.strip())
+    stats = StreamStats()
+    started = False
+    try:
+        for token in default_client().stream(
+            prompt, system_prompt=system_instructions, stats=stats
+        ):
+            if not started:
+                token = token.lstrip()
+                started = bool(token)
+            print(token, end="", flush=True)
+    except KeyboardInterrupt:
+        # Ctrl+C stops the answer (and the generation) but not the program
+        print("\n🤖 Stopped.")
+    print()
+    logger.info("Final answer: %s", stats.summary())
+    logger.info("LLM savings: %s", default_client().savings())
 
 
 # -------------------------
 # Run
 # -------------------------
 if __name__ == "__main__":
-    medical_chatbot()
+    if "--async" in sys.argv[1:]:
+        # Same conversation, served by the asyncio engine
+        from chat_engine import main as async_main
+
+        async_main()
+    else:
+        medical_chatbot()
@@ -0,0 +1,123 @@
+"""
+Response cache for deterministic Ollama calls.
+
+Only requests with temperature 0 are cached: for those the same model,
+system prompt, prompt and options always give the same answer, so repeated
+extractions ("fever", "headache") are served without touching the model.
+"""
+
+import hashlib
+import json
+import threading
+import time
+
+from cache_tiers import MemoryTier, SQLiteTier
+from config import Config
+
+# Fields of Ollama's response worth keeping; `context` is large and the
+# caller gets a fresh one on a miss anyway
+CACHED_FIELDS = ("model", "response", "done", "prompt_eval_count", "eval_count")
+# Seconds between deletions of expired rows from the SQLite tier
+PURGE_INTERVAL = 3600
+
+
+def is_deterministic(options):
+    return bool(options) and options.get("temperature") == 0
+
+
+def response_key(model, system_prompt, prompt, options):
+    raw = json.dumps(
+        [model, system_prompt or "", prompt, options or {}],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    LRU of responses, optionally persisted to SQLite (shared by processes).
+    Expired disk rows are deleted on open and then every PURGE_INTERVAL.
+    """
+
+    def __init__(self, memory: MemoryTier, disk: SQLiteTier = None):
+        self.memory = memory
+        self.disk = disk
+        self._lock = threading.Lock()
+        self._purged_at = time.monotonic()
+        if disk is not None:
+            disk.purge_expired()
+        self.hits = 0
+        self.misses = 0
+        # Tokens the model did not have to evaluate / generate thanks to hits
+        self.saved_prompt_tokens = 0
+        self.saved_eval_tokens = 0
+
+    def get(self, model, system_prompt, prompt, options):
+        key = response_key(model, system_prompt, prompt, options)
+        with self._lock:
+            value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key, model)
+            if value is not None:
+                with self._lock:
+                    self.memory.put(key, value)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            response = json.loads(value)
+            self.hits += 1
+            self.saved_prompt_tokens += response.get("prompt_eval_count") or 0
+            self.saved_eval_tokens += response.get("eval_count") or 0
+        return response
+
+    def put(self, model, system_prompt, prompt, options, response):
+        key = response_key(model, system_prompt, prompt, options)
+        value = json.dumps({k: response[k] for k in CACHED_FIELDS if k in response})
+        with self._lock:
+            self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, model, value)
+            if time.monotonic() - self._purged_at >= PURGE_INTERVAL:
+                self._purged_at = time.monotonic()
+                self.disk.purge_expired()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "saved_prompt_tokens": self.saved_prompt_tokens,
+            "saved_eval_tokens": self.saved_eval_tokens,
+            "entries": len(self.memory),
+            "evictions": self.memory.evictions,
+        }
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def shared_response_cache():
+    """
+    Process-wide cache selected by Config.LLM_CACHE: "memory", "sqlite"
+    (memory + LLM_CACHE_PATH), or anything else for none.
+    """
+    global _shared_cache
+    mode = Config.LLM_CACHE
+    if mode not in ("memory", "sqlite"):
+        return None
+    with _shared_lock:
+        if _shared_cache is None:
+            memory = MemoryTier(
+                Config.LLM_CACHE_SIZE, Config.LLM_CACHE_MAX_BYTES, Config.LLM_CACHE_TTL
+            )
+            disk = None
+            if mode == "sqlite":
+                disk = SQLiteTier(
+                    Config.LLM_CACHE_PATH, Config.LLM_CACHE_TTL, table="llm_cache"
+                )
+            _shared_cache = ResponseCache(memory, disk)
+        return _shared_cache
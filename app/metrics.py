@@ -0,0 +1,143 @@
+import bisect
+import math
+import threading
+
+# Upper bounds in seconds, Prometheus style (the last bucket is +Inf)
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (q in 0..100) of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _bound(value):
+    # JSON has no infinity
+    return "+Inf" if value == float("inf") else value
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; cheap to update from any thread."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def quantile(self, q):
+        """Bucket upper bound containing the q-quantile (None if empty)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        cumulative = 0
+        buckets = {}
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += n
+            buckets[str(_bound(bound))] = cumulative
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": _bound(self.quantile(0.5)),
+            "p95": _bound(self.quantile(0.95)),
+            "p99": _bound(self.quantile(0.99)),
+            "buckets": buckets,
+        }
+
+
+class HistogramRegistry:
+    """Histograms keyed by name, created on first use."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(
+                    name, LatencyHistogram(self.buckets)
+                )
+        return histogram
+
+    def observe(self, name, seconds):
+        self.get(name).observe(seconds)
+
+    def items(self):
+        return sorted(self._histograms.items())
+
+    def snapshot(self):
+        return {name: h.snapshot() for name, h in self.items()}
+
+
+# ------------------ PROMETHEUS TEXT FORMAT ------------------
+
+
+def _label(value):
+    escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return escaped.replace("\n", "\\n")
+
+
+def _bucket_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+def render_histograms(registry, metric, label, help_text):
+    """Prometheus text exposition of every histogram in a HistogramRegistry."""
+    lines = [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+    for name, histogram in registry.items():
+        key = f'{label}="{_label(name)}"'
+        cumulative = 0
+        for bound, n in zip(histogram.buckets + (float("inf"),), histogram.counts):
+            cumulative += n
+            lines.append(
+                f'{metric}_bucket{{{key},le="{_bucket_bound(bound)}"}} {cumulative}'
+            )
+        lines.append(f"{metric}_sum{{{key}}} {histogram.sum}")
+        lines.append(f"{metric}_count{{{key}}} {histogram.count}")
+    return lines
+
+
+def render_counters(values, metric, labels, help_text):
+    """Counters from {(label values...): value} as Prometheus text lines."""
+    lines = [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+    for key, value in sorted(values.items()):
+        pairs = ",".join(f'{name}="{_label(v)}"' for name, v in zip(labels, key))
+        lines.append(f"{metric}{{{pairs}}} {value}")
+    return lines
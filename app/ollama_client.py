@@ -0,0 +1,407 @@
+import json
+import logging
+import random
+import threading
+import time
+from functools import lru_cache
+from typing import Iterator, Optional
+
+import requests
+import tracing
+from config import Config
+from context_builder import estimate_tokens
+from llm_cache import is_deterministic, shared_response_cache
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_MODEL = Config.OLLAMA_MODEL
+
+# Responses worth retrying: overloaded or restarting server
+RETRY_STATUSES = {500, 502, 503, 504}
+
+# Short exchange that makes Ollama evaluate a system prompt once; its
+# returned `context` then stands in for the system prompt on later calls.
+# That context also holds this prompt and the model's reply, so later calls
+# continue the exchange (hence OLLAMA_REUSE_CONTEXT is opt-in)
+PRIME_PROMPT = "Reply with OK."
+PRIME_OPTIONS = {"temperature": 0, "num_predict": 4}
+MAX_PREFIXES = 32
+
+
+class OllamaError(RuntimeError):
+    """Raised when Ollama cannot produce a response."""
+
+
+def ollama_timings(response: dict) -> dict:
+    """Token counts and server-side durations (seconds) from a final response."""
+    timings = {}
+    for field in ("prompt_eval_count", "eval_count"):
+        if response.get(field) is not None:
+            timings[field] = response[field]
+    for field in (
+        "total_duration",
+        "load_duration",
+        "prompt_eval_duration",
+        "eval_duration",
+    ):
+        if response.get(field) is not None:
+            timings[field.replace("duration", "seconds")] = response[field] / 1e9
+    return timings
+
+
+class StreamStats:
+    """Timing of one streamed generation."""
+
+    def __init__(self):
+        self.started_at = None
+        self.first_token_at = None
+        self.finished_at = None
+        self.chunks = 0
+        self.cancelled = False
+        # Exception type that ended the stream, set by stream()
+        self.error = None
+        # Reported by Ollama in the final chunk
+        self.eval_count = None
+        self.eval_duration_ns = None
+        self.final_chunk = {}
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        if self.eval_count and self.eval_duration_ns:
+            return self.eval_count / (self.eval_duration_ns / 1e9)
+        if self.first_token_at is None or self.finished_at is None:
+            return None
+        elapsed = self.finished_at - self.first_token_at
+        return self.chunks / elapsed if elapsed > 0 else None
+
+    def trace(self, model):
+        """
+        Export the stream as an "ollama.stream" span (see tracing.py). Called
+        from the stream's `finally`; a failure is taken from `error`, not
+        exc_info, which would show an exception the caller is handling.
+        """
+        tracing.record(
+            "ollama.stream",
+            self.finished_at - self.started_at,
+            error=self.error,
+            model=model,
+            chunks=self.chunks,
+            cancelled=self.cancelled,
+            ttft_seconds=self.time_to_first_token,
+            **ollama_timings(self.final_chunk),
+        )
+
+    def summary(self) -> str:
+        ttft = self.time_to_first_token
+        rate = self.tokens_per_second
+        return (f"TTFT {ttft:.2f}s" if ttft is not None else "TTFT n/a") + (
+            f", {rate:.1f} tokens/s" if rate is not None else ""
+        )
+
+
+class PromptPrefixes:
+    """
+    Ollama `context` tokens for already evaluated (model, system prompt)
+    pairs. Sending those tokens instead of the system text gives Ollama the
+    same token prefix every time, which it serves from the loaded model's
+    KV cache (kept resident by keep_alive) instead of re-evaluating it.
+
+    The prefix is the whole priming exchange, not the system prompt alone:
+    the model answers as if it had already replied to PRIME_PROMPT. Only
+    the system prompt's (estimated) tokens count as saved.
+    """
+
+    def __init__(self):
+        self._contexts = {}
+        self._lock = threading.Lock()
+        self.primed = 0
+        self.reused = 0
+        self.saved_prompt_tokens = 0
+
+    def lookup(self, model, system_prompt):
+        """(known, prefix): prefix is None if the server gave no context."""
+        key = (model, system_prompt)
+        with self._lock:
+            return key in self._contexts, self._contexts.get(key)
+
+    def store(self, model, system_prompt, response):
+        context = response.get("context")
+        prefix = (context, estimate_tokens(system_prompt)) if context else None
+        with self._lock:
+            if len(self._contexts) >= MAX_PREFIXES:
+                self._contexts.clear()
+            self._contexts[(model, system_prompt)] = prefix
+            self.primed += 1
+        return prefix
+
+    def apply(self, payload, prefix):
+        context, tokens = prefix
+        payload.pop("system", None)
+        payload["context"] = context
+        with self._lock:
+            self.reused += 1
+            self.saved_prompt_tokens += tokens
+
+    def stats(self):
+        return {
+            "primed": self.primed,
+            "reused": self.reused,
+            "saved_prompt_tokens": self.saved_prompt_tokens,
+        }
+
+
+class OllamaClient:
+    """
+    Ollama HTTP client with a pooled keep-alive session.
+
+    At most `max_concurrency` requests are in flight at once; further callers
+    block until a slot frees up. Connection failures, connect timeouts and
+    5xx responses are retried with exponential backoff and jitter (read
+    timeouts are not: the model is busy, and retrying would add load).
+    `keep_alive` is sent with every request so the model stays resident
+    between turns.
+
+    With `reuse_context` (off by default), a system prompt is evaluated once
+    and later calls send the returned `context` instead; this changes what
+    the model sees (see PromptPrefixes). Deterministic
+    calls (temperature 0) are answered from `response_cache` when possible.
+    """
+
+    def __init__(
+        self,
+        base_url: str = Config.OLLAMA_URL,
+        model: str = Config.OLLAMA_MODEL,
+        keep_alive: str = Config.OLLAMA_KEEP_ALIVE,
+        max_concurrency: int = Config.OLLAMA_MAX_CONCURRENCY,
+        connect_timeout: float = Config.OLLAMA_CONNECT_TIMEOUT,
+        read_timeout: float = Config.OLLAMA_READ_TIMEOUT,
+        max_retries: int = Config.OLLAMA_MAX_RETRIES,
+        backoff: float = 0.5,
+        reuse_context: bool = Config.OLLAMA_REUSE_CONTEXT,
+        response_cache=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.keep_alive = keep_alive
+        self.reuse_context = reuse_context
+        self.prefixes = PromptPrefixes()
+        self.response_cache = response_cache or shared_response_cache()
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    def _payload(self, prompt, model, system_prompt, stream, options):
+        payload = {
+            "model": model or self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+        }
+        if system_prompt:
+            payload["system"] = system_prompt
+        if options:
+            payload["options"] = options
+        return payload
+
+    def _post(self, path, payload, stream=False):
+        """POST with retries; returns a response with a 2xx status."""
+        url = f"{self.base_url}{path}"
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(
+                    url, json=payload, stream=stream, timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.ConnectTimeout) as e:
+                error = e
+            except requests.RequestException as e:
+                raise OllamaError(f"Error calling Ollama API: {str(e)}")
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    try:
+                        response.raise_for_status()
+                    except requests.HTTPError as e:
+                        response.close()
+                        raise OllamaError(f"Error calling Ollama API: {str(e)}")
+                    return response
+                error = f"HTTP {response.status_code}"
+                response.close()
+
+            if attempt == self.max_retries:
+                break
+            delay = self.backoff * (2**attempt) * (0.5 + random.random())
+            logger.warning(
+                "Ollama request failed (%s), retry %d/%d in %.2fs",
+                error,
+                attempt + 1,
+                self.max_retries,
+                delay,
+            )
+            time.sleep(delay)
+        raise OllamaError(
+            f"Error calling Ollama API after {self.max_retries + 1} attempts: {error}"
+        )
+
+    def _use_prefix(self, payload):
+        """Swap the system prompt for its evaluated context, priming once."""
+        system_prompt = payload.get("system")
+        if not self.reuse_context or not system_prompt:
+            return
+        known, prefix = self.prefixes.lookup(payload["model"], system_prompt)
+        if not known:
+            prefix = self._prime(payload["model"], system_prompt)
+        if prefix:
+            self.prefixes.apply(payload, prefix)
+
+    def _prime(self, model, system_prompt):
+        """Evaluate system_prompt once; returns its prefix (None on failure)."""
+        prime = self._payload(PRIME_PROMPT, model, system_prompt, False, PRIME_OPTIONS)
+        try:
+            with self._slots:
+                result = self._post("/api/generate", prime).json()
+        except (OllamaError, ValueError) as e:
+            # Not fatal: send the full system prompt and try again next time
+            logger.warning("Could not prime Ollama context: %s", e)
+            return None
+        return self.prefixes.store(model, system_prompt, result)
+
+    def warm(self, *system_prompts, model: str = None):
+        """
+        Load the model ahead of the first real request. With reuse_context,
+        the given system prompts are evaluated (and their prefixes kept) at
+        the same time; otherwise an empty request only loads the model.
+        """
+        model = model or self.model
+        if self.reuse_context and system_prompts:
+            for system_prompt in system_prompts:
+                known, _ = self.prefixes.lookup(model, system_prompt)
+                if not known:
+                    self._prime(model, system_prompt)
+            return
+        # A request without a prompt makes Ollama load the model and return
+        payload = {"model": model, "keep_alive": self.keep_alive}
+        with self._slots:
+            self._post("/api/generate", payload).close()
+
+    def generate(
+        self,
+        prompt: str,
+        model: str = None,
+        system_prompt: str = None,
+        options: dict = None,
+    ) -> dict:
+        """Blocking generation; returns Ollama's full JSON response."""
+        model = model or self.model
+        with tracing.span("ollama.generate", model=model) as span:
+            cache = self.response_cache if is_deterministic(options) else None
+            if cache is not None:
+                cached = cache.get(model, system_prompt, prompt, options)
+                if cached is not None:
+                    span.set(cached=True)
+                    return cached
+
+            payload = self._payload(prompt, model, system_prompt, False, options)
+            self._use_prefix(payload)
+            with self._slots:
+                response = self._post("/api/generate", payload)
+                try:
+                    result = response.json()
+                except ValueError as e:
+                    raise OllamaError(f"Invalid response from Ollama API: {str(e)}")
+            span.set(**ollama_timings(result))
+            if cache is not None:
+                cache.put(model, system_prompt, prompt, options, result)
+            return result
+
+    def savings(self) -> dict:
+        """Cache hit rate and prompt tokens Ollama did not re-evaluate."""
+        return {
+            "response_cache": (
+                self.response_cache.stats() if self.response_cache else None
+            ),
+            "prefix_reuse": self.prefixes.stats(),
+        }
+
+    def stream(
+        self,
+        prompt: str,
+        model: str = None,
+        system_prompt: str = None,
+        options: dict = None,
+        stats: StreamStats = None,
+        cancel_event=None,
+    ) -> Iterator[str]:
+        """
+        Stream a generation, yielding text fragments as they arrive.
+
+        Ollama answers with NDJSON, one object per token batch. Setting
+        `cancel_event` (a threading.Event) or closing the generator stops
+        reading and closes the connection, which also stops generation
+        server-side. Only the initial request is retried.
+        """
+        stats = stats if stats is not None else StreamStats()
+        payload = self._payload(prompt, model, system_prompt, True, options)
+        self._use_prefix(payload)
+
+        with self._slots:
+            stats.started_at = time.perf_counter()
+            response = self._post("/api/generate", payload, stream=True)
+            try:
+                for line in response.iter_lines():
+                    if cancel_event is not None and cancel_event.is_set():
+                        stats.cancelled = True
+                        break
+                    if not line:
+                        continue
+                    try:
+                        chunk = json.loads(line)
+                    except ValueError as e:
+                        raise OllamaError(f"Invalid line in Ollama stream: {e}")
+                    if "error" in chunk:
+                        raise OllamaError(f"Error calling Ollama API: {chunk['error']}")
+                    text = chunk.get("response", "")
+                    if text:
+                        if stats.first_token_at is None:
+                            stats.first_token_at = time.perf_counter()
+                        stats.chunks += 1
+                        yield text
+                    if chunk.get("done"):
+                        stats.eval_count = chunk.get("eval_count")
+                        stats.eval_duration_ns = chunk.get("eval_duration")
+                        stats.final_chunk = chunk
+                        break
+            except requests.RequestException as e:
+                stats.error = OllamaError.__name__
+                raise OllamaError(f"Error reading Ollama stream: {str(e)}")
+            except GeneratorExit:
+                stats.cancelled = True
+                raise
+            except BaseException as e:
+                stats.error = type(e).__name__
+                raise
+            finally:
+                stats.finished_at = time.perf_counter()
+                response.close()
+                logger.info("Ollama stream: %s", stats.summary())
+                stats.trace(payload["model"])
+
+
+@lru_cache(maxsize=1)
+def default_client() -> OllamaClient:
+    """Process-wide client, so every call shares one connection pool."""
+    return OllamaClient()
@@ -0,0 +1,47 @@
+"""Pipeline stages shared by the interactive chatbot and the batch runner."""
+
+from typing import List
+
+import prompts
+import tracing
+from ollama_client import OLLAMA_MODEL, default_client
+from symptom_matcher import default_matcher
+
+
+def call_ollama(
+    prompt: str,
+    model: str = OLLAMA_MODEL,
+    system_prompt: str = None,
+    options: dict = None,
+    client=None,
+) -> str:
+    """
+    Blocking call to Ollama through the shared, pooled client (or `client`).
+    Calls with temperature 0 in `options` may be answered from the cache.
+    """
+    result = (client or default_client()).generate(
+        prompt, model=model, system_prompt=system_prompt, options=options
+    )
+    return result.get("response", "").strip()
+
+
+def extract_symptoms(user_input: str, client=None) -> List[str]:
+    """
+    Extract one or more symptoms from natural language as graph symptom names.
+    The local matcher handles most inputs; the LLM is only asked when it finds
+    nothing, and its answer is canonicalized the same way.
+    """
+    with tracing.span("extract_symptoms", source="matcher") as span:
+        matcher = default_matcher()
+        symptoms = matcher.match(user_input)
+        if not symptoms:
+            span.set(source="llm")
+            response = call_ollama(
+                prompts.extractor_prompt(user_input),
+                system_prompt=prompts.EXTRACTOR_SYSTEM_PROMPT,
+                options=prompts.EXTRACTOR_OPTIONS,
+                client=client,
+            )
+            symptoms = prompts.parse_extracted(response, matcher)
+        span.set(symptoms=len(symptoms))
+        return symptoms
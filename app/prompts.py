@@ -0,0 +1,76 @@
+"""Prompts and conversation rules shared by the CLI and the async engine."""
+
+from functools import lru_cache
+from pathlib import Path
+from typing import List
+
+from config import Config
+from context_builder import render_history
+
+BASE_DIR = Path(__file__).resolve().parent
+INSTRUCTIONS_PATH = BASE_DIR / "instructions.txt"
+
+DEFAULT_INSTRUCTIONS = (
+    "You are a helpful medical assistant. "
+    "Provide clear, concise answers and disclaimers."
+)
+
+# Replies that end symptom collection
+DONE_WORDS = ["no", "none", "that's it", "finished"]
+MIN_SYMPTOMS = 2
+
+EXTRACTOR_SYSTEM_PROMPT = (
+    "You are a symptom extractor. Extract all symptoms from the text. "
+    "Return them as a comma-separated list of simple one words (e.g., 'fever, cough, headache'). "
+    "Do not add extra text."
+)
+# Extraction is deterministic, so repeated phrases can be answered from cache
+EXTRACTOR_OPTIONS = {"temperature": 0}
+
+FINAL_QUESTION = (
+    "Based on my symptoms, what diseases might be possible "
+    "and what precautions or treatments are generally recommended?"
+)
+
+
+@lru_cache(maxsize=1)
+def load_instructions() -> str:
+    """instructions.txt, read once per process (restart to pick up edits)."""
+    if not INSTRUCTIONS_PATH.exists():
+        return DEFAULT_INSTRUCTIONS
+    return INSTRUCTIONS_PATH.read_text(encoding="utf-8")
+
+
+def is_done(user_input: str) -> bool:
+    return user_input.strip().lower() in DONE_WORDS
+
+
+def extractor_prompt(user_input: str) -> str:
+    return f"User said: '{user_input}'. Extract all core symptoms in one or two words each."
+
+
+def parse_extracted(response: str, matcher) -> List[str]:
+    """Split the extractor's answer, preferring graph names when resolvable."""
+    symptoms = []
+    for s in response.split(","):
+        if s.strip():
+            name = matcher.canonicalize(s) or s.strip().lower()
+            if name not in symptoms:
+                symptoms.append(name)
+    return symptoms
+
+
+def build_final_prompt(chat_history, symptoms: List[str], context_text: str) -> str:
+    history = render_history(
+        chat_history, Config.CHAT_HISTORY_MESSAGES, Config.CHAT_HISTORY_TOKEN_BUDGET
+    )
+    return f"""Conversation so far:
+{history}
+
+Extracted symptoms: {', '.join(symptoms)}
+
+CONTEXT from knowledge graph:
+{context_text}
+
+USER QUESTION:
+{FINAL_QUESTION}"""
@@ -0,0 +1,380 @@
+"""
+Run GraphConnector's Cypher under PROFILE: db hits, rows and the operator
+plan of every query, with row blow-ups flagged.
+
+    python app/query_profiler.py                              # sample symptom sets
+    python app/query_profiler.py --symptoms "Fever,Cough" --symptoms "Sneezing,Fever"
+    python app/query_profiler.py --output profile.json --baseline old-profile.json
+    python app/query_profiler.py --markdown rewrite-comparison.md
+
+Without --symptoms, symptom pairs are taken from the best-connected diseases,
+where a cross product hurts most. For every symptom set the rewritten
+MATCH_ALL_QUERY is also checked against LEGACY_MATCH_ALL_QUERY (and the id-only
+variants against each other): both must return the same diseases and details.
+The connector keeps the legacy queries until GRAPH_MATCH_ALL_QUERY=rewritten.
+
+Exit status is 1 when the two differ, a current query shows a blow-up, or
+(with --baseline) a query's db hits grew by more than --threshold.
+"""
+
+import argparse
+import json
+import sys
+
+import graph_connector
+import graph_driver
+from config import Config
+from symptom_index import DEFAULT_TOP_K
+
+# name: (query, params for a symptom list)
+QUERIES = {
+    "match_all": (
+        graph_connector.MATCH_ALL_QUERY,
+        lambda symptoms: {"symptoms": symptoms},
+    ),
+    "match_all_legacy": (
+        graph_connector.LEGACY_MATCH_ALL_QUERY,
+        lambda symptoms: {"symptoms": symptoms},
+    ),
+    "rank": (
+        graph_connector.RANK_QUERY,
+        lambda symptoms: graph_connector.rank_params(symptoms, DEFAULT_TOP_K, 1),
+    ),
+    # Id-only variants used with CONTEXT_FRAGMENTS=on
+    "match_all_ids": (
+        graph_connector.MATCH_ALL_IDS_QUERY,
+        lambda symptoms: {"symptoms": symptoms},
+    ),
+    "match_all_ids_legacy": (
+        graph_connector.LEGACY_MATCH_ALL_IDS_QUERY,
+        lambda symptoms: {"symptoms": symptoms},
+    ),
+    "rank_ids": (
+        graph_connector.RANK_IDS_QUERY,
+        lambda symptoms: graph_connector.rank_params(symptoms, DEFAULT_TOP_K, 1),
+    ),
+}
+# Rewritten queries (GRAPH_MATCH_ALL_QUERY=rewritten, and ranking); a
+# blow-up in one of these fails the run
+CURRENT_QUERIES = ("match_all", "rank", "match_all_ids", "rank_ids")
+DETAIL_LISTS = ("symptoms", "cures", "medicines", "precautions")
+
+SAMPLE_QUERY = """
+    MATCH (d:Disease)
+    WITH d, size([(d)--() | 1]) AS degree
+    ORDER BY degree DESC
+    LIMIT $limit
+    MATCH (d)-[:HAS_SYMPTOM]->(s:Symptom)
+    WITH d, degree, s ORDER BY s.name
+    WITH d, degree, COLLECT(s.name) AS names
+    WHERE size(names) >= 2
+    RETURN names[..2] AS symptoms
+    ORDER BY degree DESC
+    """
+
+DEFAULT_SAMPLES = 5
+DEFAULT_BLOWUP_FACTOR = 10.0
+DEFAULT_MIN_ROWS = 100
+DEFAULT_THRESHOLD = 0.10
+
+
+# -------------------------
+# Plans
+# -------------------------
+def flatten_plan(profile, depth=0):
+    """PROFILE tree as a list of operators, root first, with their depth."""
+    args = profile.get("args") or {}
+    operator = {
+        "depth": depth,
+        "operator": profile.get("operatorType", "?").split("@")[0],
+        "rows": profile.get("rows", args.get("Rows", 0)),
+        "db_hits": profile.get("dbHits", args.get("DbHits", 0)),
+        "estimated_rows": args.get("EstimatedRows"),
+        "details": args.get("Details", ""),
+        "children": len(profile.get("children") or []),
+    }
+    operators = [operator]
+    for child in profile.get("children") or []:
+        operators.extend(flatten_plan(child, depth + 1))
+    return operators
+
+
+def find_blowups(profile, factor, min_rows):
+    """
+    Operators where rows multiply: any CartesianProduct, and the top of every
+    pipeline of two or more row-expanding operators (with only row-neutral
+    ones between them) whose combined growth is at least `factor`. One
+    expand fanning out from an index seek is normal; OPTIONAL MATCHes
+    stacked on the same node multiply into each other and are not.
+    """
+    blowups = []
+
+    def walk(op):
+        """Returns (rows, growth, expanding operators) of op's pipeline."""
+        children = op.get("children") or []
+        results = [walk(child) for child in children]
+        rows = op.get("rows", (op.get("args") or {}).get("Rows", 0))
+        name = op.get("operatorType", "?").split("@")[0]
+        if name.startswith("CartesianProduct") and rows >= min_rows:
+            blowups.append({"operator": name, "rows": rows, "growth": None})
+        if len(results) != 1:
+            # Leaves and binary operators start a new pipeline
+            return rows, 1.0, 0
+        child_rows, growth, expanding = results[0]
+        if rows < child_rows:
+            return rows, 1.0, 0
+        if rows > child_rows:
+            growth *= rows / max(child_rows, 1)
+            expanding += 1
+            if expanding >= 2 and growth >= factor and rows >= min_rows:
+                blowups.append(
+                    {"operator": name, "rows": rows, "growth": round(growth, 1)}
+                )
+        return rows, growth, expanding
+
+    walk(profile)
+    return blowups
+
+
+def render_plan(operators):
+    lines = []
+    for op in operators:
+        details = f"  {op['details'][:70]}" if op["details"] else ""
+        lines.append(
+            f"{'  ' * op['depth']}{op['operator']} "
+            f"rows={op['rows']} db_hits={op['db_hits']}{details}"
+        )
+    return "\n".join(lines)
+
+
+# -------------------------
+# Results
+# -------------------------
+def normalize(records):
+    """
+    Order-independent form of disease records. Detail lists drop the
+    {name: null} entries OPTIONAL MATCH leaves for missing relationships
+    and duplicates COLLECT(DISTINCT) would have removed.
+    """
+    normalized = []
+    for record in records:
+        record = dict(record)
+        for key in DETAIL_LISTS:
+            items = {
+                json.dumps(item, sort_keys=True)
+                for item in record.get(key) or []
+                if item.get("name")
+            }
+            record[key] = sorted(items)
+        normalized.append(record)
+    return sorted(normalized, key=lambda r: r["disease_id"])
+
+
+def profile_query(session, name, symptoms):
+    query, params = QUERIES[name]
+    result = session.run("PROFILE " + query, **params(symptoms))
+    records = result.data()
+    profile = result.consume().profile or {}
+    operators = flatten_plan(profile)
+    return (
+        records,
+        profile,
+        {
+            "query": name,
+            "symptoms": symptoms,
+            "rows_returned": len(records),
+            "db_hits": sum(op["db_hits"] or 0 for op in operators),
+            "peak_rows": max((op["rows"] or 0 for op in operators), default=0),
+            "plan": operators,
+        },
+    )
+
+
+def sample_symptom_sets(session, limit):
+    return [r["symptoms"] for r in session.run(SAMPLE_QUERY, limit=limit)]
+
+
+def run_profiles(symptom_sets, factor, min_rows):
+    """Profile every query for every symptom set; returns the report dict."""
+    driver = graph_driver.shared_driver()
+    profiles = []
+    comparisons = []
+    with driver.session(
+        database=Config.NEO4J_DATABASE,
+        default_access_mode=graph_driver.lookup_access_mode(),
+    ) as session:
+        if not symptom_sets:
+            symptom_sets = sample_symptom_sets(session, DEFAULT_SAMPLES)
+        for symptoms in symptom_sets:
+            results = {}
+            for name in QUERIES:
+                records, profile, entry = profile_query(session, name, symptoms)
+                entry["blowups"] = find_blowups(profile, factor, min_rows)
+                results[name] = (records, entry)
+                profiles.append(entry)
+
+            (current, new), (legacy, old) = (
+                results["match_all"],
+                results["match_all_legacy"],
+            )
+            ids, legacy_ids = (
+                sorted(r["disease_id"] for r in results[name][0])
+                for name in ("match_all_ids", "match_all_ids_legacy")
+            )
+            comparisons.append(
+                {
+                    "symptoms": symptoms,
+                    "identical": normalize(current) == normalize(legacy)
+                    and ids == legacy_ids,
+                    "diseases": len(current),
+                    "db_hits": new["db_hits"],
+                    "legacy_db_hits": old["db_hits"],
+                    "peak_rows": new["peak_rows"],
+                    "legacy_peak_rows": old["peak_rows"],
+                }
+            )
+    return {"profiles": profiles, "comparisons": comparisons}
+
+
+def profile_key(entry):
+    return f"{entry['query']}|{','.join(entry['symptoms'])}"
+
+
+def check_baseline(report, baseline, threshold):
+    """Queries whose db hits grew by more than threshold since the baseline."""
+    old = {profile_key(p): p["db_hits"] for p in baseline.get("profiles", [])}
+    regressions = []
+    for entry in report["profiles"]:
+        before = old.get(profile_key(entry))
+        if before is None or entry["query"] not in CURRENT_QUERIES:
+            continue
+        if entry["db_hits"] > before * (1 + threshold):
+            regressions.append(
+                {"key": profile_key(entry), "before": before, "after": entry["db_hits"]}
+            )
+    return regressions
+
+
+def print_report(report, show_plans):
+    print(
+        f"\n📊 {'query':<18}{'symptoms':<36}{'rows':>6}{'db hits':>10}{'peak rows':>11}"
+    )
+    for entry in report["profiles"]:
+        flag = " ⚠️ blow-up" if entry["blowups"] else ""
+        print(
+            f"   {entry['query']:<18}{', '.join(entry['symptoms'])[:34]:<36}"
+            f"{entry['rows_returned']:>6}{entry['db_hits']:>10}{entry['peak_rows']:>11}"
+            f"{flag}"
+        )
+        if show_plans:
+            print(render_plan(entry["plan"]))
+            print()
+
+    print("\n🔁 Rewritten match_all vs legacy")
+    for c in report["comparisons"]:
+        ratio = c["legacy_db_hits"] / c["db_hits"] if c["db_hits"] else float("inf")
+        status = "✅ identical" if c["identical"] else "❌ DIFFERENT"
+        print(
+            f"   {status} {', '.join(c['symptoms'])}: {c['diseases']} diseases, "
+            f"db hits {c['legacy_db_hits']} → {c['db_hits']} ({ratio:.1f}x fewer), "
+            f"peak rows {c['legacy_peak_rows']} → {c['peak_rows']}"
+        )
+
+
+def comparison_markdown(report):
+    """Rewritten vs legacy match_all as a Markdown table, for the readme."""
+    lines = [
+        "| symptoms | same results | diseases | db hits (legacy → rewritten) "
+        "| fewer db hits | peak rows (legacy → rewritten) |",
+        "|---|---|---|---|---|---|",
+    ]
+    for c in report["comparisons"]:
+        ratio = c["legacy_db_hits"] / c["db_hits"] if c["db_hits"] else float("inf")
+        lines.append(
+            f"| {', '.join(c['symptoms'])} | {'yes' if c['identical'] else 'NO'} "
+            f"| {c['diseases']} | {c['legacy_db_hits']} → {c['db_hits']} "
+            f"| {ratio:.1f}x | {c['legacy_peak_rows']} → {c['peak_rows']} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+# -------------------------
+# CLI
+# -------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="PROFILE GraphConnector queries")
+    parser.add_argument(
+        "--symptoms",
+        action="append",
+        help="Comma-separated symptom names; repeat for several sets "
+        "(default: sampled from the best-connected diseases)",
+    )
+    parser.add_argument("--plans", action="store_true", help="Print operator plans")
+    parser.add_argument(
+        "--blowup-factor",
+        type=float,
+        default=DEFAULT_BLOWUP_FACTOR,
+        help="Row growth across stacked expands that counts as a blow-up",
+    )
+    parser.add_argument(
+        "--min-rows",
+        type=int,
+        default=DEFAULT_MIN_ROWS,
+        help="Ignore blow-ups below this many rows",
+    )
+    parser.add_argument("--output", help="Write the report as JSON here")
+    parser.add_argument(
+        "--markdown", help="Write the rewritten-vs-legacy comparison table here"
+    )
+    parser.add_argument("--baseline", help="Report JSON of an earlier run to compare")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Allowed db hit growth vs the baseline (default: {DEFAULT_THRESHOLD})",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    symptom_sets = [
+        [s.strip() for s in value.split(",") if s.strip()]
+        for value in args.symptoms or []
+    ]
+    report = run_profiles(symptom_sets, args.blowup_factor, args.min_rows)
+    print_report(report, args.plans)
+
+    failures = []
+    if not all(c["identical"] for c in report["comparisons"]):
+        failures.append("rewritten match_all returned different results")
+    blown = [
+        profile_key(p)
+        for p in report["profiles"]
+        if p["blowups"] and p["query"] in CURRENT_QUERIES
+    ]
+    if blown:
+        failures.append(f"row blow-ups in {', '.join(blown)}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["regressions"] = check_baseline(report, json.load(f), args.threshold)
+        for r in report["regressions"]:
+            print(f"   ❌ {r['key']}: db hits {r['before']} → {r['after']}")
+        if report["regressions"]:
+            failures.append("db hits grew beyond the threshold")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {args.output}")
+    if args.markdown:
+        with open(args.markdown, "w", encoding="utf-8") as f:
+            f.write(comparison_markdown(report))
+        print(f"📝 Comparison table written to {args.markdown}")
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,489 @@
+"""
+HTTP / WebSocket front end for the chat engine.
+
+    python app/server.py                      # real Neo4j + Ollama from .env
+    python app/server.py --stub-backends      # stub Ollama + processed_data index
+
+Endpoints:
+
+    POST   /sessions                  create a session
+    GET    /sessions/{id}             session state and symptoms
+    DELETE /sessions/{id}             end a session
+    POST   /sessions/{id}/messages    {"text": "..."} -> {"ready", "reply", ...}
+    POST   /sessions/{id}/answer      final answer, streamed as plain text
+    GET    /sessions/{id}/ws          WebSocket: messages in, replies/tokens out
+    GET    /metrics                   latency histograms, queue and session counts
+    GET    /metrics/prometheus        the same plus stage spans, Prometheus text format
+    GET    /health                    liveness (?deep=1 also checks the graph)
+
+Every LLM request passes a bounded admission queue: at most
+OLLAMA_MAX_CONCURRENCY run, at most SERVER_MAX_QUEUE wait, and anything
+beyond that (or waiting longer than SERVER_QUEUE_TIMEOUT) gets HTTP 429
+with Retry-After instead of piling up on the model.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import time
+
+import metrics
+import tracing
+from aiohttp import WSMsgType, web
+from async_ollama import AsyncOllamaClient
+from chat_engine import GREETING, ChatEngine, SessionNotFound, SessionNotReady
+from config import Config
+from metrics import HistogramRegistry, LatencyHistogram
+from ollama_client import OllamaError, StreamStats
+
+logger = logging.getLogger(__name__)
+
+RETRY_AFTER_SECONDS = 1
+REAP_INTERVAL = 60.0
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Saturated(Exception):
+    """The LLM queue is full; the request should be retried later."""
+
+
+# -------------------------
+# Admission control
+# -------------------------
+class AdmissionController:
+    """Bounded queue in front of the LLM: max_active run, max_queue wait."""
+
+    def __init__(self, max_active, max_queue, queue_timeout):
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_active)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.queue_wait = LatencyHistogram()
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        if self._slots.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise Saturated("LLM queue is full")
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise Saturated("Timed out waiting for the LLM")
+        finally:
+            self.waiting -= 1
+        self.queue_wait.observe(time.perf_counter() - start)
+        self.admitted += 1
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+    def snapshot(self):
+        return {
+            "max_active": self.max_active,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "queue_wait": self.queue_wait.snapshot(),
+        }
+
+
+class AdmittedLLM:
+    """AsyncOllamaClient whose requests go through an AdmissionController."""
+
+    def __init__(self, llm, admission):
+        self.llm = llm
+        self.admission = admission
+
+    async def generate(self, prompt, model=None, system_prompt=None, options=None):
+        # Cache hits never reach the model, so they skip the queue
+        cached = await self.llm.cached_response(prompt, model, system_prompt, options)
+        if cached is not None:
+            return cached
+        async with self.admission.slot():
+            return await self.llm.generate(
+                prompt, model, system_prompt, options, check_cache=False
+            )
+
+    async def stream(self, *args, **kwargs):
+        async with self.admission.slot():
+            async for token in self.llm.stream(*args, **kwargs):
+                yield token
+
+    def savings(self):
+        return self.llm.savings()
+
+    async def close(self):
+        await self.llm.close()
+
+
+# -------------------------
+# Middleware
+# -------------------------
+@web.middleware
+async def timing_middleware(request, handler):
+    """Per-endpoint latency histograms, keyed by method and route pattern."""
+    start = request["started_at"] = time.perf_counter()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        route = request.match_info.route.resource
+        name = f"{request.method} {route.canonical if route else 'unmatched'}"
+        request.app["metrics"].observe(name, time.perf_counter() - start)
+        counts = request.app["status_counts"].setdefault(name, {})
+        counts[str(status)] = counts.get(str(status), 0) + 1
+
+
+def error_response(status, message, **headers):
+    return web.json_response({"error": message}, status=status, headers=headers)
+
+
+def saturated_response(e):
+    return error_response(429, str(e), **{"Retry-After": str(RETRY_AFTER_SECONDS)})
+
+
+# -------------------------
+# Handlers
+# -------------------------
+def _session_or_404(request):
+    try:
+        return request.app["engine"].get_session(request.match_info["session_id"])
+    except SessionNotFound as e:
+        raise web.HTTPNotFound(
+            text=json.dumps({"error": e.args[0]}), content_type="application/json"
+        )
+
+
+async def create_session(request):
+    session = request.app["engine"].create_session()
+    return web.json_response(
+        {"session_id": session.id, "greeting": GREETING.strip()}, status=201
+    )
+
+
+async def get_session(request):
+    session = _session_or_404(request)
+    return web.json_response(
+        {
+            "session_id": session.id,
+            "state": session.state,
+            "symptoms": session.symptoms,
+            "prompt_tokens": session.prompt_tokens,
+        }
+    )
+
+
+async def delete_session(request):
+    session = _session_or_404(request)
+    request.app["engine"].end_session(session.id)
+    return web.Response(status=204)
+
+
+async def post_message(request):
+    session = _session_or_404(request)
+    try:
+        body = await request.json()
+        text = body["text"]
+    except (ValueError, KeyError, TypeError):
+        return error_response(400, 'Expected JSON body {"text": "..."}')
+
+    try:
+        ready, reply = await request.app["engine"].handle_message(session.id, text)
+    except SessionNotFound as e:
+        return error_response(404, e.args[0])
+    except Saturated as e:
+        return saturated_response(e)
+    except OllamaError as e:
+        return error_response(502, str(e))
+    return web.json_response(
+        {"ready": ready, "reply": reply, "symptoms": session.symptoms}
+    )
+
+
+async def post_answer(request):
+    session = _session_or_404(request)
+    tokens = request.app["engine"].answer(session.id)
+
+    # Wait for the first token before committing to a 200, so a full queue
+    # or an unreachable model still produces a proper error status
+    try:
+        first = await tokens.__anext__()
+    except StopAsyncIteration:
+        first = ""
+    except SessionNotReady as e:
+        return error_response(409, str(e))
+    except Saturated as e:
+        return saturated_response(e)
+    except OllamaError as e:
+        return error_response(502, str(e))
+
+    request.app["metrics"].observe(
+        "POST /sessions/{session_id}/answer (first token)",
+        time.perf_counter() - request["started_at"],
+    )
+    response = web.StreamResponse(headers={"Content-Type": "text/plain; charset=utf-8"})
+    await response.prepare(request)
+    try:
+        await response.write(first.encode("utf-8"))
+        async for token in tokens:
+            await response.write(token.encode("utf-8"))
+    except OllamaError as e:
+        await response.write(f"\n[error] {e}".encode("utf-8"))
+    finally:
+        await tokens.aclose()
+    await response.write_eof()
+    return response
+
+
+async def websocket(request):
+    """
+    Client sends {"text": "..."}; server answers {"type": "reply", ...}.
+    Once ready, the answer follows as {"type": "token"} frames and a final
+    {"type": "done"}. Errors are {"type": "error", "status": ...}.
+    """
+    session = _session_or_404(request)
+    engine = request.app["engine"]
+    ws = web.WebSocketResponse(heartbeat=30)
+    await ws.prepare(request)
+    await ws.send_json({"type": "reply", "ready": False, "reply": GREETING.strip()})
+
+    async for msg in ws:
+        if msg.type != WSMsgType.TEXT:
+            continue
+        try:
+            text = msg.json()["text"]
+        except (ValueError, KeyError, TypeError):
+            await ws.send_json({"type": "error", "status": 400, "error": "bad frame"})
+            continue
+        try:
+            ready, reply = await engine.handle_message(session.id, text)
+            await ws.send_json(
+                {
+                    "type": "reply",
+                    "ready": ready,
+                    "reply": reply,
+                    "symptoms": session.symptoms,
+                }
+            )
+            if ready:
+                stats = StreamStats()
+                async for token in engine.answer(session.id, stats=stats):
+                    await ws.send_json({"type": "token", "text": token})
+                await ws.send_json({"type": "done", "stats": stats.summary()})
+                break
+        except Saturated as e:
+            await ws.send_json(
+                {
+                    "type": "error",
+                    "status": 429,
+                    "error": str(e),
+                    "retry_after": RETRY_AFTER_SECONDS,
+                }
+            )
+        except SessionNotFound as e:
+            # Session expired or reaped meanwhile, as in _session_or_404
+            await ws.send_json({"type": "error", "status": 404, "error": e.args[0]})
+        except SessionNotReady as e:
+            # Not ready for an answer yet, as in post_answer
+            await ws.send_json({"type": "error", "status": 409, "error": str(e)})
+        except OllamaError as e:
+            await ws.send_json({"type": "error", "status": 502, "error": str(e)})
+    await ws.close()
+    return ws
+
+
+async def get_metrics(request):
+    app = request.app
+    cache = app["engine"].graph.context_cache
+    return web.json_response(
+        {
+            "latency": app["metrics"].snapshot(),
+            "status": app["status_counts"],
+            "admission": app["admission"].snapshot(),
+            "sessions": len(app["engine"].sessions),
+            "context_cache": cache.stats() if cache is not None else None,
+            "llm": app["engine"].llm.savings(),
+        }
+    )
+
+
+async def prometheus_metrics(request):
+    """
+    Request latency, status counts and LLM queue state; with TRACING
+    including "prometheus", also per-stage span histograms and totals.
+    """
+    app = request.app
+    admission = app["admission"]
+    lines = metrics.render_histograms(
+        app["metrics"],
+        "healthbot_request_seconds",
+        "route",
+        "Request latency in seconds",
+    )
+    lines += metrics.render_counters(
+        {
+            (route, status): count
+            for route, counts in app["status_counts"].items()
+            for status, count in counts.items()
+        },
+        "healthbot_requests_total",
+        ("route", "status"),
+        "Responses by route and status",
+    )
+    lines += metrics.render_counters(
+        {("admitted",): admission.admitted, ("rejected",): admission.rejected},
+        "healthbot_llm_requests_total",
+        ("outcome",),
+        "LLM requests admitted or rejected with 429",
+    )
+    for name, value, help_text in (
+        ("active", admission.active, "LLM requests running"),
+        ("waiting", admission.waiting, "LLM requests queued"),
+        ("sessions", len(app["engine"].sessions), "Open chat sessions"),
+    ):
+        lines += [
+            f"# HELP healthbot_{name} {help_text}",
+            f"# TYPE healthbot_{name} gauge",
+            f"healthbot_{name} {value}",
+        ]
+    exporter = tracing.shared_tracer().exporter(tracing.PrometheusExporter)
+    if exporter is not None:
+        lines += exporter.render()
+    return web.Response(
+        text="\n".join(lines) + "\n",
+        headers={"Content-Type": PROMETHEUS_CONTENT_TYPE},
+    )
+
+
+async def health(request):
+    """Liveness; with ?deep=1 also a round trip to the graph (unless indexed)."""
+    body = {"status": "ok"}
+    graph = request.app["engine"].graph
+    if request.query.get("deep") and graph.symptom_index is None:
+        ok, seconds, error = await graph.health_check()
+        body[graph.backend.name] = {
+            "ok": ok,
+            "seconds": round(seconds, 4),
+            "error": error,
+        }
+        if not ok:
+            body["status"] = "degraded"
+            return web.json_response(body, status=503)
+    return web.json_response(body)
+
+
+# -------------------------
+# App
+# -------------------------
+def create_app(
+    llm: AsyncOllamaClient = None,
+    max_queue: int = Config.SERVER_MAX_QUEUE,
+    queue_timeout: float = Config.SERVER_QUEUE_TIMEOUT,
+) -> web.Application:
+    app = web.Application(middlewares=[timing_middleware])
+    llm = llm or AsyncOllamaClient()
+    admission = AdmissionController(llm.max_concurrency, max_queue, queue_timeout)
+    app["admission"] = admission
+    app["engine"] = ChatEngine(llm=AdmittedLLM(llm, admission))
+    app["metrics"] = HistogramRegistry()
+    app["status_counts"] = {}
+
+    app.router.add_post("/sessions", create_session)
+    app.router.add_get("/sessions/{session_id}", get_session)
+    app.router.add_delete("/sessions/{session_id}", delete_session)
+    app.router.add_post("/sessions/{session_id}/messages", post_message)
+    app.router.add_post("/sessions/{session_id}/answer", post_answer)
+    app.router.add_get("/sessions/{session_id}/ws", websocket)
+    app.router.add_get("/metrics", get_metrics)
+    app.router.add_get("/metrics/prometheus", prometheus_metrics)
+    app.router.add_get("/health", health)
+
+    async def start_reaper(app):
+        app["reaper"] = asyncio.create_task(app["engine"].reap_idle(REAP_INTERVAL))
+
+    async def shutdown(app):
+        app["reaper"].cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await app["reaper"]
+        await app["engine"].close()
+
+    app.on_startup.append(start_reaper)
+    app.on_cleanup.append(shutdown)
+    return app
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Healthcare chatbot server")
+    parser.add_argument("--host", default=Config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=Config.SERVER_PORT)
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=Config.SERVER_MAX_QUEUE,
+        help="LLM requests allowed to wait before new ones get HTTP 429",
+    )
+    parser.add_argument(
+        "--queue-timeout",
+        type=float,
+        default=Config.SERVER_QUEUE_TIMEOUT,
+        help="Seconds a request may wait for the LLM before HTTP 429",
+    )
+    parser.add_argument(
+        "--stub-backends",
+        action="store_true",
+        help="Run against an in-process stub Ollama and the processed_data "
+        "symptom index instead of Ollama and Neo4j",
+    )
+    parser.add_argument("--stub-port", type=int, default=11435)
+    parser.add_argument(
+        "--token-delay",
+        type=float,
+        default=0.02,
+        help="Seconds per token of the stub Ollama",
+    )
+    return parser.parse_args()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+
+    llm = None
+    if args.stub_backends:
+        import stub_ollama
+
+        stub_ollama.serve(port=args.stub_port, token_delay=args.token_delay)
+        llm = AsyncOllamaClient(base_url=f"http://127.0.0.1:{args.stub_port}")
+        # The index answers every graph lookup, so Neo4j is never contacted
+        Config.SYMPTOM_INDEX = "processed"
+        Config.NEO4J_URI = Config.NEO4J_URI or "bolt://localhost:7687"
+        print(f"🧪 Stub Ollama on port {args.stub_port}, graph from processed_data/")
+
+    app = create_app(
+        llm=llm, max_queue=args.max_queue, queue_timeout=args.queue_timeout
+    )
+    print(f"🚀 Serving on http://{args.host}:{args.port}")
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+"""
+Embedded graph backend: the knowledge graph in a SQLite file, built from
+processed_data/, so lookups need no Neo4j server.
+
+    python app/sqlite_graph.py                     # build Config.GRAPH_SQLITE_PATH
+    GRAPH_BACKEND=sqlite python app/llm-agent.py   # chat without Neo4j
+
+Nodes live in one table per label with an integer primary key; each
+relationship type is an adjacency table of (disease, target, weight) with
+covering indexes in both directions, so a lookup touches only index pages
+for the queried symptoms and the details of the diseases it returns.
+Records are the same as those of GraphConnector's Cypher queries.
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import symptom_index
+from config import Config
+from symptom_index import EDGE_TABLES, NODE_TABLES
+
+logger = logging.getLogger(__name__)
+
+# Disease ids per IN (...) list, well under SQLite's bound-parameter limit
+CHUNK_SIZE = 500
+
+# Same scoring as RANK_QUERY: SUM(r.weight * specificity), nulls ignored
+SPECIFICITY_SQL = (
+    "CASE s.commonness "
+    + " ".join(
+        f"WHEN '{name}' THEN {value}"
+        for name, value in symptom_index.COMMONNESS_SPECIFICITY.items()
+    )
+    + " ELSE 1.0 END"
+)
+
+
+def _marks(values):
+    return ", ".join("?" * len(values))
+
+
+def _chunks(values, size=CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+# =======================
+# Build
+# =======================
+
+
+def create_schema(conn):
+    for name, (id_column, columns) in NODE_TABLES.items():
+        extra = ", name_lower TEXT" if name == "symptoms" else ""
+        conn.execute(
+            f"CREATE TABLE {name} (pk INTEGER PRIMARY KEY, "
+            f"{id_column} TEXT NOT NULL UNIQUE, "
+            + ", ".join(f"{col} TEXT" for col in columns)
+            + f"{extra})"
+        )
+    for name in EDGE_TABLES:
+        conn.execute(
+            f"CREATE TABLE {name} "
+            "(disease INTEGER NOT NULL, target INTEGER NOT NULL, weight REAL)"
+        )
+    conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+
+
+def create_indexes(conn):
+    """Built after the bulk insert, which is much faster than maintaining them."""
+    # Symptom lookups by exact name (match all) and lower-cased name (rank)
+    conn.execute("CREATE INDEX symptoms_by_name ON symptoms (name, pk)")
+    conn.execute(
+        "CREATE INDEX symptoms_by_name_lower "
+        "ON symptoms (name_lower, pk, commonness, name)"
+    )
+    # symptom -> diseases without touching the table, for both lookups
+    conn.execute(
+        "CREATE INDEX disease_has_symptom_by_target "
+        "ON disease_has_symptom (target, disease, weight)"
+    )
+    # disease -> details; the implicit rowid keeps the source order
+    for name in EDGE_TABLES:
+        conn.execute(f"CREATE INDEX {name}_by_disease ON {name} (disease, target)")
+
+
+def build(path, source):
+    """
+    Write the graph from `source` (see symptom_index) to a new SQLite file
+    and move it over `path`, so readers never see a half-built file.
+    Returns the row counts per table.
+    """
+    version = source.version()
+    nodes, edges = source.load()
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    counts = {}
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        create_schema(conn)
+        pks = {}
+        for name, (id_column, columns) in NODE_TABLES.items():
+            pks[name] = {row[id_column]: i for i, row in enumerate(nodes[name], 1)}
+            values = [
+                [i, row[id_column]] + [row.get(col) for col in columns]
+                for i, row in enumerate(nodes[name], 1)
+            ]
+            width = 2 + len(columns)
+            if name == "symptoms":
+                width += 1
+                for value in values:
+                    value.append((value[2] or "").lower())
+            conn.executemany(
+                f"INSERT INTO {name} VALUES ({', '.join('?' * width)})", values
+            )
+            counts[name] = len(values)
+        for name, (_, target_table) in EDGE_TABLES.items():
+            diseases, targets = pks["diseases"], pks[target_table]
+            # Relationships to unknown nodes are dropped, as the importer does
+            values = [
+                (diseases[d], targets[t], None if w is None else float(w))
+                for d, t, w in edges[name]
+                if d in diseases and t in targets
+            ]
+            conn.executemany(f"INSERT INTO {name} VALUES (?, ?, ?)", values)
+            counts[name] = len(values)
+        create_indexes(conn)
+        conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [("version", version), ("built_at", str(time.time()))],
+        )
+        conn.commit()
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return counts
+
+
+# =======================
+# Backend
+# =======================
+
+
+class SQLiteGraph:
+    """
+    GraphConnector backend on a SQLite file. The file is (re)built from
+    `source` when it is missing or its data version differs from the
+    source's; the version is re-checked at most every `refresh_interval`
+    seconds. Without a source the file is used as it is.
+    """
+
+    name = "sqlite"
+
+    def __init__(
+        self,
+        path,
+        source=None,
+        refresh_interval=symptom_index.DEFAULT_REFRESH_INTERVAL,
+    ):
+        self.path = path
+        self.source = source
+        self.refresh_interval = refresh_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        # Bumped on every rebuild so threads reopen the new file
+        self._generation = 0
+        self._version = None
+        self.refresh()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.generation != self._generation:
+            if conn is not None:
+                conn.close()
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            self._local.conn = conn
+            self._local.generation = self._generation
+        return conn
+
+    def _stored_version(self):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            row = (
+                self._connection()
+                .execute("SELECT value FROM meta WHERE key = 'version'")
+                .fetchone()
+            )
+        except sqlite3.Error:
+            # Not one of our files (or an older layout): rebuild it
+            return None
+        return row[0] if row else None
+
+    def refresh(self, force=False):
+        """Rebuild if the source version changed (or always, with force)."""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            stored = self._stored_version()
+            if self.source is None:
+                if stored is None:
+                    raise FileNotFoundError(f"No graph database at {self.path}")
+                self._version = stored
+                return False
+            version = self.source.version()
+            if not force and version == stored:
+                self._version = stored
+                return False
+            start = time.perf_counter()
+            counts = build(self.path, self.source)
+            self._generation += 1
+            self._version = version
+            logger.info(
+                "SQLite graph built at %s: %d diseases, %d symptoms in %.3fs",
+                self.path,
+                counts["diseases"],
+                counts["symptoms"],
+                time.perf_counter() - start,
+            )
+            return True
+
+    def _maybe_refresh(self):
+        if time.monotonic() - self._checked_at < self.refresh_interval:
+            return
+        try:
+            self.refresh()
+        except Exception:
+            # Keep serving the current file if the source is unavailable
+            logger.exception("SQLite graph refresh failed")
+
+    def current_version(self):
+        """Data version the lookups are served from (for the context cache)."""
+        self._maybe_refresh()
+        return self._version
+
+    def health_check(self):
+        """Returns (ok, seconds, error) after a query on the file."""
+        start = time.perf_counter()
+        try:
+            self._connection().execute("SELECT pk FROM diseases LIMIT 1").fetchall()
+        except Exception as e:
+            return False, time.perf_counter() - start, str(e)
+        return True, time.perf_counter() - start, None
+
+    def _records(self, conn, pks):
+        """Disease records with their details, in the order of `pks`."""
+        records = {}
+        for chunk in _chunks(pks):
+            for pk, disease_id, name, description, prevalence in conn.execute(
+                "SELECT pk, disease_id, name, description, prevalence "
+                f"FROM diseases WHERE pk IN ({_marks(chunk)})",
+                chunk,
+            ):
+                records[pk] = {
+                    "disease_id": disease_id,
+                    "disease_name": name,
+                    "description": description,
+                    "prevalence": prevalence,
+                    "symptoms": [],
+                    "cures": [],
+                    "medicines": [],
+                    "precautions": [],
+                }
+            for edge_table, (_, target_table) in EDGE_TABLES.items():
+                columns = NODE_TABLES[target_table][1]
+                query = (
+                    f"SELECT e.disease, {', '.join('t.' + c for c in columns)} "
+                    f"FROM {edge_table} e JOIN {target_table} t ON t.pk = e.target "
+                    f"WHERE e.disease IN ({_marks(chunk)}) "
+                    "ORDER BY e.disease, e.rowid"
+                )
+                for row in conn.execute(query, chunk):
+                    records[row[0]][target_table].append(dict(zip(columns, row[1:])))
+        return [records[pk] for pk in pks]
+
+    def _match_all(self, conn, symptoms):
+        """[(pk, disease_id)] of the diseases with all the symptoms."""
+        names = sorted(set(symptoms))
+        if not names:
+            return []
+        return conn.execute(
+            "SELECT e.disease, d.disease_id FROM symptoms s "
+            "JOIN disease_has_symptom e ON e.target = s.pk "
+            "JOIN diseases d ON d.pk = e.disease "
+            f"WHERE s.name IN ({_marks(names)}) "
+            "GROUP BY e.disease HAVING COUNT(DISTINCT s.name) = ? "
+            "ORDER BY e.disease",
+            names + [len(names)],
+        ).fetchall()
+
+    def _rank(self, conn, symptoms, top_k, min_matched):
+        """[(pk, hit)], best first; hits as RANK_IDS_QUERY returns them."""
+        names = sorted({s.lower() for s in symptoms})
+        if not names or top_k <= 0:
+            return []
+        best = conn.execute(
+            "SELECT e.disease, d.disease_id, "
+            f"TOTAL(e.weight * {SPECIFICITY_SQL}) AS score "
+            "FROM symptoms s JOIN disease_has_symptom e ON e.target = s.pk "
+            "JOIN diseases d ON d.pk = e.disease "
+            f"WHERE s.name_lower IN ({_marks(names)}) "
+            "GROUP BY e.disease HAVING COUNT(*) >= ? "
+            "ORDER BY score DESC, COUNT(*) DESC, d.disease_id LIMIT ?",
+            names + [min_matched, top_k],
+        ).fetchall()
+        hits = {
+            pk: {"disease_id": disease_id, "score": score, "matched_symptoms": []}
+            for pk, disease_id, score in best
+        }
+        if hits:
+            for pk, name in conn.execute(
+                "SELECT e.disease, s.name FROM symptoms s "
+                "JOIN disease_has_symptom e ON e.target = s.pk "
+                f"WHERE s.name_lower IN ({_marks(names)}) "
+                f"AND e.disease IN ({_marks(hits)})",
+                names + list(hits),
+            ):
+                hits[pk]["matched_symptoms"].append(name)
+        return [(pk, hits[pk]) for pk, _, _ in best]
+
+    def get_disease_by_symptoms(self, symptoms, span=None):
+        """Same records as MATCH_ALL_QUERY."""
+        self._maybe_refresh()
+        conn = self._connection()
+        matches = self._match_all(conn, symptoms)
+        records = self._records(conn, [pk for pk, _ in matches])
+        if span is not None:
+            span.set(source=self.name, records=len(records))
+        return records
+
+    def get_disease_ids_by_symptoms(self, symptoms, span=None):
+        """Same records as MATCH_ALL_IDS_QUERY."""
+        self._maybe_refresh()
+        matches = self._match_all(self._connection(), symptoms)
+        if span is not None:
+            span.set(source=self.name, records=len(matches))
+        return [{"disease_id": disease_id} for _, disease_id in matches]
+
+    def rank_diseases_by_symptoms(self, symptoms, top_k, min_matched=1, span=None):
+        """Same records as RANK_QUERY, best first."""
+        self._maybe_refresh()
+        conn = self._connection()
+        ranked = self._rank(conn, symptoms, top_k, min_matched)
+        records = [
+            dict(record, score=hit["score"], matched_symptoms=hit["matched_symptoms"])
+            for record, (_, hit) in zip(
+                self._records(conn, [pk for pk, _ in ranked]), ranked
+            )
+        ]
+        if span is not None:
+            span.set(source=self.name, records=len(records))
+        return records
+
+    def rank_disease_ids_by_symptoms(self, symptoms, top_k, min_matched=1, span=None):
+        """Same records as RANK_IDS_QUERY, best first."""
+        self._maybe_refresh()
+        ranked = self._rank(self._connection(), symptoms, top_k, min_matched)
+        if span is not None:
+            span.set(source=self.name, records=len(ranked))
+        return [hit for _, hit in ranked]
+
+
+_shared_graph = None
+_shared_lock = threading.Lock()
+
+
+def shared_sqlite_graph():
+    """Process-wide SQLiteGraph at Config.GRAPH_SQLITE_PATH."""
+    global _shared_graph
+    with _shared_lock:
+        if _shared_graph is None:
+            source = None
+            if os.path.isdir(Config.PROCESSED_DATA_DIR):
+                source = symptom_index.ProcessedDataSource(Config.PROCESSED_DATA_DIR)
+            _shared_graph = SQLiteGraph(Config.GRAPH_SQLITE_PATH, source)
+        return _shared_graph
+
+
+# =======================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build the embedded SQLite graph from processed_data/"
+    )
+    parser.add_argument("--processed-dir", default=Config.PROCESSED_DATA_DIR)
+    parser.add_argument("--path", default=Config.GRAPH_SQLITE_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = build(args.path, symptom_index.ProcessedDataSource(args.processed_dir))
+    print(
+        f"✅ SQLite graph written to {args.path} "
+        f"({time.perf_counter() - start:.2f}s): "
+        + ", ".join(f"{name}={count}" for name, count in counts.items())
+    )
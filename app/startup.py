@@ -0,0 +1,131 @@
+"""
+Cold start of the interactive chatbot.
+
+A fresh process used to import neo4j and requests before the first prompt,
+and only connected to Neo4j (and loaded the Ollama model) once the user had
+finished listing symptoms. Prewarm does that work on background threads
+while the user is still typing:
+
+- imports graph_connector and ollama_client (neo4j, requests),
+- loads the symptom matcher and instructions.txt,
+- creates the GraphConnector (symptom index, context cache and fragments
+  when enabled) and opens a pooled connection with a health check,
+- loads the Ollama model (with OLLAMA_REUSE_CONTEXT, by evaluating the
+  system prompts once).
+
+Every step is best effort: a failure is logged and the foreground code
+does the same work (and reports the real error) when it gets there.
+StartupTimings keeps the duration of each step for the startup report.
+"""
+
+import contextlib
+import logging
+import threading
+import time
+
+import prompts
+import tracing
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimings:
+    """Seconds per startup step, measured from the moment it is created."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.steps = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.steps[name] = seconds
+
+    def mark(self, name):
+        """Record the time elapsed since startup under `name`."""
+        self.record(name, time.perf_counter() - self.started)
+
+    @contextlib.contextmanager
+    def step(self, name):
+        """Time the block; an exception is logged and recorded, not raised."""
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            logger.warning("Startup step %s failed: %s", name, error)
+        duration = time.perf_counter() - start
+        with self._lock:
+            self.steps[name] = duration
+            if error:
+                self.errors[name] = error
+        tracing.record("startup", duration, error, step=name)
+
+    def summary(self) -> str:
+        with self._lock:
+            parts = [
+                f"{name} {seconds * 1000:.0f}ms"
+                + (" (failed)" if name in self.errors else "")
+                for name, seconds in self.steps.items()
+            ]
+        return ", ".join(parts) or "n/a"
+
+
+class Prewarm:
+    """Background warm-up of one chatbot process (see the module docstring)."""
+
+    def __init__(self, timings=None):
+        self.timings = timings or StartupTimings()
+        self._graph = None
+        self._threads = [
+            self._start("graph", self._warm_graph),
+            self._start("ollama", self._warm_ollama),
+            self._start("matcher", self._warm_matcher),
+        ]
+
+    def _start(self, name, target):
+        # Daemon threads: quitting mid-conversation never waits for a warm-up
+        thread = threading.Thread(target=target, name=f"prewarm-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    def _warm_graph(self):
+        graph_connector = None
+        with self.timings.step("import.graph"):
+            import graph_connector
+        if graph_connector is None:
+            return
+        with self.timings.step("graph"):
+            self._graph = graph_connector.GraphConnector()
+            ok, _, error = self._graph.health_check()
+            if not ok:
+                raise ConnectionError(error)
+
+    def _warm_ollama(self):
+        default_client = None
+        with self.timings.step("import.ollama"):
+            from ollama_client import default_client
+        if default_client is None:
+            return
+        with self.timings.step("instructions"):
+            instructions = prompts.load_instructions()
+        with self.timings.step("ollama"):
+            default_client().warm(instructions, prompts.EXTRACTOR_SYSTEM_PROMPT)
+
+    def _warm_matcher(self):
+        with self.timings.step("matcher"):
+            from symptom_matcher import default_matcher
+
+            default_matcher()
+
+    def graph_connector(self):
+        """
+        The warmed-up GraphConnector, waiting for the warm-up if it is still
+        running; None if it could not be created.
+        """
+        start = time.perf_counter()
+        self._threads[0].join()
+        self.timings.record("wait.graph", time.perf_counter() - start)
+        return self._graph
@@ -0,0 +1,169 @@
+"""
+Minimal stand-in for the Ollama HTTP API, for local runs, load tests and
+exercising OllamaClient without a GPU:
+
+    python app/stub_ollama.py --port 11435 --token-delay 0.02
+    OLLAMA_URL=http://localhost:11435 python app/llm-agent.py
+
+Implements POST /api/generate (streaming NDJSON or single JSON) and
+GET /api/tags. Symptom-extraction prompts get the symptom words found in the
+prompt; everything else gets a canned answer.
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_ANSWER = (
+    "Based on your symptoms, a few conditions are possible. Rest, drink "
+    "fluids and see a doctor if things get worse. ⚠️ I am not a doctor. This "
+    "information is for educational purposes only."
+)
+KNOWN_SYMPTOMS = ["fever", "cough", "headache", "sneezing", "fatigue", "nausea"]
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Set by serve()
+    token_delay = 0.0
+    fail_first = 0
+    _failures = 0
+    _contexts = {}
+    _lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, obj):
+        data = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, obj):
+        data = (json.dumps(obj) + "\n").encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": "stub:latest"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+
+        cls = type(self)
+        with cls._lock:
+            failing = cls._failures < cls.fail_first
+            cls._failures += failing
+        if failing:
+            self._send_json(503, {"error": "stub: simulated overload"})
+            return
+
+        prompt = body.get("prompt", "")
+        system = body.get("system", "")
+        if body.get("context"):
+            # Continuing from a returned context: its prompt is already evaluated
+            with cls._lock:
+                system = cls._contexts.get(body["context"][0], "")
+        if "symptom extractor" in system.lower():
+            found = [s for s in KNOWN_SYMPTOMS if s in prompt.lower()]
+            answer = ", ".join(found)
+        else:
+            answer = CANNED_ANSWER
+        tokens = [word + " " for word in answer.split()]
+        prompt_tokens = len((body.get("system", "") + " " + prompt).split())
+        # Fake KV-cache context, as real Ollama returns for reuse; the first
+        # token identifies the system prompt it started from
+        with cls._lock:
+            context_id = len(cls._contexts) + 1
+            cls._contexts[context_id] = system
+        context = [context_id] + list(range(prompt_tokens + len(tokens)))
+        started = time.perf_counter_ns()
+
+        if not body.get("stream", True):
+            time.sleep(cls.token_delay * len(tokens))
+            self._send_json(
+                200,
+                {
+                    "model": body.get("model"),
+                    "response": "".join(tokens).strip(),
+                    "done": True,
+                    "context": context,
+                    "prompt_eval_count": prompt_tokens,
+                    "eval_count": len(tokens),
+                    "eval_duration": time.perf_counter_ns() - started,
+                },
+            )
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for token in tokens:
+                time.sleep(cls.token_delay)
+                self._write_chunk({"response": token, "done": False})
+            self._write_chunk(
+                {
+                    "response": "",
+                    "done": True,
+                    "context": context,
+                    "prompt_eval_count": prompt_tokens,
+                    "eval_count": len(tokens),
+                    "eval_duration": time.perf_counter_ns() - started,
+                }
+            )
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cancelled mid-stream
+            pass
+
+
+def serve(host="127.0.0.1", port=11435, token_delay=0.0, fail_first=0):
+    """Start the stub server in a daemon thread; returns the server."""
+    handler = type(
+        "Handler",
+        (StubOllamaHandler,),
+        {
+            "token_delay": token_delay,
+            "fail_first": fail_first,
+            "_failures": 0,
+            "_contexts": {},
+        },
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Ollama API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument(
+        "--token-delay", type=float, default=0.02, help="Seconds per token"
+    )
+    parser.add_argument(
+        "--fail-first",
+        type=int,
+        default=0,
+        help="Answer the first N generate requests with 503 (to test retries)",
+    )
+    args = parser.parse_args()
+    server = serve(args.host, args.port, args.token_delay, args.fail_first)
+    print(f"🧪 Stub Ollama listening on http://{args.host}:{args.port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
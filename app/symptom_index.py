@@ -0,0 +1,409 @@
+import csv
+import hashlib
+import heapq
+import logging
+import os
+import re
+import threading
+import time
+
+from columnar import ColumnarTable, table_path
+from config import Config
+from graph_driver import lookup_access_mode, shared_driver
+
+logger = logging.getLogger(__name__)
+
+# Seconds between data-version checks while serving lookups
+DEFAULT_REFRESH_INTERVAL = 30.0
+
+# Rarer symptoms say more about the disease, so they count for more in ranking
+COMMONNESS_SPECIFICITY = {
+    "very_common": 0.5,
+    "common": 0.75,
+    "uncommon": 1.0,
+    "rare": 1.25,
+}
+DEFAULT_TOP_K = 3
+
+NODE_TABLES = {
+    "symptoms": ("symptom_id", ["name", "commonness"]),
+    "diseases": ("disease_id", ["name", "description", "prevalence"]),
+    "cures": ("cure_id", ["name", "description", "type"]),
+    "medicines": ("medicine_id", ["name", "drug_class", "dosage_form"]),
+    "precautions": ("precaution_id", ["name", "description"]),
+}
+EDGE_TABLES = {
+    "disease_has_symptom": ("symptom_id", "symptoms"),
+    "disease_has_cure": ("cure_id", "cures"),
+    "disease_has_medicine": ("medicine_id", "medicines"),
+    "disease_has_precaution": ("precaution_id", "precautions"),
+}
+
+
+# =======================
+# Data Sources
+# =======================
+
+
+class ProcessedDataSource:
+    """
+    Loads the graph from processed_data/, using the columnar tables
+    (etl_pipeline.py --columnar) when present and the CSVs otherwise.
+    """
+
+    def __init__(self, processed_dir=Config.PROCESSED_DATA_DIR):
+        self.processed_dir = processed_dir
+        self.columnar_dir = os.path.join(processed_dir, "columnar")
+
+    def _use_columnar(self):
+        names = list(NODE_TABLES) + list(EDGE_TABLES)
+        return all(
+            os.path.exists(table_path(self.columnar_dir, name)) for name in names
+        )
+
+    def version(self):
+        """Cheap signature of the source files (mtime + size)."""
+        if self._use_columnar():
+            folder, ext = self.columnar_dir, ".col"
+        else:
+            folder, ext = self.processed_dir, ".csv"
+        signature = []
+        for name in sorted(list(NODE_TABLES) + list(EDGE_TABLES)):
+            stat = os.stat(os.path.join(folder, name + ext))
+            signature.append(f"{name}:{stat.st_mtime_ns}:{stat.st_size}")
+        return hashlib.sha1("|".join(signature).encode("utf-8")).hexdigest()
+
+    def load(self):
+        """Return ({table: [row dict]}, {edge table: [(disease_id, id, weight)]})."""
+        if self._use_columnar():
+            return self._load_columnar()
+        return self._load_csv()
+
+    def _load_csv(self):
+        nodes = {}
+        for name in NODE_TABLES:
+            path = os.path.join(self.processed_dir, f"{name}.csv")
+            with open(path, encoding="utf-8") as f:
+                nodes[name] = list(csv.DictReader(f))
+        edges = {}
+        for name, (target_column, _) in EDGE_TABLES.items():
+            path = os.path.join(self.processed_dir, f"{name}.csv")
+            with open(path, encoding="utf-8") as f:
+                edges[name] = [
+                    (
+                        row["disease_id"],
+                        row[target_column],
+                        float(row["weight"]) if "weight" in row else None,
+                    )
+                    for row in csv.DictReader(f)
+                ]
+        return nodes, edges
+
+    def _load_columnar(self):
+        tables = {
+            name: ColumnarTable(table_path(self.columnar_dir, name))
+            for name in list(NODE_TABLES) + list(EDGE_TABLES)
+        }
+        nodes = {}
+        for name in NODE_TABLES:
+            table = tables[name]
+            columns = {col: table.read(col) for col in table.column_names}
+            nodes[name] = [
+                {col: columns[col][i] for col in columns} for i in range(table.rows)
+            ]
+        edges = {}
+        for name, (target_column, target_table) in EDGE_TABLES.items():
+            table = tables[name]
+            disease_ids = tables["diseases"].column("disease_id")
+            target_ids = tables[target_table].column(target_column)
+            weights = (
+                table.read("weight")
+                if "weight" in table.column_names
+                else [None] * table.rows
+            )
+            edges[name] = [
+                (disease_ids[d], target_ids[t], w)
+                for d, t, w in zip(
+                    table.read("disease_id"), table.read(target_column), weights
+                )
+            ]
+        for table in tables.values():
+            table.close()
+        return nodes, edges
+
+
+class Neo4jSource:
+    """Loads the whole graph from Neo4j with one query per label/relationship."""
+
+    NODE_QUERIES = {
+        "symptoms": "MATCH (n:Symptom) RETURN n.id AS symptom_id, "
+        "n.name AS name, n.commonness AS commonness",
+        "diseases": "MATCH (n:Disease) RETURN n.id AS disease_id, n.name AS name, "
+        "n.description AS description, n.prevalence AS prevalence",
+        "cures": "MATCH (n:Cure) RETURN n.id AS cure_id, n.name AS name, "
+        "n.description AS description, n.type AS type",
+        "medicines": "MATCH (n:Medicine) RETURN n.id AS medicine_id, n.name AS name, "
+        "n.drug_class AS drug_class, n.dosage_form AS dosage_form",
+        "precautions": "MATCH (n:Precaution) RETURN n.id AS precaution_id, "
+        "n.name AS name, n.description AS description",
+    }
+    EDGE_QUERIES = {
+        "disease_has_symptom": "MATCH (d:Disease)-[r:HAS_SYMPTOM]->(t:Symptom) "
+        "RETURN d.id AS d, t.id AS t, r.weight AS w",
+        "disease_has_cure": "MATCH (d:Disease)-[:CURED_BY]->(t:Cure) "
+        "RETURN d.id AS d, t.id AS t, null AS w",
+        "disease_has_medicine": "MATCH (d:Disease)-[:TREATED_WITH]->(t:Medicine) "
+        "RETURN d.id AS d, t.id AS t, null AS w",
+        "disease_has_precaution": "MATCH (d:Disease)-[:REQUIRES_PRECAUTION]->"
+        "(t:Precaution) RETURN d.id AS d, t.id AS t, null AS w",
+    }
+
+    def __init__(self, driver, database=None):
+        self.driver = driver
+        self.database = database
+
+    def version(self):
+        """DataVersion node written by the importer, else node/edge counts."""
+        with self.driver.session(
+            database=self.database, default_access_mode=lookup_access_mode()
+        ) as session:
+            record = session.run(
+                "OPTIONAL MATCH (v:DataVersion {id: 'current'}) RETURN v.version AS v"
+            ).single()
+            if record and record["v"]:
+                return record["v"]
+            nodes = session.run("MATCH (n) RETURN count(n) AS c").single()["c"]
+            rels = session.run("MATCH ()-[r]->() RETURN count(r) AS c").single()["c"]
+            return f"counts:{nodes}:{rels}"
+
+    def load(self):
+        with self.driver.session(
+            database=self.database, default_access_mode=lookup_access_mode()
+        ) as session:
+            nodes = {
+                name: session.run(query).data()
+                for name, query in self.NODE_QUERIES.items()
+            }
+            edges = {
+                name: [(r["d"], r["t"], r["w"]) for r in session.run(query)]
+                for name, query in self.EDGE_QUERIES.items()
+            }
+        return nodes, edges
+
+
+# =======================
+# Index
+# =======================
+
+# Bit offsets set in each byte value, and the non-zero bytes of a bitset
+_BYTE_BITS = [tuple(b for b in range(8) if value >> b & 1) for value in range(256)]
+_NONZERO_BYTE = re.compile(rb"[^\x00]")
+
+
+def _bitset(positions, size):
+    """Integer with the given bits set, built in O(size / 8 + len(positions))."""
+    buf = bytearray((size + 7) // 8)
+    for i in positions:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _bit_positions(bits):
+    """Set bit positions in ascending order, without O(N) work per bit."""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    positions = []
+    for m in _NONZERO_BYTE.finditer(data):
+        base = m.start() * 8
+        positions.extend(base + b for b in _BYTE_BITS[data[m.start()]])
+    return positions
+
+
+class _IndexState:
+    """Immutable snapshot: per-symptom disease bitsets plus rendered records."""
+
+    def __init__(self, version, nodes, edges):
+        self.version = version
+        by_id = {
+            name: {row[id_column]: row for row in nodes[name]}
+            for name, (id_column, _) in NODE_TABLES.items()
+        }
+        diseases = nodes["diseases"]
+        position = {row["disease_id"]: i for i, row in enumerate(diseases)}
+
+        self.records = [
+            {
+                "disease_id": row["disease_id"],
+                "disease_name": row["name"],
+                "description": row["description"],
+                "prevalence": row["prevalence"],
+                "symptoms": [],
+                "cures": [],
+                "medicines": [],
+                "precautions": [],
+            }
+            for row in diseases
+        ]
+        # Bit i of symptom_bits[name] is set when disease i has that symptom;
+        # symptom_positions[name] lists the same i in ascending order
+        self.symptom_positions = {}
+        # lower-cased name -> [(disease position, weight * specificity, name)]
+        self.postings = {}
+
+        for edge_table, (_, target_table) in EDGE_TABLES.items():
+            columns = NODE_TABLES[target_table][1]
+            for disease_id, target_id, weight in edges[edge_table]:
+                i = position.get(disease_id)
+                target = by_id[target_table].get(target_id)
+                if i is None or target is None:
+                    continue
+                self.records[i][target_table].append(
+                    {col: target[col] for col in columns}
+                )
+                if edge_table == "disease_has_symptom":
+                    name = target["name"]
+                    self.symptom_positions.setdefault(name, []).append(i)
+                    specificity = COMMONNESS_SPECIFICITY.get(target["commonness"], 1.0)
+                    self.postings.setdefault(name.lower(), []).append(
+                        (i, float(weight or 0.0) * specificity, name)
+                    )
+
+        # Each bitset is built once from its posting list (setting bits one
+        # at a time would copy an N-bit integer per edge)
+        self.symptom_bits = {}
+        for name, positions in self.symptom_positions.items():
+            positions = sorted(set(positions))
+            self.symptom_positions[name] = positions
+            self.symptom_bits[name] = _bitset(positions, len(self.records))
+
+    def match_all(self, symptoms):
+        names = set(symptoms)
+        if not names:
+            return []
+        if len(names) == 1:
+            # One symptom: its posting list is the answer
+            positions = self.symptom_positions.get(names.pop(), [])
+        else:
+            bits = -1
+            for name in names:
+                bits &= self.symptom_bits.get(name, 0)
+                if not bits:
+                    return []
+            positions = _bit_positions(bits)
+        return [self.records[i] for i in positions]
+
+    def rank(self, symptoms, top_k, min_matched):
+        # Only the posting lists of the queried symptoms are touched
+        scores = {}
+        matched = {}
+        for name in {s.lower() for s in symptoms}:
+            for i, score, display_name in self.postings.get(name, ()):
+                scores[i] = scores.get(i, 0.0) + score
+                matched.setdefault(i, []).append(display_name)
+        candidates = (i for i in scores if len(matched[i]) >= min_matched)
+        # Same order as RANK: score, matched count, then disease_id for ties
+        best = heapq.nsmallest(
+            top_k,
+            candidates,
+            key=lambda i: (
+                -scores[i],
+                -len(matched[i]),
+                self.records[i]["disease_id"],
+            ),
+        )
+        return [
+            dict(self.records[i], score=scores[i], matched_symptoms=matched[i])
+            for i in best
+        ]
+
+
+class SymptomIndex:
+    """
+    In-memory replacement for GraphConnector.get_disease_by_symptoms.
+
+    The graph is loaded once from a source (processed_data/ or Neo4j) and
+    "diseases with ALL these symptoms" becomes an AND over integer bitsets.
+    The source version is re-checked at most every `refresh_interval`
+    seconds and the index is rebuilt when it changed.
+    """
+
+    def __init__(self, source, refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        self.source = source
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._state = None
+        self.refresh(force=True)
+
+    @property
+    def version(self):
+        return self._state.version
+
+    def refresh(self, force=False):
+        """Rebuild if the source version changed (or always, with force)."""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            version = self.source.version()
+            if not force and self._state and version == self._state.version:
+                return False
+            start = time.perf_counter()
+            nodes, edges = self.source.load()
+            self._state = _IndexState(version, nodes, edges)
+            logger.info(
+                "Symptom index loaded: %d diseases, %d symptoms in %.3fs",
+                len(self._state.records),
+                len(self._state.symptom_bits),
+                time.perf_counter() - start,
+            )
+            return True
+
+    def _maybe_refresh(self):
+        if time.monotonic() - self._checked_at < self.refresh_interval:
+            return
+        try:
+            self.refresh()
+        except Exception:
+            # Keep serving the last good snapshot if the source is unavailable
+            logger.exception("Symptom index refresh failed")
+
+    def current_version(self):
+        """Data version of the snapshot lookups are served from."""
+        self._maybe_refresh()
+        return self._state.version
+
+    def all_diseases(self):
+        """Every disease record, in source order."""
+        self._maybe_refresh()
+        return [dict(record) for record in self._state.records]
+
+    def get_disease_by_symptoms(self, symptoms):
+        """Same records as GraphConnector.get_disease_by_symptoms."""
+        self._maybe_refresh()
+        return [dict(record) for record in self._state.match_all(symptoms)]
+
+    def rank_diseases_by_symptoms(self, symptoms, top_k=DEFAULT_TOP_K, min_matched=1):
+        """Same records as GraphConnector.rank_diseases_by_symptoms."""
+        self._maybe_refresh()
+        return self._state.rank(symptoms, top_k, min_matched)
+
+
+_shared_index = None
+_shared_lock = threading.Lock()
+
+
+def shared_index():
+    """
+    Process-wide index selected by Config.SYMPTOM_INDEX: "processed",
+    "neo4j", or anything else for none (queries go to Neo4j directly).
+    """
+    global _shared_index
+    mode = Config.SYMPTOM_INDEX
+    if mode not in ("processed", "neo4j"):
+        return None
+    with _shared_lock:
+        if _shared_index is None:
+            if mode == "processed":
+                source = ProcessedDataSource(Config.PROCESSED_DATA_DIR)
+            else:
+                source = Neo4jSource(shared_driver(), Config.NEO4J_DATABASE)
+            _shared_index = SymptomIndex(source)
+        return _shared_index
@@ -0,0 +1,237 @@
+import csv
+import json
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from config import PROJECT_ROOT, Config
+
+ALIASES_PATH = Path(__file__).resolve().parent / "symptom_aliases.json"
+RAW_SYMPTOMS_PATH = os.path.join(PROJECT_ROOT, "data", "raw_data", "symptoms_raw.json")
+
+# Fuzzy matching only for phrases at least this long, to keep short everyday
+# words ("week" vs "weak") from turning into symptoms
+MIN_FUZZY_LENGTH = 5
+NEGATIONS = {"no", "not", "dont", "didnt", "doesnt", "without", "never", "nor"}
+# Words that end the scope of a preceding negation. "or" is not one: in
+# "no fever or cough" the negation covers the whole list
+CLAUSE_BREAKS = {"and", "but", "also", "plus"}
+# A negated symptom carries its negation over "or" / "nor" to the next one
+LIST_WORDS = {"or", "nor"}
+NEGATION_WINDOW = 3
+# Fuzzy windows may not start or end with these: "not cough" is one edit
+# from "wet cough", and "but cough" would use up the clause break that
+# ends a preceding negation
+FUZZY_STOP_WORDS = NEGATIONS | CLAUSE_BREAKS | LIST_WORDS
+FUZZY_CACHE_SIZE = 100_000
+
+_CLAUSE_SPLIT = re.compile(r"[,.;:!?\n]+")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text):
+    """Lower-case word tokens; apostrophes dropped so "can't" becomes "cant"."""
+    return _NON_WORD.sub(" ", text.lower().replace("'", "").replace("’", "")).split()
+
+
+def _trigrams(phrase):
+    padded = f"  {phrase} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a, b, limit):
+    """Levenshtein distance, or limit + 1 as soon as it must exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            )
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class SymptomMatcher:
+    """
+    Maps free text to canonical graph symptom names without calling the LLM.
+
+    Every canonical name and alias is stored as a normalized token phrase.
+    Text is scanned longest-phrase-first over word n-grams. Windows with no
+    exact hit are fuzzy-matched through a character-trigram index with a
+    bounded edit distance. Negated mentions ("no fever") are skipped.
+    """
+
+    def __init__(self, names, aliases=None):
+        self.phrases = {}
+        for name in names:
+            self._add(name, name)
+        for canonical, alias_list in (aliases or {}).items():
+            if canonical in names:
+                for alias in alias_list:
+                    self._add(alias, canonical)
+        self.max_tokens = max((len(p) for p in self.phrases), default=1)
+
+        # (token count, trigram) -> phrases, so fuzzy candidates are pre-filtered
+        self._trigram_index = {}
+        for phrase in self.phrases:
+            text = " ".join(phrase)
+            if len(text) >= MIN_FUZZY_LENGTH:
+                for gram in _trigrams(text):
+                    self._trigram_index.setdefault((len(phrase), gram), []).append(
+                        phrase
+                    )
+        self._fuzzy_cache = {}
+
+    def _add(self, phrase, canonical):
+        tokens = tuple(normalize(phrase))
+        if tokens:
+            self.phrases.setdefault(tokens, canonical)
+
+    def _fuzzy(self, window):
+        if window in self._fuzzy_cache:
+            return self._fuzzy_cache[window]
+        text = " ".join(window)
+        name = None
+        if (
+            len(text) >= MIN_FUZZY_LENGTH
+            and window[0] not in FUZZY_STOP_WORDS
+            and window[-1] not in FUZZY_STOP_WORDS
+        ):
+            limit = 1 if len(text) <= 6 else 2
+            grams = _trigrams(text)
+            shared = {}
+            for gram in grams:
+                for phrase in self._trigram_index.get((len(window), gram), ()):
+                    shared[phrase] = shared.get(phrase, 0) + 1
+            # Each edit destroys at most 3 trigrams
+            needed = len(grams) - 3 * limit
+            best_distance = limit + 1
+            for phrase, count in shared.items():
+                if count < needed:
+                    continue
+                distance = _edit_distance(text, " ".join(phrase), limit)
+                if distance < best_distance:
+                    name, best_distance = self.phrases[phrase], distance
+        if len(self._fuzzy_cache) < FUZZY_CACHE_SIZE:
+            self._fuzzy_cache[window] = name
+        return name
+
+    def _lookup(self, window):
+        return self.phrases.get(window) or self._fuzzy(window)
+
+    def canonicalize(self, term):
+        """Canonical name for a single symptom term, or None."""
+        tokens = tuple(normalize(term))
+        return self._lookup(tokens) if tokens else None
+
+    def match(self, text):
+        """Canonical symptom names mentioned in text, in order of appearance."""
+        found = []
+        for clause in _CLAUSE_SPLIT.split(text):
+            tokens = normalize(clause)
+            i = 0
+            # End of the last negated mention, for "no fever or cough"
+            negated_end = None
+            while i < len(tokens):
+                for size in range(min(self.max_tokens, len(tokens) - i), 0, -1):
+                    name = self._lookup(tuple(tokens[i : i + size]))
+                    if name:
+                        negated = self._negated(tokens, i) or self._listed_after(
+                            tokens, negated_end, i
+                        )
+                        if negated:
+                            negated_end = i + size
+                        elif name not in found:
+                            found.append(name)
+                        i += size
+                        break
+                else:
+                    i += 1
+        return found
+
+    @staticmethod
+    def _negated(tokens, start):
+        for token in reversed(tokens[max(0, start - NEGATION_WINDOW) : start]):
+            if token in CLAUSE_BREAKS:
+                return False
+            if token in NEGATIONS:
+                return True
+        return False
+
+    @staticmethod
+    def _listed_after(tokens, negated_end, start):
+        """True if start follows a negated mention via "or" / "nor"."""
+        if negated_end is None or start - negated_end > NEGATION_WINDOW:
+            return False
+        gap = tokens[negated_end:start]
+        return any(t in LIST_WORDS for t in gap) and not any(
+            t in CLAUSE_BREAKS for t in gap
+        )
+
+
+def load_symptom_names(processed_dir=Config.PROCESSED_DATA_DIR):
+    """Symptom names from processed symptoms.csv, else from symptoms_raw.json."""
+    csv_path = os.path.join(processed_dir, "symptoms.csv")
+    if os.path.exists(csv_path):
+        with open(csv_path, encoding="utf-8") as f:
+            return [row["name"] for row in csv.DictReader(f)]
+    with open(RAW_SYMPTOMS_PATH, encoding="utf-8") as f:
+        return [s["name"] for s in json.load(f)]
+
+
+@lru_cache(maxsize=1)
+def default_matcher():
+    """Process-wide matcher over the graph's symptoms and the alias table."""
+    aliases = {}
+    if ALIASES_PATH.exists():
+        aliases = json.loads(ALIASES_PATH.read_text(encoding="utf-8"))
+    return SymptomMatcher(load_symptom_names(), aliases)
+
+
+# -------------------------
+# Regression checks
+# -------------------------
+# text -> symptoms the shipped aliases must produce
+REGRESSION_CASES = {
+    "I have a fever and a cough": ["Fever", "Cough"],
+    "fever or cough": ["Fever", "Cough"],
+    # Negation
+    "not cough": [],
+    "I do not cough": [],
+    "no fever but cough": ["Cough"],
+    "no fever and cough": ["Cough"],
+    "my head hurts, no nausea": ["Headache"],
+    # A negation covers an "or" list
+    "I dont have fever or cough": [],
+    "no fever or chills": [],
+    "never had a cough or headache": [],
+    "no fever nor cough": [],
+    # Typos: one or two edits are forgiven in words of MIN_FUZZY_LENGTH or
+    # more; shorter ones are not matched, so the LLM is asked instead
+    "headahce": ["Headache"],
+    "sneezng": ["Sneezing"],
+    "fevr": [],
+    "couhg": [],
+    # Aliases must not fire on everyday phrases
+    "the room temperature is fine": [],
+    "I have a temperature": ["Fever"],
+}
+
+
+if __name__ == "__main__":
+    import sys
+
+    matcher = default_matcher()
+    failures = 0
+    for text, expected in REGRESSION_CASES.items():
+        got = matcher.match(text)
+        ok = got == expected
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {text!r}: {got} (expected {expected})")
+    sys.exit(1 if failures else 0)
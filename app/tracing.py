@@ -0,0 +1,288 @@
+"""
+Span-style timers around the pipeline stages, with pluggable exporters.
+
+    with tracing.span("graph.rank", symptoms=3) as span:
+        records = ...
+        span.set(records=len(records))
+
+Spans carry the current trace id (one per chat session or batch
+conversation, see set_trace_id / trace) and the id of the enclosing span.
+Exporters come from Config.TRACING: "log" (one JSON line per span),
+"prometheus" (per-stage histograms for /metrics/prometheus), both comma
+separated, or "off". When off, span() hands back a shared no-op object, so
+instrumented code pays for one function call and an attribute check.
+"""
+
+import contextlib
+import contextvars
+import itertools
+import json
+import logging
+import threading
+import time
+import uuid
+
+from config import Config
+from metrics import HistogramRegistry, render_counters, render_histograms
+
+logger = logging.getLogger(__name__)
+
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+_parent_id = contextvars.ContextVar("parent_span_id", default=None)
+# next() on a count is atomic under the GIL
+_span_ids = itertools.count(1)
+
+
+def new_trace_id():
+    return uuid.uuid4().hex[:16]
+
+
+def current_trace_id():
+    return _trace_id.get()
+
+
+def set_trace_id(trace_id):
+    """
+    Tag later spans in this thread / asyncio task with trace_id. Each
+    request handler runs in its own task, so nothing needs resetting.
+    """
+    _trace_id.set(trace_id)
+
+
+@contextlib.contextmanager
+def trace(trace_id=None):
+    """Spans inside the block share one trace id (a new one by default)."""
+    token = _trace_id.set(trace_id or new_trace_id())
+    try:
+        yield _trace_id.get()
+    finally:
+        _trace_id.reset(token)
+
+
+class Span:
+    """One timed stage; exported when the `with` block exits."""
+
+    __slots__ = (
+        "tracer",
+        "name",
+        "attributes",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "started_at",
+        "duration",
+        "error",
+        "_start",
+        "_token",
+    )
+
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = _trace_id.get()
+        self.span_id = next(_span_ids)
+        self.parent_id = _parent_id.get()
+        self.started_at = None
+        self.duration = None
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        return self
+
+    def __enter__(self):
+        self._token = _parent_id.set(self.span_id)
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._start
+        _parent_id.reset(self._token)
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.tracer.export(self)
+        return False
+
+    def to_dict(self):
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.started_at, 6),
+            "duration_ms": round(self.duration * 1000, 3),
+        }
+        if self.error:
+            record["error"] = self.error
+        record.update(self.attributes)
+        return record
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attributes):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Creates spans and hands finished ones to every exporter."""
+
+    def __init__(self, exporters=()):
+        self.exporters = list(exporters)
+
+    @property
+    def enabled(self):
+        return bool(self.exporters)
+
+    def span(self, name, **attributes):
+        if not self.exporters:
+            return NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def record(self, name, duration, error=None, **attributes):
+        """Export a span that was timed elsewhere (e.g. a stream) and ends now."""
+        if not self.exporters:
+            return
+        span = Span(self, name, attributes)
+        span.duration = duration
+        span.started_at = time.time() - duration
+        span.error = error
+        self.export(span)
+
+    def export(self, span):
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception:
+                # Instrumentation must never break a request
+                logger.exception("Span exporter %r failed", exporter)
+
+    def exporter(self, kind):
+        """The first exporter of the given class, or None."""
+        return next((e for e in self.exporters if isinstance(e, kind)), None)
+
+
+# =======================
+# Exporters
+# =======================
+
+
+class JsonLogExporter:
+    """One JSON object per span, appended to `path` or logged at INFO."""
+
+    def __init__(self, path=None):
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8", buffering=1) if path else None
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        if self._file is None:
+            logger.info(line)
+            return
+        with self._lock:
+            self._file.write(line + "\n")
+
+
+class PrometheusExporter:
+    """
+    Aggregates spans into a latency histogram per stage, an error counter,
+    and running totals of the numeric attributes in TOTALS (tokens and
+    Ollama/Neo4j-reported durations).
+    """
+
+    TOTALS = (
+        "prompt_eval_count",
+        "eval_count",
+        "prompt_eval_seconds",
+        "eval_seconds",
+        "neo4j_available_ms",
+        "neo4j_consumed_ms",
+    )
+
+    def __init__(self, prefix="healthbot"):
+        self.prefix = prefix
+        self.histograms = HistogramRegistry()
+        self.errors = {}
+        self.totals = {}
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        self.histograms.observe(span.name, span.duration)
+        with self._lock:
+            if span.error:
+                key = (span.name, span.error)
+                self.errors[key] = self.errors.get(key, 0) + 1
+            for attribute in self.TOTALS:
+                value = span.attributes.get(attribute)
+                if value:
+                    key = (span.name, attribute)
+                    self.totals[key] = self.totals.get(key, 0) + value
+
+    def render(self):
+        with self._lock:
+            errors = dict(self.errors)
+            totals = dict(self.totals)
+        lines = render_histograms(
+            self.histograms,
+            f"{self.prefix}_stage_seconds",
+            "stage",
+            "Pipeline stage latency in seconds",
+        )
+        lines += render_counters(
+            errors,
+            f"{self.prefix}_stage_errors_total",
+            ("stage", "error"),
+            "Pipeline stages that raised",
+        )
+        lines += render_counters(
+            totals,
+            f"{self.prefix}_stage_attribute_total",
+            ("stage", "attribute"),
+            "Sum of token counts and backend-reported durations per stage",
+        )
+        return lines
+
+
+EXPORTERS = {
+    "log": lambda: JsonLogExporter(Config.TRACING_LOG_PATH or None),
+    "prometheus": PrometheusExporter,
+}
+
+_shared_tracer = None
+_shared_lock = threading.Lock()
+
+
+def shared_tracer():
+    """Process-wide tracer with the exporters named in Config.TRACING."""
+    global _shared_tracer
+    if _shared_tracer is None:
+        with _shared_lock:
+            if _shared_tracer is None:
+                names = [n.strip() for n in Config.TRACING.split(",") if n.strip()]
+                unknown = [n for n in names if n not in EXPORTERS and n != "off"]
+                if unknown:
+                    logger.warning("Unknown TRACING exporters ignored: %s", unknown)
+                _shared_tracer = Tracer(
+                    [EXPORTERS[n]() for n in names if n in EXPORTERS]
+                )
+    return _shared_tracer
+
+
+def span(name, **attributes):
+    return shared_tracer().span(name, **attributes)
+
+
+def record(name, duration, error=None, **attributes):
+    shared_tracer().record(name, duration, error, **attributes)
@@ -0,0 +1,397 @@
+"""
+Benchmarks for ETL, Neo4j import, the embedded SQLite graph, symptom lookup
+and context building on synthetic data (see synthetic_data.py).
+
+    python benchmarks/run_benchmarks.py --entities 1000 10000 --output bench.json
+    python benchmarks/run_benchmarks.py --entities 1000 10000 --baseline bench.json
+
+Results are JSON keyed "<benchmark>@<entities>", with the git commit they
+were measured on, so runs can be compared across commits. With --baseline,
+any benchmark whose median got slower by more than --threshold (and by more
+than --min-delta seconds, to ignore noise on tiny timings) is reported as a
+regression and the exit code is 1.
+
+Import and Neo4j lookups only run with --neo4j, which CLEARS the configured
+database before every import run.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from statistics import median
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+WORK_DIR = os.path.join(BENCH_DIR, ".work")
+for folder in ("app", "data/ETL", "data/graph_database"):
+    sys.path.insert(0, os.path.join(PROJECT_ROOT, folder))
+
+import etl_pipeline  # noqa: E402
+import synthetic_data  # noqa: E402
+from config import Config  # noqa: E402
+from fragment_store import FragmentStore  # noqa: E402
+from graph_connector import GraphConnector  # noqa: E402
+from metrics import percentile  # noqa: E402
+from sqlite_graph import SQLiteGraph, build  # noqa: E402
+from symptom_index import ProcessedDataSource, SymptomIndex  # noqa: E402
+
+DEFAULT_ENTITIES = [1000, 10000]
+DEFAULT_THRESHOLD = 0.15
+DEFAULT_MIN_DELTA = 0.005
+DEFAULT_QUERIES = 200
+TOP_K = 3
+
+
+# -------------------------
+# Timing
+# -------------------------
+def time_runs(fn, repeat, setup=None):
+    """Seconds for each of `repeat` calls of fn (setup is not timed)."""
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        # The pipelines print progress; keep the benchmark output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fn()
+            runs.append(time.perf_counter() - start)
+    return {"seconds": median(runs), "min": min(runs), "runs": runs}
+
+
+def time_queries(fn, queries, repeat):
+    """Run fn(query) for every query; per-query latency percentiles included."""
+    totals = []
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for query in queries:
+            query_start = time.perf_counter()
+            fn(query)
+            latencies.append(time.perf_counter() - query_start)
+        totals.append(time.perf_counter() - start)
+    return {
+        "seconds": median(totals),
+        "min": min(totals),
+        "runs": totals,
+        "ops": len(queries),
+        "p50_us": percentile(latencies, 50) * 1e6,
+        "p95_us": percentile(latencies, 95) * 1e6,
+        "p99_us": percentile(latencies, 99) * 1e6,
+    }
+
+
+# -------------------------
+# Benchmarks
+# -------------------------
+def prepare_raw(entities, seed, query_count):
+    """Synthetic raw data is generated once per (entities, seed) and reused."""
+    raw_dir = os.path.join(WORK_DIR, f"raw-{entities}-{seed}")
+    marker = os.path.join(raw_dir, synthetic_data.QUERIES_FILE)
+    if os.path.exists(marker):
+        with open(marker, encoding="utf-8") as f:
+            if len(json.load(f)) >= query_count:
+                return raw_dir
+    print(f"🧪 Generating {entities} synthetic entities...")
+    synthetic_data.generate(raw_dir, entities, seed, max(query_count, 1000))
+    return raw_dir
+
+
+def etl_benchmarks(raw_dir, processed_dir, repeat):
+    columnar_dir = os.path.join(processed_dir, "columnar")
+
+    def reset():
+        shutil.rmtree(processed_dir, ignore_errors=True)
+        os.makedirs(processed_dir)
+
+    results = {
+        "etl.serial": time_runs(
+            lambda: etl_pipeline.run_etl(raw_dir, processed_dir), repeat, reset
+        ),
+        "etl.streaming": time_runs(
+            lambda: etl_pipeline.run_streaming_etl(raw_dir, processed_dir),
+            repeat,
+            reset,
+        ),
+        "etl.parallel": time_runs(
+            lambda: etl_pipeline.run_parallel_etl(raw_dir, processed_dir),
+            repeat,
+            reset,
+        ),
+    }
+    results["index.load_csv"] = time_runs(
+        lambda: SymptomIndex(ProcessedDataSource(processed_dir)), repeat
+    )
+    results["etl.columnar"] = time_runs(
+        lambda: etl_pipeline.export_columnar(processed_dir, columnar_dir), repeat
+    )
+    results["index.load_columnar"] = time_runs(
+        lambda: SymptomIndex(ProcessedDataSource(processed_dir)), repeat
+    )
+    results["etl.fragments"] = time_runs(
+        lambda: etl_pipeline.export_fragments(processed_dir), repeat
+    )
+    results["fragments.load"] = time_runs(lambda: FragmentStore(processed_dir), repeat)
+    return results
+
+
+def import_benchmarks(processed_dir, repeat):
+    import import_to_neo4j
+
+    importer = import_to_neo4j.Neo4jImporter()
+    columnar_dir = os.path.join(processed_dir, "columnar")
+    try:
+        importer.create_schema()
+        clear = importer.clear_database
+        return {
+            "import.bulk": time_runs(
+                lambda: importer.bulk_import_all(processed_dir), repeat, clear
+            ),
+            "import.parallel": time_runs(
+                lambda: (
+                    importer.bulk_import_nodes(processed_dir),
+                    importer.parallel_import_relationships(processed_dir),
+                ),
+                repeat,
+                clear,
+            ),
+            "import.columnar": time_runs(
+                lambda: importer.columnar_import_all(columnar_dir), repeat, clear
+            ),
+        }
+    finally:
+        importer.close()
+
+
+def lookup_benchmarks(connector, queries, repeat, prefix="lookup"):
+    return {
+        f"{prefix}.match_all": time_queries(
+            connector.get_disease_by_symptoms, queries, repeat
+        ),
+        f"{prefix}.rank": time_queries(
+            lambda q: connector.rank_diseases_by_symptoms(q, top_k=TOP_K),
+            queries,
+            repeat,
+        ),
+        f"{prefix}.context": time_queries(
+            lambda q: connector.build_context_from_symptoms(
+                q, top_k=TOP_K, token_budget=Config.CONTEXT_TOKEN_BUDGET
+            ),
+            queries,
+            repeat,
+        ),
+        f"{prefix}.context_match_all": time_queries(
+            connector.build_context_from_symptoms, queries, repeat
+        ),
+    }
+
+
+def run_scale(entities, args):
+    raw_dir = prepare_raw(entities, args.seed, args.queries)
+    processed_dir = os.path.join(WORK_DIR, f"processed-{entities}-{args.seed}")
+    with open(os.path.join(raw_dir, synthetic_data.QUERIES_FILE)) as f:
+        queries = json.load(f)[: args.queries]
+
+    print(f"⏱️ {entities} entities: ETL...")
+    results = etl_benchmarks(raw_dir, processed_dir, args.repeat)
+
+    print(f"⏱️ {entities} entities: symptom lookup and context (in-memory index)...")
+    index = SymptomIndex(ProcessedDataSource(processed_dir))
+    results.update(
+        lookup_benchmarks(GraphConnector(symptom_index=index), queries, args.repeat)
+    )
+
+    print(f"⏱️ {entities} entities: symptom lookup and context (embedded SQLite)...")
+    source = ProcessedDataSource(processed_dir)
+    db_path = os.path.join(WORK_DIR, f"graph-{entities}-{args.seed}.db")
+    results["sqlite.build"] = time_runs(lambda: build(db_path, source), args.repeat)
+    results["sqlite.open"] = time_runs(
+        lambda: SQLiteGraph(db_path, source), args.repeat
+    )
+    graph = SQLiteGraph(db_path, source)
+    results.update(
+        lookup_benchmarks(GraphConnector(backend=graph), queries, args.repeat, "sqlite")
+    )
+    # Lookups return ids only; the context text comes from the fragments
+    fragments = FragmentStore(processed_dir)
+    results.update(
+        lookup_benchmarks(
+            GraphConnector(backend=graph, fragment_store=fragments),
+            queries,
+            args.repeat,
+            "sqlite_fragments",
+        )
+    )
+
+    if args.neo4j:
+        print(f"⏱️ {entities} entities: Neo4j import...")
+        results.update(import_benchmarks(processed_dir, args.repeat))
+        print(f"⏱️ {entities} entities: symptom lookup and context (Neo4j)...")
+        results.update(
+            lookup_benchmarks(GraphConnector(), queries, args.repeat, "neo4j")
+        )
+    return {f"{name}@{entities}": result for name, result in results.items()}
+
+
+# -------------------------
+# Reporting
+# -------------------------
+def git_commit():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(dirty)
+
+
+def environment(args):
+    commit, dirty = git_commit()
+    return {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "repeat": args.repeat,
+        "queries": args.queries,
+        "seed": args.seed,
+        "neo4j": args.neo4j,
+    }
+
+
+def print_results(results):
+    print(
+        f"\n📊 {'benchmark':<34}{'median':>12}{'min':>12}{'p50/op':>12}{'p95/op':>12}"
+    )
+    for name, r in results.items():
+        p50 = f"{r['p50_us']:.0f}µs" if "p50_us" in r else ""
+        p95 = f"{r['p95_us']:.0f}µs" if "p95_us" in r else ""
+        print(
+            f"   {name:<34}{r['seconds'] * 1000:>10.1f}ms"
+            f"{r['min'] * 1000:>10.1f}ms{p50:>12}{p95:>12}"
+        )
+
+
+def compare(results, baseline, threshold, min_delta):
+    """Returns the regressions, printing the comparison of every shared benchmark."""
+    regressions = []
+    shared = [name for name in results if name in baseline["results"]]
+    base_commit = (baseline.get("environment") or {}).get("commit") or "baseline"
+    print(f"\n🔍 Compared with {base_commit[:12]} (threshold +{threshold:.0%})")
+    for name in shared:
+        old = baseline["results"][name]["seconds"]
+        new = results[name]["seconds"]
+        change = (new - old) / old if old else 0.0
+        regressed = change > threshold and new - old > min_delta
+        marker = "❌" if regressed else ("✅" if change < -threshold else "  ")
+        print(
+            f"   {marker} {name:<34}{old * 1000:>10.1f}ms → {new * 1000:.1f}ms ({change:+.1%})"
+        )
+        if regressed:
+            regressions.append(
+                {"name": name, "baseline": old, "current": new, "change": change}
+            )
+    missing = sorted(set(baseline["results"]) - set(results))
+    if missing:
+        print(f"   ⚠️ Not measured in this run: {', '.join(missing)}")
+    return regressions
+
+
+# -------------------------
+# CLI
+# -------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark ETL, import and retrieval")
+    parser.add_argument(
+        "--entities",
+        type=int,
+        nargs="+",
+        default=DEFAULT_ENTITIES,
+        help="Synthetic dataset sizes (total nodes), e.g. 1000 10000 100000 1000000",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark")
+    parser.add_argument(
+        "--queries", type=int, default=DEFAULT_QUERIES, help="Lookups per run"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--neo4j",
+        action="store_true",
+        help="Also benchmark import and Neo4j lookups (clears the configured database)",
+    )
+    parser.add_argument("--output", help="Write results as JSON here")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Allowed slowdown as a fraction (default: {DEFAULT_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=DEFAULT_MIN_DELTA,
+        help="Ignore slowdowns smaller than this many seconds "
+        f"(default: {DEFAULT_MIN_DELTA})",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    # Measure the lookups themselves, not the context cache
+    Config.CONTEXT_CACHE = "off"
+    # Connectors without an explicit index must query their backend
+    Config.SYMPTOM_INDEX = "off"
+    if not args.neo4j:
+        # The driver is created lazily and never connects in this mode
+        Config.NEO4J_URI = Config.NEO4J_URI or "bolt://localhost:7687"
+
+    results = {}
+    for entities in args.entities:
+        results.update(run_scale(entities, args))
+    print_results(results)
+
+    report = {"environment": environment(args), "results": results}
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        report["baseline"] = baseline.get("environment")
+        report["regressions"] = regressions
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) slower than the baseline")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+Synthetic raw dataset in the schema of data/raw_data/, scaled to any size.
+
+    python benchmarks/synthetic_data.py --entities 100000 --out benchmarks/.work/raw-100000
+
+`entities` is the total node count, split across diseases, symptoms, cures,
+medicines and precautions. Symptom popularity is skewed (a few symptoms are
+shared by many diseases, most by few), like real data, so lookups see both
+hot and rare symptoms. Output is deterministic for a given seed.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+
+# Share of `entities` per node type
+SHARES = {
+    "diseases": 0.5,
+    "symptoms": 0.2,
+    "cures": 0.1,
+    "medicines": 0.1,
+    "precautions": 0.1,
+}
+MIN_PER_TYPE = 10
+# Relationships per disease (inclusive ranges)
+SYMPTOMS_PER_DISEASE = (3, 8)
+LINKS_PER_DISEASE = (1, 3)
+DEFAULT_QUERIES = 1000
+QUERIES_FILE = "queries.json"
+
+PREVALENCE = ["very_common", "common", "uncommon", "rare"]
+CURE_TYPES = ["home_remedy", "general_care", "hospital_treatment", "therapy"]
+DRUG_CLASSES = ["Analgesic", "Antibiotic", "Antiviral", "Antihistamine", "Steroid"]
+DOSAGE_FORMS = ["Tablet", "Syrup", "Inhaler", "Injection", "Capsule"]
+BODY_SITES = ["Head", "Nose", "Throat", "Chest", "Systemic", "Digestive", "Skin"]
+SYLLABLES = ["ka", "lo", "mi", "ra", "tu", "zen", "vo", "shi", "dra", "pel", "gor"]
+FILLER = (
+    "Synthetic record used for benchmarking; the text length is close to "
+    "the descriptions in the real dataset."
+)
+
+
+def counts_for(entities):
+    return {
+        name: max(MIN_PER_TYPE, int(entities * share)) for name, share in SHARES.items()
+    }
+
+
+def _word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(3)).capitalize()
+
+
+def _commonness(rank, total):
+    """Popular symptoms (low rank) are the common ones."""
+    position = rank / total
+    if position < 0.05:
+        return "very_common"
+    if position < 0.3:
+        return "common"
+    if position < 0.7:
+        return "uncommon"
+    return "rare"
+
+
+def write_json_array(path, records):
+    """Write records as a JSON array one element at a time. Returns the count."""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for record in records:
+            if count:
+                f.write(",\n")
+            f.write(json.dumps(record, ensure_ascii=False))
+            count += 1
+        f.write("\n]\n")
+    return count
+
+
+def iter_symptoms(rng, n, names):
+    """Symptom records; their names are also appended to `names`."""
+    for i in range(n):
+        # The index suffix keeps names unique at any scale
+        names.append(f"{_word(rng)} {i + 1}")
+        yield {
+            "uid": f"s{i + 1}",
+            "name": names[-1],
+            "description": FILLER,
+            "body_site": rng.choice(BODY_SITES),
+            "commonness": _commonness(i, n),
+        }
+
+
+def iter_cures(rng, n):
+    for i in range(n):
+        yield {
+            "uid": f"c{i + 1}",
+            "name": f"{_word(rng)} therapy {i + 1}",
+            "type": rng.choice(CURE_TYPES),
+            "description": FILLER,
+        }
+
+
+def iter_medicines(rng, n):
+    for i in range(n):
+        yield {
+            "uid": f"m{i + 1}",
+            "name": f"{_word(rng)}ol {i + 1}",
+            "drug_class": rng.choice(DRUG_CLASSES),
+            "dosage_form": rng.choice(DOSAGE_FORMS),
+            "description": FILLER,
+        }
+
+
+def iter_precautions(rng, n):
+    for i in range(n):
+        yield {
+            "uid": f"p{i + 1}",
+            "name": f"Avoid {_word(rng).lower()} {i + 1}",
+            "description": FILLER,
+        }
+
+
+def _pick(rng, pool, bounds):
+    """Between bounds[0] and bounds[1] distinct 1-based ids, drawn by popularity."""
+    population, cum_weights = pool
+    k = min(rng.randint(*bounds), len(population))
+    chosen = set()
+    while len(chosen) < k:
+        chosen.update(rng.choices(population, cum_weights=cum_weights, k=k))
+    return sorted(chosen)[:k]
+
+
+def iter_diseases(rng, counts, symptom_names, queries, query_count):
+    """Disease records; every n-th one also adds a symptom-name query."""
+    # Zipf-like popularity: item i is picked with weight 1 / i
+    pools = {}
+    for name in ("symptoms", "cures", "medicines", "precautions"):
+        population = range(1, counts[name] + 1)
+        pools[name] = (
+            population,
+            list(itertools.accumulate(1 / i for i in population)),
+        )
+    query_every = max(1, counts["diseases"] // query_count)
+
+    for i in range(counts["diseases"]):
+        symptoms = _pick(rng, pools["symptoms"], SYMPTOMS_PER_DISEASE)
+        if i % query_every == 0 and len(queries) < query_count:
+            sample = rng.sample(symptoms, rng.randint(2, 3))
+            queries.append([symptom_names[s - 1] for s in sample])
+        yield {
+            "uid": f"d{i + 1}",
+            "name": f"{_word(rng)} syndrome {i + 1}",
+            "canonical_id": f"SYN:{i + 1:07d}",
+            "description": FILLER,
+            "prevalence": rng.choice(PREVALENCE),
+            "symptoms": [
+                {"symptom_id": f"s{s}", "weight": round(rng.uniform(0.3, 1.0), 2)}
+                for s in symptoms
+            ],
+            "risk_factors": [_word(rng) for _ in range(rng.randint(0, 2))],
+            **{
+                name: [
+                    f"{prefix}{j}" for j in _pick(rng, pools[name], LINKS_PER_DISEASE)
+                ]
+                for name, prefix in (
+                    ("cures", "c"),
+                    ("medicines", "m"),
+                    ("precautions", "p"),
+                )
+            },
+        }
+
+
+def generate(raw_dir, entities, seed=0, query_count=DEFAULT_QUERIES):
+    """
+    Write the five *_raw.json files plus queries.json (lists of symptom names
+    that all belong to one disease) to raw_dir. Returns the node counts.
+    """
+    os.makedirs(raw_dir, exist_ok=True)
+    rng = random.Random(seed)
+    counts = counts_for(entities)
+    symptom_names = []
+    for name, records in (
+        ("symptoms", iter_symptoms(rng, counts["symptoms"], symptom_names)),
+        ("cures", iter_cures(rng, counts["cures"])),
+        ("medicines", iter_medicines(rng, counts["medicines"])),
+        ("precautions", iter_precautions(rng, counts["precautions"])),
+    ):
+        write_json_array(os.path.join(raw_dir, f"{name}_raw.json"), records)
+
+    queries = []
+    write_json_array(
+        os.path.join(raw_dir, "diseases_raw.json"),
+        iter_diseases(rng, counts, symptom_names, queries, query_count),
+    )
+    with open(os.path.join(raw_dir, QUERIES_FILE), "w", encoding="utf-8") as f:
+        json.dump(queries, f)
+    return counts
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate a synthetic raw dataset")
+    parser.add_argument("--entities", type=int, default=10000, help="Total nodes")
+    parser.add_argument("--out", required=True, help="Output raw_data directory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    start = time.perf_counter()
+    counts = generate(args.out, args.entities, args.seed, args.queries)
+    print(
+        f"✅ Synthetic dataset in {args.out} ({time.perf_counter() - start:.1f}s): "
+        + ", ".join(f"{name}={count}" for name, count in counts.items())
+    )
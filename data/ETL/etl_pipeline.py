@@ -1,121 +1,331 @@
+import argparse
 import csv
 import json
 import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
 
 # Paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 RAW_DIR = os.path.join(BASE_DIR, "raw_data")
 PROCESSED_DIR = os.path.join(BASE_DIR, "processed_data")
 
-os.makedirs(PROCESSED_DIR, exist_ok=True)
+# For imports (project root)
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+sys.path.append(PROJECT_ROOT)
+# app/ modules import each other by top-level name
+sys.path.append(os.path.join(PROJECT_ROOT, "app"))
+
+from app.columnar import table_path, write_table
 
+os.makedirs(PROCESSED_DIR, exist_ok=True)
 
-def load_json(file_name):
+# Read size for incremental JSON parsing
+CHUNK_SIZE = 1 << 16
+# Largest single array element (in characters) buffered while it does not
+# decode; past this the file is treated as malformed instead of read to the end
+MAX_RECORD_SIZE = 1 << 26
+# The rest of a buffer that may still continue a number ("-1." of "-1.5")
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*\Z")
+
+# CSV headers
+SYMPTOM_HEADER = ["symptom_id", "name", "description", "body_site", "commonness"]
+CURE_HEADER = ["cure_id", "name", "description", "type"]
+MEDICINE_HEADER = ["medicine_id", "name", "description", "drug_class", "dosage_form"]
+PRECAUTION_HEADER = ["precaution_id", "name", "description"]
+DISEASE_HEADER = [
+    "disease_id",
+    "name",
+    "canonical_id",
+    "description",
+    "prevalence",
+    "risk_factors",
+]
+DISEASE_SYMPTOM_HEADER = ["disease_id", "symptom_id", "weight"]
+DISEASE_CURE_HEADER = ["disease_id", "cure_id"]
+DISEASE_MEDICINE_HEADER = ["disease_id", "medicine_id"]
+DISEASE_PRECAUTION_HEADER = ["disease_id", "precaution_id"]
+
+# Node table owning each id column, for integer-coding edges
+ID_TABLES = {
+    "symptom_id": "symptoms",
+    "cure_id": "cures",
+    "medicine_id": "medicines",
+    "precaution_id": "precautions",
+    "disease_id": "diseases",
+}
+
+# Files written by the disease pass, disease nodes first
+DISEASE_OUTPUTS = [
+    ("diseases.csv", DISEASE_HEADER),
+    ("disease_has_symptom.csv", DISEASE_SYMPTOM_HEADER),
+    ("disease_has_cure.csv", DISEASE_CURE_HEADER),
+    ("disease_has_medicine.csv", DISEASE_MEDICINE_HEADER),
+    ("disease_has_precaution.csv", DISEASE_PRECAUTION_HEADER),
+]
+
+
+def load_json(file_name, raw_dir=RAW_DIR):
     """Load a JSON file from raw_data directory."""
-    path = os.path.join(RAW_DIR, file_name)
+    path = os.path.join(raw_dir, file_name)
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
-def save_csv(file_name, rows, header):
+def iter_json_records(
+    path, chunk_size=CHUNK_SIZE, raw=False, max_record_size=MAX_RECORD_SIZE
+):
+    """
+    Yield the elements of a top-level JSON array one at a time, reading the
+    file in chunks. Files ending in .jsonl are read as JSON Lines instead.
+    With `raw`, each element's JSON text is yielded instead of its value.
+    Raises ValueError on malformed input, at the latest once an element
+    grows past `max_record_size` characters without decoding.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield line.strip() if raw else json.loads(line)
+            return
+
+        decoder = json.JSONDecoder()
+        buf = ""
+        while not buf:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            buf = chunk.lstrip()
+        if not buf.startswith("["):
+            raise ValueError(f"{path}: expected a top-level JSON array")
+        pos = 1
+
+        while True:
+            # Skip whitespace and separators, refilling the buffer as needed
+            while True:
+                while pos < len(buf) and (buf[pos].isspace() or buf[pos] == ","):
+                    pos += 1
+                if pos < len(buf):
+                    break
+                buf, pos = f.read(chunk_size), 0
+                if not buf:
+                    raise ValueError(f"{path}: unterminated JSON array")
+
+            if buf[pos] == "]":
+                return
+
+            # Decode one element, growing the buffer while it is incomplete.
+            # It only counts once a delimiter (or EOF) follows: a number
+            # cut by the chunk boundary ("45" of "456") decodes on its own
+            while True:
+                start = pos
+                try:
+                    record, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError as e:
+                    if len(buf) - start > max_record_size:
+                        raise ValueError(
+                            f"{path}: invalid JSON element at offset {e.pos} "
+                            f"of a {len(buf) - start} character buffer: {e.msg}"
+                        ) from e
+                    end = None
+                if end is not None:
+                    follow = end
+                    while follow < len(buf) and buf[follow].isspace():
+                        follow += 1
+                    if follow < len(buf) and not _NUMBER_TAIL.match(buf, end):
+                        if buf[follow] not in ",]":
+                            raise ValueError(
+                                f"{path}: expected ',' or ']' after an element, "
+                                f"got {buf[follow]!r}"
+                            )
+                        pos = end
+                        break
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    if end is None:
+                        decoder.raw_decode(buf, start)  # re-raise the error
+                    pos = end
+                    break
+                buf, pos = buf[start:] + chunk, 0
+            yield buf[start:pos] if raw else record
+
+
+def iter_raw_records(name, raw_dir=RAW_DIR):
+    """Stream records of a raw dataset, preferring <name>.jsonl over <name>.json."""
+    jsonl_path = os.path.join(raw_dir, f"{name}.jsonl")
+    if os.path.exists(jsonl_path):
+        return iter_json_records(jsonl_path)
+    return iter_json_records(os.path.join(raw_dir, f"{name}.json"))
+
+
+def save_csv(file_name, rows, header, processed_dir=PROCESSED_DIR):
     """Save rows to CSV in processed_data directory."""
-    path = os.path.join(PROCESSED_DIR, file_name)
+    path = os.path.join(processed_dir, file_name)
     with open(path, "w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=header)
         writer.writeheader()
         writer.writerows(rows)
 
 
-def process_symptoms(symptoms_raw):
-    """Convert symptoms JSON into CSV-ready rows."""
-    return [
-        {
+def open_csv_writer(stack, file_name, header, processed_dir=PROCESSED_DIR):
+    """Open a CSV DictWriter whose file is closed when the ExitStack exits."""
+    path = os.path.join(processed_dir, file_name)
+    f = stack.enter_context(open(path, "w", newline="", encoding="utf-8"))
+    writer = csv.DictWriter(f, fieldnames=header)
+    writer.writeheader()
+    return writer
+
+
+def stream_csv(file_name, rows, header, processed_dir=PROCESSED_DIR):
+    """Write rows to CSV as they are produced. Returns the row count."""
+    count = 0
+    with ExitStack() as stack:
+        writer = open_csv_writer(stack, file_name, header, processed_dir)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def iter_symptoms(symptoms_raw):
+    """Yield CSV-ready symptom rows."""
+    for s in symptoms_raw:
+        yield {
             "symptom_id": s["uid"],
             "name": s["name"],
             "description": s["description"],
             "body_site": s["body_site"],
             "commonness": s["commonness"],
         }
-        for s in symptoms_raw
-    ]
 
 
-def process_cures(cures_raw):
-    """Convert cures JSON into CSV-ready rows."""
-    return [
-        {
+def iter_cures(cures_raw):
+    """Yield CSV-ready cure rows."""
+    for c in cures_raw:
+        yield {
             "cure_id": c["uid"],
             "name": c["name"],
             "description": c["description"],
             "type": c["type"],
         }
-        for c in cures_raw
-    ]
 
 
-def process_medicines(medicines_raw):
-    """Convert medicines JSON into CSV-ready rows."""
-    return [
-        {
+def iter_medicines(medicines_raw):
+    """Yield CSV-ready medicine rows."""
+    for m in medicines_raw:
+        yield {
             "medicine_id": m["uid"],
             "name": m["name"],
             "description": m["description"],
             "drug_class": m["drug_class"],
             "dosage_form": m["dosage_form"],
         }
-        for m in medicines_raw
-    ]
 
 
-def process_precautions(precautions_raw):
-    """Convert precautions JSON into CSV-ready rows."""
-    return [
-        {
+def iter_precautions(precautions_raw):
+    """Yield CSV-ready precaution rows."""
+    for p in precautions_raw:
+        yield {
             "precaution_id": p["uid"],
             "name": p["name"],
             "description": p["description"],
         }
-        for p in precautions_raw
-    ]
-
 
-def process_diseases(diseases_raw):
-    """Split diseases into disease nodes and relationships."""
-    diseases = []
-    symptom_relations = []
-    cure_relations = []
-    medicine_relations = []
-    precaution_relations = []
 
+# name: (raw dataset, output CSV, header, row generator)
+NODE_STAGES = {
+    "symptoms": ("symptoms_raw", "symptoms.csv", SYMPTOM_HEADER, iter_symptoms),
+    "cures": ("cures_raw", "cures.csv", CURE_HEADER, iter_cures),
+    "medicines": ("medicines_raw", "medicines.csv", MEDICINE_HEADER, iter_medicines),
+    "precautions": (
+        "precautions_raw",
+        "precautions.csv",
+        PRECAUTION_HEADER,
+        iter_precautions,
+    ),
+}
+
+
+def iter_diseases(diseases_raw):
+    """
+    Yield one tuple per disease:
+    (disease_row, symptom_relations, cure_relations, medicine_relations,
+    precaution_relations).
+    """
     for d in diseases_raw:
-        diseases.append(
+        disease = {
+            "disease_id": d["uid"],
+            "name": d["name"],
+            "canonical_id": d["canonical_id"],
+            "description": d["description"],
+            "prevalence": d["prevalence"],
+            "risk_factors": ";".join(d.get("risk_factors", [])),
+        }
+        symptom_relations = [
             {
                 "disease_id": d["uid"],
-                "name": d["name"],
-                "canonical_id": d["canonical_id"],
-                "description": d["description"],
-                "prevalence": d["prevalence"],
-                "risk_factors": ";".join(d.get("risk_factors", [])),
+                "symptom_id": s["symptom_id"],
+                "weight": s["weight"],
             }
+            for s in d.get("symptoms", [])
+        ]
+        cure_relations = [
+            {"disease_id": d["uid"], "cure_id": c} for c in d.get("cures", [])
+        ]
+        medicine_relations = [
+            {"disease_id": d["uid"], "medicine_id": m} for m in d.get("medicines", [])
+        ]
+        precaution_relations = [
+            {"disease_id": d["uid"], "precaution_id": p}
+            for p in d.get("precautions", [])
+        ]
+        yield (
+            disease,
+            symptom_relations,
+            cure_relations,
+            medicine_relations,
+            precaution_relations,
         )
 
-        for s in d.get("symptoms", []):
-            symptom_relations.append(
-                {
-                    "disease_id": d["uid"],
-                    "symptom_id": s["symptom_id"],
-                    "weight": s["weight"],
-                }
-            )
 
-        for c in d.get("cures", []):
-            cure_relations.append({"disease_id": d["uid"], "cure_id": c})
+def process_symptoms(symptoms_raw):
+    """Convert symptoms JSON into CSV-ready rows."""
+    return list(iter_symptoms(symptoms_raw))
+
+
+def process_cures(cures_raw):
+    """Convert cures JSON into CSV-ready rows."""
+    return list(iter_cures(cures_raw))
+
+
+def process_medicines(medicines_raw):
+    """Convert medicines JSON into CSV-ready rows."""
+    return list(iter_medicines(medicines_raw))
+
+
+def process_precautions(precautions_raw):
+    """Convert precautions JSON into CSV-ready rows."""
+    return list(iter_precautions(precautions_raw))
 
-        for m in d.get("medicines", []):
-            medicine_relations.append({"disease_id": d["uid"], "medicine_id": m})
 
-        for p in d.get("precautions", []):
-            precaution_relations.append({"disease_id": d["uid"], "precaution_id": p})
+def process_diseases(diseases_raw):
+    """Split diseases into disease nodes and relationships."""
+    diseases = []
+    symptom_relations = []
+    cure_relations = []
+    medicine_relations = []
+    precaution_relations = []
+
+    for disease, symptoms, cures, medicines, precautions in iter_diseases(diseases_raw):
+        diseases.append(disease)
+        symptom_relations.extend(symptoms)
+        cure_relations.extend(cures)
+        medicine_relations.extend(medicines)
+        precaution_relations.extend(precautions)
 
     return (
         diseases,
@@ -126,16 +336,16 @@ def process_diseases(diseases_raw):
     )
 
 
-def run_etl():
+def run_etl(raw_dir=RAW_DIR, processed_dir=PROCESSED_DIR):
     """Main ETL pipeline."""
     print("🔄 Starting ETL...")
 
     # Load raw JSON
-    symptoms_raw = load_json("symptoms_raw.json")
-    diseases_raw = load_json("diseases_raw.json")
-    medicines_raw = load_json("medicines_raw.json")
-    precautions_raw = load_json("precautions_raw.json")
-    cures_raw = load_json("cures_raw.json")
+    symptoms_raw = load_json("symptoms_raw.json", raw_dir)
+    diseases_raw = load_json("diseases_raw.json", raw_dir)
+    medicines_raw = load_json("medicines_raw.json", raw_dir)
+    precautions_raw = load_json("precautions_raw.json", raw_dir)
+    cures_raw = load_json("cures_raw.json", raw_dir)
 
     # Process nodes
     symptoms = process_symptoms(symptoms_raw)
@@ -144,18 +354,10 @@ def run_etl():
     precautions = process_precautions(precautions_raw)
 
     # Save nodes
-    save_csv(
-        "symptoms.csv",
-        symptoms,
-        ["symptom_id", "name", "description", "body_site", "commonness"],
-    )
-    save_csv("cures.csv", cures, ["cure_id", "name", "description", "type"])
-    save_csv(
-        "medicines.csv",
-        medicines,
-        ["medicine_id", "name", "description", "drug_class", "dosage_form"],
-    )
-    save_csv("precautions.csv", precautions, ["precaution_id", "name", "description"])
+    save_csv("symptoms.csv", symptoms, SYMPTOM_HEADER, processed_dir)
+    save_csv("cures.csv", cures, CURE_HEADER, processed_dir)
+    save_csv("medicines.csv", medicines, MEDICINE_HEADER, processed_dir)
+    save_csv("precautions.csv", precautions, PRECAUTION_HEADER, processed_dir)
 
     # Process diseases & relations
     (
@@ -167,37 +369,362 @@ def run_etl():
     ) = process_diseases(diseases_raw)
 
     # Save disease nodes
-    save_csv(
-        "diseases.csv",
-        diseases,
-        [
-            "disease_id",
-            "name",
-            "canonical_id",
-            "description",
-            "prevalence",
-            "risk_factors",
-        ],
-    )
+    save_csv("diseases.csv", diseases, DISEASE_HEADER, processed_dir)
 
     # Save relations
     save_csv(
         "disease_has_symptom.csv",
         symptom_relations,
-        ["disease_id", "symptom_id", "weight"],
+        DISEASE_SYMPTOM_HEADER,
+        processed_dir,
     )
-    save_csv("disease_has_cure.csv", cure_relations, ["disease_id", "cure_id"])
+    save_csv("disease_has_cure.csv", cure_relations, DISEASE_CURE_HEADER, processed_dir)
     save_csv(
-        "disease_has_medicine.csv", medicine_relations, ["disease_id", "medicine_id"]
+        "disease_has_medicine.csv",
+        medicine_relations,
+        DISEASE_MEDICINE_HEADER,
+        processed_dir,
     )
     save_csv(
         "disease_has_precaution.csv",
         precaution_relations,
-        ["disease_id", "precaution_id"],
+        DISEASE_PRECAUTION_HEADER,
+        processed_dir,
     )
 
     print("✅ ETL completed. CSV files are saved in processed_data/")
 
 
+def write_disease_csvs(diseases_raw, processed_dir=PROCESSED_DIR, suffix=""):
+    """
+    Stream disease records into the disease CSV and its four relationship
+    CSVs in one pass. Returns (diseases, relations) row counts.
+    """
+    diseases = relations = 0
+    with ExitStack() as stack:
+        writers = [
+            open_csv_writer(stack, file_name + suffix, header, processed_dir)
+            for file_name, header in DISEASE_OUTPUTS
+        ]
+        for disease, *relation_rows in iter_diseases(diseases_raw):
+            writers[0].writerow(disease)
+            diseases += 1
+            for writer, rows in zip(writers[1:], relation_rows):
+                writer.writerows(rows)
+                relations += len(rows)
+    return diseases, relations
+
+
+def run_streaming_etl(raw_dir=RAW_DIR, processed_dir=PROCESSED_DIR):
+    """
+    ETL with bounded memory: raw records are parsed one at a time and every
+    CSV row is written as soon as it is produced.
+    """
+    print("🔄 Starting streaming ETL...")
+    os.makedirs(processed_dir, exist_ok=True)
+
+    counts = {}
+    for name, (raw_name, file_name, header, transform) in NODE_STAGES.items():
+        counts[name] = stream_csv(
+            file_name,
+            transform(iter_raw_records(raw_name, raw_dir)),
+            header,
+            processed_dir,
+        )
+    counts["diseases"], counts["relations"] = write_disease_csvs(
+        iter_raw_records("diseases_raw", raw_dir), processed_dir
+    )
+
+    print(
+        "✅ Streaming ETL completed: "
+        + ", ".join(f"{name}={count}" for name, count in counts.items())
+    )
+    return counts
+
+
+# ------------------ PARALLEL ETL ------------------
+
+
+def iter_jsonl_range(path, start, end):
+    """Yield JSON Lines records whose line starts in the byte range [start, end)."""
+    with open(path, "rb") as f:
+        if start:
+            # Step back one byte so a line starting exactly at `start` is kept
+            f.seek(start - 1)
+            f.readline()
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_shard_records(jsonl_path, shard, shards):
+    """
+    Records of one shard of a JSON Lines file, split by byte range so each
+    worker only reads (and parses) its own slice.
+    """
+    size = os.path.getsize(jsonl_path)
+    step = -(-size // shards)  # ceiling division
+    return iter_jsonl_range(jsonl_path, shard * step, (shard + 1) * step)
+
+
+def shard_source(name, raw_dir, shard_dir):
+    """
+    JSON Lines file to shard for a raw dataset: <name>.jsonl when present,
+    otherwise <name>.json rewritten once into shard_dir. Elements are copied
+    as text (newlines outside strings become spaces), not re-serialized.
+
+    The rewrite is a serial pass over the whole array in this process (a
+    byte offset inside a JSON array cannot be mapped to an element boundary
+    without scanning from the start), so --parallel only scales with
+    JSON Lines input.
+    """
+    jsonl_path = os.path.join(raw_dir, f"{name}.jsonl")
+    if os.path.exists(jsonl_path):
+        return jsonl_path
+    print(
+        f"⚠️ {name}.json is a JSON array: rewriting it as JSON Lines first "
+        f"(serial); provide {name}.jsonl to skip this step"
+    )
+    converted = os.path.join(shard_dir, f"{name}.jsonl")
+    with open(converted, "w", encoding="utf-8") as out:
+        for text in iter_json_records(os.path.join(raw_dir, f"{name}.json"), raw=True):
+            # JSON strings cannot hold raw newlines, so these are whitespace
+            out.write(text.replace("\r", " ").replace("\n", " ") + "\n")
+    return converted
+
+
+def shard_suffix(shard):
+    return f".part-{shard:04d}"
+
+
+def _run_node_stage(name, raw_dir, processed_dir):
+    raw_name, file_name, header, transform = NODE_STAGES[name]
+    start = time.perf_counter()
+    count = stream_csv(
+        file_name, transform(iter_raw_records(raw_name, raw_dir)), header, processed_dir
+    )
+    return name, count, time.perf_counter() - start
+
+
+def _run_disease_shard(shard, shards, jsonl_path, shard_dir):
+    start = time.perf_counter()
+    records = iter_shard_records(jsonl_path, shard, shards)
+    diseases, relations = write_disease_csvs(records, shard_dir, shard_suffix(shard))
+    return f"diseases[{shard}]", diseases + relations, time.perf_counter() - start
+
+
+def merge_shards(shard_dir, processed_dir, shards):
+    """Concatenate sharded disease CSVs, keeping a single header line."""
+    for file_name, _ in DISEASE_OUTPUTS:
+        with open(os.path.join(processed_dir, file_name), "wb") as out:
+            for shard in range(shards):
+                part = os.path.join(shard_dir, file_name + shard_suffix(shard))
+                with open(part, "rb") as f:
+                    header = f.readline()
+                    if shard == 0:
+                        out.write(header)
+                    shutil.copyfileobj(f, out)
+
+
+def run_parallel_etl(
+    raw_dir=RAW_DIR,
+    processed_dir=PROCESSED_DIR,
+    workers=None,
+    shards=None,
+    keep_shards=False,
+):
+    """
+    ETL on a process pool: each node type is one task and the disease pass is
+    split into `shards` tasks writing sharded CSVs, which are then merged.
+    A diseases_raw.json array is first rewritten as JSON Lines (while the
+    node tasks run, but serially; see shard_source), so each shard parses
+    only its own byte range. Shards
+    are contiguous, so the merged rows keep the serial pipeline's order.
+    Returns {stage: seconds}.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = shards or workers
+    shard_dir = os.path.join(processed_dir, "shards")
+    os.makedirs(shard_dir, exist_ok=True)
+    print(f"🔄 Starting parallel ETL ({workers} workers, {shards} disease shards)...")
+
+    timings = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_run_node_stage, name, raw_dir, processed_dir)
+            for name in NODE_STAGES
+        ]
+        split_start = time.perf_counter()
+        jsonl_path = shard_source("diseases_raw", raw_dir, shard_dir)
+        timings["split"] = time.perf_counter() - split_start
+        futures += [
+            pool.submit(_run_disease_shard, shard, shards, jsonl_path, shard_dir)
+            for shard in range(shards)
+        ]
+        for future in futures:
+            stage, rows, seconds = future.result()
+            timings[stage] = seconds
+            print(f"⏱️ {stage}: {rows} rows in {seconds:.2f}s")
+    print(f"⏱️ split diseases into JSON Lines: {timings['split']:.2f}s")
+    timings["transform"] = time.perf_counter() - start
+
+    merge_start = time.perf_counter()
+    merge_shards(shard_dir, processed_dir, shards)
+    if not keep_shards:
+        shutil.rmtree(shard_dir)
+    timings["merge"] = time.perf_counter() - merge_start
+    timings["total"] = time.perf_counter() - start
+
+    print(
+        f"✅ Parallel ETL completed in {timings['total']:.2f}s "
+        f"(transform {timings['transform']:.2f}s, merge {timings['merge']:.2f}s)"
+    )
+    return timings
+
+
+# ------------------ COLUMNAR EXPORT ------------------
+
+
+def export_columnar(processed_dir=PROCESSED_DIR, columnar_dir=None):
+    """
+    Convert the processed CSVs into memory-mappable columnar tables
+    (see app/columnar.py). Node tables keep their string columns; edge tables
+    store integer row indexes into the node tables and weights as floats.
+    """
+    columnar_dir = columnar_dir or os.path.join(processed_dir, "columnar")
+    os.makedirs(columnar_dir, exist_ok=True)
+    start = time.perf_counter()
+
+    node_files = [(stage[1], stage[2]) for stage in NODE_STAGES.values()]
+    node_files.append(DISEASE_OUTPUTS[0])
+    row_index = {}
+    for file_name, header in node_files:
+        columns = {name: [] for name in header}
+        with open(os.path.join(processed_dir, file_name), encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                for name in header:
+                    columns[name].append(row[name])
+        table = file_name[: -len(".csv")]
+        row_index[table] = {key: i for i, key in enumerate(columns[header[0]])}
+        write_table(
+            table_path(columnar_dir, table),
+            [(name, "str", columns[name]) for name in header],
+        )
+
+    for file_name, header in DISEASE_OUTPUTS[1:]:
+        id_columns = [name for name in header if name in ID_TABLES]
+        columns = {name: [] for name in header}
+        dropped = 0
+        with open(os.path.join(processed_dir, file_name), encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    coded = [
+                        row_index[ID_TABLES[name]][row[name]] for name in id_columns
+                    ]
+                except KeyError:
+                    dropped += 1  # dangling edge; the graph import skips these too
+                    continue
+                for name, value in zip(id_columns, coded):
+                    columns[name].append(value)
+                if "weight" in columns:
+                    columns["weight"].append(float(row["weight"]))
+        table = file_name[: -len(".csv")]
+        write_table(
+            table_path(columnar_dir, table),
+            [
+                (name, "u32" if name in id_columns else "f64", columns[name])
+                for name in header
+            ],
+            meta={"references": {name: ID_TABLES[name] for name in id_columns}},
+        )
+        if dropped:
+            print(f"⚠️ {file_name}: dropped {dropped} edges with unknown ids")
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Columnar tables written to {columnar_dir} in {elapsed:.2f}s")
+
+
+# ------------------ CONTEXT FRAGMENTS ------------------
+
+
+def export_fragments(processed_dir=PROCESSED_DIR):
+    """
+    Pre-render every disease's context fragments from the processed CSVs
+    into processed_data/disease_fragments.jsonl (see app/fragment_store.py).
+    """
+    from fragment_store import FRAGMENTS_FILE, build_fragments
+
+    start = time.perf_counter()
+    stats = build_fragments(processed_dir)
+    elapsed = time.perf_counter() - start
+    levels = ", ".join(f"{tokens:.0f}" for tokens in stats["level_tokens"])
+    print(
+        f"✅ Context fragments for {stats['diseases']} diseases written to "
+        f"{os.path.join(processed_dir, FRAGMENTS_FILE)} in {elapsed:.2f}s "
+        f"(~{stats['full_tokens']:.0f} tokens full, {levels} per compact level)"
+    )
+    return stats
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Convert raw JSON into processed CSVs")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Parse raw JSON arrays (or .jsonl files) incrementally and write "
+        "CSVs as rows are produced, keeping memory bounded",
+    )
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="Run entity transforms on a process pool and shard the disease pass",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Processes (default: all cores)"
+    )
+    parser.add_argument(
+        "--shards", type=int, default=None, help="Disease shards (default: workers)"
+    )
+    parser.add_argument(
+        "--keep-shards",
+        action="store_true",
+        help="Keep processed_data/shards/ after merging",
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Also write memory-mappable columnar tables to processed_data/columnar/",
+    )
+    parser.add_argument(
+        "--fragments",
+        action="store_true",
+        help="Also pre-render per-disease context fragments "
+        "(processed_data/disease_fragments.jsonl)",
+    )
+    parser.add_argument("--raw-dir", default=RAW_DIR)
+    parser.add_argument("--processed-dir", default=PROCESSED_DIR)
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    run_etl()
+    args = parse_args()
+    if args.parallel:
+        run_parallel_etl(
+            args.raw_dir,
+            args.processed_dir,
+            workers=args.workers,
+            shards=args.shards,
+            keep_shards=args.keep_shards,
+        )
+    elif args.stream:
+        run_streaming_etl(args.raw_dir, args.processed_dir)
+    else:
+        run_etl(args.raw_dir, args.processed_dir)
+    if args.columnar:
+        export_columnar(args.processed_dir)
+    if args.fragments:
+        export_fragments(args.processed_dir)
@@ -1,19 +1,319 @@
+import argparse
 import csv
+import hashlib
+import json
 import os
+import queue
 import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 from neo4j import GraphDatabase
 
 # For data paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 PROCESSED_DIR = os.path.join(BASE_DIR, "processed_data")
+COLUMNAR_DIR = os.path.join(PROCESSED_DIR, "columnar")
+# Content hashes of the last imported CSVs, used by incremental sync
+MANIFEST_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "import_manifest.json"
+)
 
 # For imports (project root)
 PROJECT_ROOT = os.path.dirname(BASE_DIR)
 sys.path.append(PROJECT_ROOT)
 
+from app.columnar import ColumnarTable, table_path
 from app.config import Config  # Import Config class
 
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_WORKERS = 4
+# Batches buffered per worker before the CSV reader blocks (bounds memory)
+WORKER_QUEUE_DEPTH = 4
+
+# ------------------ SCHEMA ------------------
+
+# (name, label, property): MERGE {id: ...} must hit an index, not a label scan
+SCHEMA_CONSTRAINTS = [
+    ("symptom_id_unique", "Symptom", "id"),
+    ("disease_id_unique", "Disease", "id"),
+    ("cure_id_unique", "Cure", "id"),
+    ("medicine_id_unique", "Medicine", "id"),
+    ("precaution_id_unique", "Precaution", "id"),
+]
+# name_lower holds toLower(name) so case-insensitive lookups can use an index
+SCHEMA_INDEXES = [
+    ("symptom_name", "Symptom", "name"),
+    ("symptom_name_lower", "Symptom", "name_lower"),
+]
+SCHEMA_AWAIT_SECONDS = 300
+# (name, count query, backfill query) for properties older imports did not
+# write; ranked lookups filter on Symptom.name_lower and find nothing without it
+SCHEMA_MIGRATIONS = [
+    (
+        "symptom_name_lower",
+        "MATCH (s:Symptom) WHERE s.name_lower IS NULL AND s.name IS NOT NULL "
+        "RETURN count(s) AS missing",
+        "MATCH (s:Symptom) WHERE s.name_lower IS NULL AND s.name IS NOT NULL "
+        "SET s.name_lower = toLower(s.name) RETURN count(s) AS updated",
+    ),
+]
+
+# ------------------ BULK (UNWIND) QUERIES ------------------
+
+BULK_QUERIES = {
+    "symptoms": """
+        UNWIND $rows AS row
+        MERGE (s:Symptom {id: row.symptom_id})
+        SET s.name = row.name,
+            s.name_lower = toLower(row.name),
+            s.description = row.description,
+            s.body_site = row.body_site,
+            s.commonness = row.commonness
+    """,
+    "cures": """
+        UNWIND $rows AS row
+        MERGE (c:Cure {id: row.cure_id})
+        SET c.name = row.name,
+            c.description = row.description,
+            c.type = row.type
+    """,
+    "medicines": """
+        UNWIND $rows AS row
+        MERGE (m:Medicine {id: row.medicine_id})
+        SET m.name = row.name,
+            m.description = row.description,
+            m.drug_class = row.drug_class,
+            m.dosage_form = row.dosage_form
+    """,
+    "precautions": """
+        UNWIND $rows AS row
+        MERGE (p:Precaution {id: row.precaution_id})
+        SET p.name = row.name,
+            p.description = row.description
+    """,
+    "diseases": """
+        UNWIND $rows AS row
+        MERGE (d:Disease {id: row.disease_id})
+        SET d.name = row.name,
+            d.canonical_id = row.canonical_id,
+            d.description = row.description,
+            d.prevalence = row.prevalence,
+            d.risk_factors = row.risk_factors
+    """,
+    "disease_symptom": """
+        UNWIND $rows AS row
+        MATCH (d:Disease {id: row.disease_id})
+        MATCH (s:Symptom {id: row.symptom_id})
+        MERGE (d)-[r:HAS_SYMPTOM]->(s)
+        SET r.weight = toFloat(row.weight)
+    """,
+    "disease_cure": """
+        UNWIND $rows AS row
+        MATCH (d:Disease {id: row.disease_id})
+        MATCH (c:Cure {id: row.cure_id})
+        MERGE (d)-[:CURED_BY]->(c)
+    """,
+    "disease_medicine": """
+        UNWIND $rows AS row
+        MATCH (d:Disease {id: row.disease_id})
+        MATCH (m:Medicine {id: row.medicine_id})
+        MERGE (d)-[:TREATED_WITH]->(m)
+    """,
+    "disease_precaution": """
+        UNWIND $rows AS row
+        MATCH (d:Disease {id: row.disease_id})
+        MATCH (p:Precaution {id: row.precaution_id})
+        MERGE (d)-[:REQUIRES_PRECAUTION]->(p)
+    """,
+}
+
+# Import order matters: relationships MATCH on nodes created earlier.
+NODE_FILES = [
+    ("symptoms", "symptoms.csv"),
+    ("cures", "cures.csv"),
+    ("medicines", "medicines.csv"),
+    ("precautions", "precautions.csv"),
+    ("diseases", "diseases.csv"),
+]
+RELATIONSHIP_FILES = [
+    ("disease_symptom", "disease_has_symptom.csv"),
+    ("disease_cure", "disease_has_cure.csv"),
+    ("disease_medicine", "disease_has_medicine.csv"),
+    ("disease_precaution", "disease_has_precaution.csv"),
+]
+
+
+# Key columns used to identify rows across refreshes
+NODE_KEYS = {
+    "symptoms": ("Symptom", "symptom_id"),
+    "cures": ("Cure", "cure_id"),
+    "medicines": ("Medicine", "medicine_id"),
+    "precautions": ("Precaution", "precaution_id"),
+    "diseases": ("Disease", "disease_id"),
+}
+RELATIONSHIP_KEYS = {
+    "disease_symptom": ("HAS_SYMPTOM", "Symptom", "symptom_id"),
+    "disease_cure": ("CURED_BY", "Cure", "cure_id"),
+    "disease_medicine": ("TREATED_WITH", "Medicine", "medicine_id"),
+    "disease_precaution": ("REQUIRES_PRECAUTION", "Precaution", "precaution_id"),
+}
+
+
+def delete_query(entity):
+    """UNWIND query deleting the rows produced by delete_rows()."""
+    if entity in NODE_KEYS:
+        label, _ = NODE_KEYS[entity]
+        return f"""
+            UNWIND $rows AS row
+            MATCH (n:{label} {{id: row.id}})
+            DETACH DELETE n
+        """
+    rel_type, label, _ = RELATIONSHIP_KEYS[entity]
+    return f"""
+        UNWIND $rows AS row
+        MATCH (:Disease {{id: row.disease_id}})-[r:{rel_type}]->(:{label} {{id: row.id}})
+        DELETE r
+    """
+
+
+def delete_rows(entity, keys):
+    """Turn manifest keys of one entity into parameter rows for delete_query()."""
+    if entity in NODE_KEYS:
+        return [{"id": key} for key in keys]
+    return [
+        {"disease_id": disease_id, "id": other_id}
+        for disease_id, other_id in map(json.loads, keys)
+    ]
+
+
+def row_key(entity, row):
+    """
+    Stable identity of a CSV row: node id, or the JSON list
+    [disease_id, target_id] for edges (ids may contain any character).
+    """
+    if entity in NODE_KEYS:
+        return row[NODE_KEYS[entity][1]]
+    return json.dumps([row["disease_id"], row[RELATIONSHIP_KEYS[entity][2]]])
+
+
+def row_hash(row):
+    return hashlib.sha1("\x1f".join(row.values()).encode("utf-8")).hexdigest()
+
+
+def load_manifest(path=MANIFEST_PATH):
+    """Return {entity: {key: hash}} from the last import, or {} if none."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    # Edge keys used to be "disease_id|target_id"
+    for entity in RELATIONSHIP_KEYS:
+        hashes = manifest.get(entity, {})
+        if any(not key.startswith("[") for key in hashes):
+            manifest[entity] = {
+                (key if key.startswith("[") else json.dumps(key.split("|", 1))): digest
+                for key, digest in hashes.items()
+            }
+    return manifest
+
+
+def drop_detached_edges(manifest, removed):
+    """
+    Remove from the manifest the edges of deleted nodes: DETACH DELETE drops
+    them from the graph even when their CSV rows remain, so they must be
+    written again if the node comes back.
+    """
+    entities = {label: entity for entity, (label, _) in NODE_KEYS.items()}
+    diseases = set(removed.get("diseases", ()))
+    for entity, (_, label, _) in RELATIONSHIP_KEYS.items():
+        targets = set(removed.get(entities[label], ()))
+        if entity not in manifest or not (diseases or targets):
+            continue
+        kept = {}
+        for key, digest in manifest[entity].items():
+            disease_id, target_id = json.loads(key)
+            if disease_id not in diseases and target_id not in targets:
+                kept[key] = digest
+        manifest[entity] = kept
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    """Write the manifest atomically so a crash never leaves a partial file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def manifest_version(manifest):
+    """Content hash of a manifest, used as the graph's data version."""
+    encoded = json.dumps(manifest, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()
+
+
+def build_manifest(processed_dir=PROCESSED_DIR):
+    """Hash every row of every processed CSV."""
+    manifest = {}
+    for entity, file_name in NODE_FILES + RELATIONSHIP_FILES:
+        hashes = {}
+        for batch in read_csv_batches(os.path.join(processed_dir, file_name)):
+            for row in batch:
+                hashes[row_key(entity, row)] = row_hash(row)
+        manifest[entity] = hashes
+    return manifest
+
+
+def columnar_query(entity, columns):
+    """
+    Variant of BULK_QUERIES[entity] taking one list parameter per column
+    instead of a list of row maps, so no dict is allocated per row client-side.
+    """
+    body = BULK_QUERIES[entity].replace("UNWIND $rows AS row", "", 1)
+    fields = ", ".join(f"{name}: ${name}[i]" for name in columns)
+    return f"UNWIND range(0, $n - 1) AS i WITH {{{fields}}} AS row {body}"
+
+
+def _write_columns(tx, query, params):
+    tx.run(query, params).consume()
+
+
+def read_csv_batches(filepath, batch_size=DEFAULT_BATCH_SIZE):
+    """Stream a CSV file as lists of row dicts, at most batch_size rows each."""
+    with open(filepath, "r", encoding="utf-8") as f:
+        batch = []
+        for row in csv.DictReader(f):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def partition_for(disease_id, partitions):
+    """Stable partition index for a disease id: same disease, same worker."""
+    return zlib.crc32(disease_id.encode("utf-8")) % partitions
+
+
+def _delete_nodes_batch(tx, limit):
+    record = tx.run(
+        "MATCH (n) WITH n LIMIT $limit DETACH DELETE n RETURN count(*) AS deleted",
+        limit=limit,
+    ).single()
+    return record["deleted"]
+
+
+def _write_batch(tx, query, rows, attempts=None):
+    # Managed transactions re-invoke this function on transient errors
+    # (deadlocks, leader switches), so counting calls counts retries.
+    if attempts is not None:
+        attempts.append(1)
+    tx.run(query, rows=rows).consume()
+
 
 class Neo4jImporter:
     def __init__(self):
@@ -27,11 +327,119 @@ class Neo4jImporter:
         """Close Neo4j connection"""
         self.driver.close()
 
-    def clear_database(self):
-        """Delete all existing nodes and relationships (use carefully)."""
+    def clear_database(self, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Delete all existing nodes and relationships (use carefully).
+        Works in batches so a large graph never needs one giant transaction.
+        """
+        deleted = 0
         with self.driver.session(database=self.database) as session:
-            session.run("MATCH (n) DETACH DELETE n")
-        print("🗑️ Database cleared.")
+            while True:
+                count = session.execute_write(_delete_nodes_batch, batch_size)
+                deleted += count
+                if count == 0:
+                    break
+        print(f"🗑️ Database cleared ({deleted} nodes deleted).")
+
+    def set_data_version(self, version):
+        """
+        Record the loaded dataset's version on a singleton DataVersion node so
+        in-process indexes and caches can tell when the graph changed.
+        """
+        with self.driver.session(database=self.database) as session:
+            session.run(
+                """
+                MERGE (v:DataVersion {id: 'current'})
+                SET v.version = $version, v.updated_at = datetime()
+                """,
+                version=version,
+            ).consume()
+        print(f"🏷️ Data version: {version}")
+
+    # ------------------ SCHEMA ------------------
+
+    def create_schema(self):
+        """Idempotently create uniqueness constraints and lookup indexes."""
+        with self.driver.session(database=self.database) as session:
+            for name, label, prop in SCHEMA_CONSTRAINTS:
+                session.run(
+                    f"CREATE CONSTRAINT {name} IF NOT EXISTS "
+                    f"FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE"
+                ).consume()
+            for name, label, prop in SCHEMA_INDEXES:
+                session.run(
+                    f"CREATE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})"
+                ).consume()
+            # Imports should not start while indexes are still populating
+            session.run(
+                "CALL db.awaitIndexes($timeout)", timeout=SCHEMA_AWAIT_SECONDS
+            ).consume()
+            for name, _, backfill in SCHEMA_MIGRATIONS:
+                updated = session.run(backfill).single()["updated"]
+                if updated:
+                    print(f"🔧 Migration {name}: {updated} nodes backfilled")
+        print("📐 Schema constraints and indexes in place")
+
+    def check_schema(self):
+        """
+        Compare the live database against SCHEMA_CONSTRAINTS / SCHEMA_INDEXES
+        and look for nodes SCHEMA_MIGRATIONS has not backfilled yet.
+        Returns a list of human-readable problems (empty when all is well).
+        """
+        with self.driver.session(database=self.database) as session:
+            constraints = session.run(
+                "SHOW CONSTRAINTS YIELD type, labelsOrTypes, properties"
+            ).data()
+            indexes = session.run(
+                "SHOW INDEXES YIELD name, type, labelsOrTypes, properties, state"
+            ).data()
+            pending = {
+                name: session.run(count).single()["missing"]
+                for name, count, _ in SCHEMA_MIGRATIONS
+            }
+
+        unique = {
+            (c["labelsOrTypes"][0], c["properties"][0])
+            for c in constraints
+            if "UNIQUENESS" in c["type"]
+            and len(c["labelsOrTypes"] or []) == 1
+            and len(c["properties"] or []) == 1
+        }
+        indexed = {}
+        for i in indexes:
+            if len(i["labelsOrTypes"] or []) == 1 and len(i["properties"] or []) == 1:
+                indexed[(i["labelsOrTypes"][0], i["properties"][0])] = i
+
+        problems = []
+        for name, label, prop in SCHEMA_CONSTRAINTS:
+            if (label, prop) not in unique:
+                problems.append(
+                    f"missing uniqueness constraint {name} on :{label}({prop})"
+                )
+        for name, label, prop in SCHEMA_INDEXES:
+            index = indexed.get((label, prop))
+            if index is None:
+                problems.append(f"missing index {name} on :{label}({prop})")
+            elif index["state"] != "ONLINE":
+                problems.append(
+                    f"index {index['name']} on :{label}({prop}) is {index['state']}"
+                )
+        for name, missing in pending.items():
+            if missing:
+                problems.append(
+                    f"migration {name} pending for {missing} nodes "
+                    "(run the importer to backfill)"
+                )
+
+        if problems:
+            for problem in problems:
+                print(f"❌ {problem}")
+        else:
+            print(
+                "✅ Schema check passed: all constraints and indexes are online, "
+                "no pending migrations"
+            )
+        return problems
 
     # ------------------ NODE IMPORTERS ------------------
 
@@ -43,6 +451,7 @@ class Neo4jImporter:
                         """
                         MERGE (s:Symptom {id: $id})
                         SET s.name = $name,
+                            s.name_lower = toLower($name),
                             s.description = $description,
                             s.body_site = $body_site,
                             s.commonness = $commonness
@@ -195,32 +604,382 @@ class Neo4jImporter:
                     )
         print("✅ Disease-Precaution relationships imported")
 
+    def import_all(self, processed_dir=PROCESSED_DIR):
+        """Row-by-row import of every node file, then every relationship file."""
+        # Import nodes
+        self.import_symptoms(os.path.join(processed_dir, "symptoms.csv"))
+        self.import_cures(os.path.join(processed_dir, "cures.csv"))
+        self.import_medicines(os.path.join(processed_dir, "medicines.csv"))
+        self.import_precautions(os.path.join(processed_dir, "precautions.csv"))
+        self.import_diseases(os.path.join(processed_dir, "diseases.csv"))
 
-# ------------------ RUN SCRIPT ------------------
+        # Import relationships
+        self.import_disease_symptom(
+            os.path.join(processed_dir, "disease_has_symptom.csv")
+        )
+        self.import_disease_cure(os.path.join(processed_dir, "disease_has_cure.csv"))
+        self.import_disease_medicine(
+            os.path.join(processed_dir, "disease_has_medicine.csv")
+        )
+        self.import_disease_precaution(
+            os.path.join(processed_dir, "disease_has_precaution.csv")
+        )
 
-if __name__ == "__main__":
-    importer = Neo4jImporter()
+    # ------------------ BULK IMPORTERS ------------------
+
+    def bulk_import(self, entity, filepath, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Import one entity type with one UNWIND statement per batch of rows,
+        each batch in its own explicit write transaction.
+        Returns (rows, seconds).
+        """
+        query = BULK_QUERIES[entity]
+        total = 0
+        start = time.perf_counter()
+        with self.driver.session(database=self.database) as session:
+            for rows in read_csv_batches(filepath, batch_size):
+                session.execute_write(_write_batch, query, rows)
+                total += len(rows)
+        elapsed = time.perf_counter() - start
+        rate = total / elapsed if elapsed > 0 else 0.0
+        print(f"✅ {entity}: {total} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+        return total, elapsed
+
+    def bulk_import_columnar(
+        self, entity, columnar_dir=COLUMNAR_DIR, batch_size=DEFAULT_BATCH_SIZE
+    ):
+        """
+        Like bulk_import(), but reads a memory-mapped columnar table written by
+        `etl_pipeline.py --columnar` instead of parsing CSV.
+        Returns (rows, seconds).
+        """
+        file_name = dict(NODE_FILES + RELATIONSHIP_FILES)[entity]
+        table = ColumnarTable(table_path(columnar_dir, file_name[: -len(".csv")]))
+        # Edge tables hold row indexes; resolve them through the node id columns
+        ref_tables = {
+            name: ColumnarTable(table_path(columnar_dir, ref))
+            for name, ref in table.meta.get("references", {}).items()
+        }
+        references = {name: ref.column(name) for name, ref in ref_tables.items()}
+        query = columnar_query(entity, table.column_names)
+
+        start = time.perf_counter()
+        with self.driver.session(database=self.database) as session:
+            for offset in range(0, table.rows, batch_size):
+                end = min(offset + batch_size, table.rows)
+                params = {"n": end - offset}
+                for name in table.column_names:
+                    values = table.read(name, offset, end)
+                    if name in references:
+                        values = [references[name][i] for i in values]
+                    params[name] = values
+                session.execute_write(_write_columns, query, params)
+        references.clear()
+        for ref in ref_tables.values():
+            ref.close()
+        table.close()
+
+        elapsed = time.perf_counter() - start
+        rate = table.rows / elapsed if elapsed > 0 else 0.0
+        print(
+            f"✅ {entity}: {table.rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)"
+        )
+        return table.rows, elapsed
+
+    def columnar_import_all(
+        self, columnar_dir=COLUMNAR_DIR, batch_size=DEFAULT_BATCH_SIZE
+    ):
+        """Bulk import every node table, then every edge table, from columnar files."""
+        stats = {}
+        for entity, _ in NODE_FILES + RELATIONSHIP_FILES:
+            stats[entity] = self.bulk_import_columnar(entity, columnar_dir, batch_size)
+        return stats
+
+    def bulk_import_nodes(
+        self, processed_dir=PROCESSED_DIR, batch_size=DEFAULT_BATCH_SIZE
+    ):
+        """Bulk import every node file."""
+        stats = {}
+        for entity, file_name in NODE_FILES:
+            stats[entity] = self.bulk_import(
+                entity, os.path.join(processed_dir, file_name), batch_size
+            )
+        return stats
+
+    def bulk_import_relationships(
+        self, processed_dir=PROCESSED_DIR, batch_size=DEFAULT_BATCH_SIZE
+    ):
+        """Bulk import every relationship file, one after another."""
+        stats = {}
+        for entity, file_name in RELATIONSHIP_FILES:
+            stats[entity] = self.bulk_import(
+                entity, os.path.join(processed_dir, file_name), batch_size
+            )
+        return stats
+
+    def bulk_import_all(
+        self, processed_dir=PROCESSED_DIR, batch_size=DEFAULT_BATCH_SIZE
+    ):
+        """Bulk import every node file, then every relationship file."""
+        stats = self.bulk_import_nodes(processed_dir, batch_size)
+        stats.update(self.bulk_import_relationships(processed_dir, batch_size))
+        return stats
+
+    # ------------------ INCREMENTAL SYNC ------------------
+
+    def incremental_sync(
+        self,
+        processed_dir=PROCESSED_DIR,
+        manifest_path=MANIFEST_PATH,
+        batch_size=DEFAULT_BATCH_SIZE,
+    ):
+        """
+        Apply only what changed since the last import.
+
+        Every CSV row is hashed and compared with the stored manifest: new and
+        changed rows are upserted (the bulk MERGE queries cover both), rows
+        missing from the CSVs are deleted. Database writes scale with the size
+        of the change. The manifest is only replaced once the sync succeeded.
+        Returns {entity: {"inserted", "updated", "deleted"}}.
+        """
+        previous_manifest = load_manifest(manifest_path)
+        manifest = {}
+        removed = {}
+        stats = {}
+        start = time.perf_counter()
+
+        with self.driver.session(database=self.database) as session:
+            # Upserts: nodes first, since edges MATCH on their endpoints
+            for entity, file_name in NODE_FILES + RELATIONSHIP_FILES:
+                previous = previous_manifest.get(entity, {})
+                current = {}
+                pending = []
+                inserted = updated = 0
+                filepath = os.path.join(processed_dir, file_name)
+                for batch in read_csv_batches(filepath, batch_size):
+                    for row in batch:
+                        key, digest = row_key(entity, row), row_hash(row)
+                        current[key] = digest
+                        old_digest = previous.get(key)
+                        if old_digest == digest:
+                            continue
+                        if old_digest is None:
+                            inserted += 1
+                        else:
+                            updated += 1
+                        pending.append(row)
+                        if len(pending) >= batch_size:
+                            session.execute_write(
+                                _write_batch, BULK_QUERIES[entity], pending
+                            )
+                            pending = []
+                if pending:
+                    session.execute_write(_write_batch, BULK_QUERIES[entity], pending)
+
+                manifest[entity] = current
+                removed[entity] = [key for key in previous if key not in current]
+                stats[entity] = {
+                    "inserted": inserted,
+                    "updated": updated,
+                    "deleted": len(removed[entity]),
+                }
+
+            # Deletes: edges first, then nodes (DETACH covers leftover edges)
+            for entity, _ in RELATIONSHIP_FILES + NODE_FILES:
+                rows = delete_rows(entity, removed[entity])
+                query = delete_query(entity)
+                for i in range(0, len(rows), batch_size):
+                    session.execute_write(_write_batch, query, rows[i : i + batch_size])
+
+        drop_detached_edges(manifest, removed)
+        save_manifest(manifest, manifest_path)
+
+        elapsed = time.perf_counter() - start
+        for entity, counts in stats.items():
+            print(
+                f"🔁 {entity}: +{counts['inserted']} ~{counts['updated']} "
+                f"-{counts['deleted']}"
+            )
+        print(f"✅ Incremental sync finished in {elapsed:.2f}s")
+        return stats
+
+    # ------------------ PARALLEL RELATIONSHIP IMPORT ------------------
+
+    def parallel_import_relationships(
+        self,
+        processed_dir=PROCESSED_DIR,
+        workers=DEFAULT_WORKERS,
+        batch_size=DEFAULT_BATCH_SIZE,
+    ):
+        """
+        Import all relationship files on a thread pool, one session per worker.
 
-    importer.clear_database()
+        Edges are partitioned by disease_id and each partition is written by a
+        single worker, in order, so concurrent transactions never MERGE edges
+        on the same Disease node. Remaining transient errors (e.g. deadlocks
+        on shared Symptom nodes) are retried by the managed write transaction.
+        Returns {entity: rows}.
+        """
+        queues = [queue.Queue(maxsize=WORKER_QUEUE_DEPTH) for _ in range(workers)]
+        rows_done = Counter()
+        retries = Counter()
+        errors = []
+        lock = threading.Lock()
 
-    # Import nodes
-    importer.import_symptoms(os.path.join(PROCESSED_DIR, "symptoms.csv"))
-    importer.import_cures(os.path.join(PROCESSED_DIR, "cures.csv"))
-    importer.import_medicines(os.path.join(PROCESSED_DIR, "medicines.csv"))
-    importer.import_precautions(os.path.join(PROCESSED_DIR, "precautions.csv"))
-    importer.import_diseases(os.path.join(PROCESSED_DIR, "diseases.csv"))
+        def worker(work):
+            try:
+                with self.driver.session(database=self.database) as session:
+                    while True:
+                        item = work.get()
+                        if item is None:
+                            return
+                        entity, rows = item
+                        attempts = []
+                        session.execute_write(
+                            _write_batch, BULK_QUERIES[entity], rows, attempts
+                        )
+                        with lock:
+                            rows_done[entity] += len(rows)
+                            retries[entity] += len(attempts) - 1
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+                # Keep draining so the reader never blocks on a dead worker
+                while work.get() is not None:
+                    pass
 
-    # Import relationships
-    importer.import_disease_symptom(
-        os.path.join(PROCESSED_DIR, "disease_has_symptom.csv")
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for work in queues:
+                pool.submit(worker, work)
+            try:
+                for entity, file_name in RELATIONSHIP_FILES:
+                    filepath = os.path.join(processed_dir, file_name)
+                    buckets = [[] for _ in range(workers)]
+                    for batch in read_csv_batches(filepath, batch_size):
+                        for row in batch:
+                            k = partition_for(row["disease_id"], workers)
+                            buckets[k].append(row)
+                            if len(buckets[k]) >= batch_size:
+                                queues[k].put((entity, buckets[k]))
+                                buckets[k] = []
+                    for k, rows in enumerate(buckets):
+                        if rows:
+                            queues[k].put((entity, rows))
+            finally:
+                for work in queues:
+                    work.put(None)
+
+        if errors:
+            raise errors[0]
+
+        elapsed = time.perf_counter() - start
+        total = sum(rows_done.values())
+        rate = total / elapsed if elapsed > 0 else 0.0
+        for entity, _ in RELATIONSHIP_FILES:
+            print(f"✅ {entity}: {rows_done[entity]} rows ({retries[entity]} retries)")
+        print(
+            f"⚡ Relationships imported with {workers} workers: {total} rows "
+            f"in {elapsed:.2f}s ({rate:,.0f} rows/sec)"
+        )
+        return dict(rows_done)
+
+
+# ------------------ RUN SCRIPT ------------------
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import processed CSVs into Neo4j")
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Use batched UNWIND transactions instead of one query per row",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Rows per UNWIND batch in bulk mode (default: {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="Bulk import nodes, then relationships on a thread pool "
+        "partitioned by disease_id",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Worker threads/sessions in parallel mode (default: {DEFAULT_WORKERS})",
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Bulk import from processed_data/columnar/ (etl_pipeline.py --columnar) "
+        "instead of the CSVs",
+    )
+    parser.add_argument(
+        "--check-schema",
+        action="store_true",
+        help="Only report missing constraints/indexes on the live database",
     )
-    importer.import_disease_cure(os.path.join(PROCESSED_DIR, "disease_has_cure.csv"))
-    importer.import_disease_medicine(
-        os.path.join(PROCESSED_DIR, "disease_has_medicine.csv")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Apply only inserts/updates/deletes since the last import "
+        "instead of clearing and reloading the database",
     )
-    importer.import_disease_precaution(
-        os.path.join(PROCESSED_DIR, "disease_has_precaution.csv")
+    parser.add_argument(
+        "--manifest",
+        default=MANIFEST_PATH,
+        help="Content-hash manifest used by incremental sync",
     )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    importer = Neo4jImporter()
+
+    try:
+        if args.check_schema:
+            return 1 if importer.check_schema() else 0
+
+        importer.create_schema()
+
+        if args.incremental:
+            importer.incremental_sync(
+                PROCESSED_DIR, manifest_path=args.manifest, batch_size=args.batch_size
+            )
+            importer.set_data_version(manifest_version(load_manifest(args.manifest)))
+            print(f"🎉 Neo4j database synced: {Config.NEO4J_DATABASE}")
+            return 0
+
+        importer.clear_database(batch_size=args.batch_size)
+
+        if args.parallel:
+            importer.bulk_import_nodes(PROCESSED_DIR, batch_size=args.batch_size)
+            importer.parallel_import_relationships(
+                PROCESSED_DIR, workers=args.workers, batch_size=args.batch_size
+            )
+        elif args.columnar:
+            importer.columnar_import_all(COLUMNAR_DIR, batch_size=args.batch_size)
+        elif args.bulk:
+            importer.bulk_import_all(PROCESSED_DIR, batch_size=args.batch_size)
+        else:
+            importer.import_all(PROCESSED_DIR)
+
+        # Record what was loaded so the next refresh can be incremental
+        manifest = build_manifest(PROCESSED_DIR)
+        save_manifest(manifest, args.manifest)
+        importer.set_data_version(manifest_version(manifest))
+    finally:
+        importer.close()
 
-    importer.close()
     print(f"🎉 All data imported into Neo4j database: {Config.NEO4J_DATABASE}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())